@@ -49,3 +49,32 @@ global_tmpdir = None
     If None, defaults to system tmp dir. However, two environment variable take
     precedence: PBS_TMPDIR and PYLADA_TMPDIR.
 """
+
+copyfile_fsync = True
+""" Whether :py:func:`pylada.misc.copyfile` flushes copies to disk.
+
+    Flushing guarantees copies survive a crash of the node, at the cost of
+    waiting for the disk. Restart files are easily recreated, so that it can
+    be turned off on parallel file-systems where flushing large files is slow.
+"""
+
+mass_extract_workers = 1
+""" Number of workers collecting attributes in mass-extraction objects.
+
+    Extracting from many jobs is mostly limited by file-system latency, so
+    that a few tens of threads can pay off on parallel file-systems.
+"""
+mass_extract_pool = 'thread'
+""" Whether mass-extraction workers are 'thread' or 'process' pools. """
+mass_extract_chunksize = None
+""" Number of jobs sent to each process at a time. Computed if None. """
+
+extraction_cache = None
+""" Path to a persistent cache of extracted properties.
+
+    If not None, properties of extraction objects are stored in an SQLite
+    database at this path, so that they need not be extracted again from
+    unchanged output files. See :py:mod:`pylada.tools.diskcache`.
+"""
+extraction_cache_size = 1 << 30
+""" Maximum size of the persistent extraction cache, in bytes. """
@@ -27,3 +27,9 @@ vasp_has_nlep = False
 """ Should be set to True if one wants to use NLEP. """
 is_vasp_4 = False
 """ Set to True to use vasp4-style POSCARS and INCARS. """
+potcar_store = None
+""" Directory of the content-addressed store of assembled POTCAR files.
+
+    If not None, the POTCAR of each ordered set of pseudo-potentials is
+    written once to this directory, and hard-linked into run directories.
+"""
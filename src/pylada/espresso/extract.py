@@ -24,6 +24,7 @@
 """ Pwscf Extraction """
 from ..espresso import logger
 from ..tools import make_cached
+from ..tools.sections import SectionIndex
 logger = logger.getChild('extract')
 
 
@@ -31,10 +32,13 @@ def grepper(regex, path="output_path", last=True, fail=False, fail_on_missing_fi
     """ Decorator to ease adding greppers
 
         :param regex: str
-            Regular expression to match in file
+            Regular expression to match in file. It is compiled in multiline
+            mode: ``^`` and ``$`` match at the start and end of lines, whether
+            the file is searched from its start or, in windows, from its end.
         :param path: attribute from which to get path to file
         :param last: Bool
             If true, returns last instance of regex, and the first otherwise.
+            The last instance is searched from the end of the file.
         :param fail: Bool
             If true, raises exception if regex not found.
         :param fail_on_missing_file: Bool
@@ -46,17 +50,24 @@ def grepper(regex, path="output_path", last=True, fail=False, fail_on_missing_fi
         @wraps(method)
         def attribute(self):
             from .. import error
-            from re import finditer, search
+            from re import compile, M
+            from ..tools.extract import map_file, _rsearch_window
             filepath = getattr(self, path)
             match = None
             if not filepath.check(file=True):
                 if fail_on_missing_file:
                     raise error.IOError("File %s does not exist" % filepath)
             elif last:
-                for match in finditer(regex, filepath.open("r").read()):
-                    pass
+                with filepath.open("rb") as file:
+                    data = map_file(file)
+                    try:
+                        match = next(_rsearch_window(compile(regex, M), data), None)
+                    finally:
+                        if hasattr(data, 'close'):
+                            data.close()
             else:
-                match = search(regex, filepath.open("r").read())
+                with filepath.open("r") as file:
+                    match = compile(regex, M).search(file.read())
 
             if match is None and fail:
                 raise error.RuntimeError(
@@ -66,6 +77,20 @@ def grepper(regex, path="output_path", last=True, fail=False, fail_on_missing_fi
     return grepper
 
 
+class PwscfIndex(SectionIndex):
+    """ Offsets of the sections of a Pwscf output file. """
+    SECTIONS = (
+        # converged energies are marked '!', or '!!' by some versions.
+        ('energy', br'!+[ \t]*total[ \t]+energy[ \t]*='),
+        ('forces', br'Forces[ \t]+acting[ \t]+on[ \t]+atoms'),
+        ('stress', br'total[ \t]+stress[^\n]*kbar'),
+        ('positions', br'ATOMIC_POSITIONS'),
+        ('cell', br'CELL_PARAMETERS'),
+        ('wfc', br'Starting[ \t]+wfc[ \t]+from[ \t]+file'),
+        ('done', br'JOB[ \t]+DONE\.'),
+    )
+
+
 class Extract(object):
     """ Extracts stuff from pwscf output """
 
@@ -107,18 +132,49 @@ class Extract(object):
     def error_path(self):
         return self.abspath.join("%s.err" % self.prefix)
 
-    def __grep_pwscf_out(self, regex):
+    @property
+    def _output_index(self):
+        """ Section index of the output file.
+
+            Built in a single pass over the file, and shared by all extraction
+            objects until the file changes.
+        """
         from .. import error
-        from re import search
+        from ..tools.sections import section_index
         if not self.output_path.check(file=True):
             raise error.IOError("File %s does not exist" % self.output_path)
-        return search(regex, self.output_path.open("rb").read())
+        with self.output_path.open("rb") as file:
+            return section_index(PwscfIndex, file)
+
+    def _last_section(self, name, what=None):
+        """ Offset of the last occurence of a section in the output file.
+
+            :param str what:
+                If given, raises :py:class:`~pylada.error.RuntimeError` when
+                the section cannot be found.
+        """
+        from .. import error
+        offset = self._output_index.last(name)
+        if offset is None and what is not None:
+            raise error.RuntimeError("Could not find %s in %s" % (what, self.output_path))
+        return offset
+
+    def _section_lines(self, offset, n=None):
+        """ Lines of the output file from the given offset.
+
+            :param int n:
+                Number of lines to read. Reads to the end of the file if None.
+        """
+        from itertools import islice
+        with self.output_path.open("rb") as file:
+            return list(islice(PwscfIndex.lines(file, offset), n))
 
     @property
-    @grepper("JOB DONE.", fail=False, fail_on_missing_file=False)
-    def success(self, match):
+    def success(self):
         """ True if calculation is successful """
-        return match is not None
+        if not self.output_path.check(file=True):
+            return False
+        return self._output_index.last('done') is not None
 
     @property
     @make_cached
@@ -144,15 +200,16 @@ class Extract(object):
         """ Modify atomic positions according to last change """
         from .. import error
         from .card import read_cards
-        cards = [u for u in read_cards(self.output_path.open(mode='r'))
+        offset = self._last_section('positions', 'atomic positions')
+        cards = [u for u in read_cards(self._section_lines(offset))
                  if u.name == 'atomic_positions']
-        positions = cards[-1].value.split('\n')
+        positions = cards[0].value.split('\n')
         if len(positions) != len(structure):
             raise error.RuntimeError("Number of atoms and input positions do not match")
         for atom, input in zip(structure, positions):
             atom.pos = input.split()[1:4]
 
-        subtitle = cards[-1].subtitle.replace('(', '').replace(')', '')
+        subtitle = cards[0].subtitle.replace('(', '').replace(')', '')
         if subtitle == 'bhor':
             factor = 1e0 / float(structure.scale.units.rescale('bohr_radius'))
             for atom in structure:
@@ -173,38 +230,62 @@ class Extract(object):
     def __cell(self, structure):
         """ Modify atomic positions according to last change """
         from .card import read_cards
-        cards = [u for u in read_cards(self.output_path.open(mode='r'))
+        offset = self._last_section('cell', 'cell parameters')
+        cards = [u for u in read_cards(self._section_lines(offset))
                  if u.name == 'cell_parameters']
-        structure.cell = [u.split() for u in cards[-1].value.split('\n')]
+        structure.cell = [u.split() for u in cards[0].value.split('\n')]
 
     @property
     @make_cached
-    @grepper(r"Forces acting on atoms.*\n\n((?:\s*atom .* force = .*\n)*)")
-    def forces(self, match):
+    def forces(self):
         """ Greps forces from pwscf.out """
         from numpy import array
         from quantities import Ry, bohr_radius as a0
-        lines = match.group(1).rstrip().lstrip().split('\n')
-        return (Ry / a0) * array(
-            [u.rstrip().lstrip().split()[6:] for u in lines],
-            dtype='float64'
-        )
+        from .. import error
+        offset = self._last_section('forces')
+        if offset is None:
+            raise error.GrepError("Could not find forces in %s" % self.output_path)
+        lines = iter(self._section_lines(offset))
+        # skips title, which is followed by a blank line.
+        next(lines, None)
+        result = []
+        if len(next(lines, '').strip()) == 0:
+            for line in lines:
+                if line.split()[:1] != ['atom'] or 'force =' not in line:
+                    break
+                result.append(line.split()[6:])
+        return (Ry / a0) * array(result, dtype='float64')
 
     @property
     @make_cached
-    @grepper(r"\!\s*total energy\s*=\s*(\S*) Ry", fail=True)
-    def total_energy(self, match):
+    def total_energy(self):
         """ Total energy at the end of the calculation """
         from quantities import Ry
-        return float(match.group(1)) * Ry
+        offset = self._last_section('energy', 'total_energy')
+        line = self._section_lines(offset, 1)[0]
+        return float(line.split('=')[1].split()[0]) * Ry
+
+    @property
+    @make_cached
+    def total_energies(self):
+        """ Total energy at the end of each self-consistent cycle """
+        from numpy import array
+        from quantities import Ry
+        index = self._output_index
+        results = []
+        with self.output_path.open("rb") as file:
+            for offset in index['energy']:
+                line = next(index.lines(file, offset))
+                results.append(float(line.split('=')[1].split()[0]))
+        return array(results, dtype='float64') * Ry
 
     @property
     @make_cached
-    @grepper(r"total \s* stress .*kbar.*\n((?:.*\n){3})", fail=True)
-    def stress(self, match):
+    def stress(self):
         from quantities import kilobar
         from numpy import array
-        lines = match.group(1).rstrip().lstrip().split('\n')
+        offset = self._last_section('stress', 'stress')
+        lines = self._section_lines(offset, 4)[1:]
         return array([u.split()[3:6] for u in lines], dtype='float64') * kilobar
 
     @property
@@ -224,10 +305,9 @@ class Extract(object):
 
     @property
     @make_cached
-    @grepper("Starting wfc from file", fail=False)
-    def started_from_wavefunctions_file(self, match):
+    def started_from_wavefunctions_file(self):
         """ True if restarted from wavefunction file """
-        return match is not None
+        return self._last_section('wfc') is not None
 
     def __directory_hook__(self):
         """ Called whenever the directory changes. """
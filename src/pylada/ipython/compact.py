@@ -0,0 +1,87 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" IPython compact magic function. """
+__docformat__ = "restructuredtext en"
+
+
+def compact(self, event):
+    """ Compresses output files of finished calculations. """
+    import argparse
+    from os.path import relpath
+    from os import getcwd
+    from ..tools.compressed import compact as compact_files, SUFFIXES
+    from . import get_shell
+    shell = get_shell(self)
+
+    parser = argparse.ArgumentParser(prog='%compact',
+                                     description='Compresses the output files of finished '
+                                     'calculations in the current job-folder, in a seekable '
+                                     'format that extraction objects read transparently. '
+                                     'Calculations which are still running are skipped. '
+                                     'Compressed files are still picked up by %export. '
+                                     'This function only requires that \"collect\" exists in the '
+                                     'user namespace.')
+    parser.add_argument('--format', type=str, dest='format', default='gz',
+                        choices=[u[1:] for u in SUFFIXES],
+                        help='Compression format. gz and zst files are seekable.')
+    parser.add_argument('--level', type=int, dest='level', default=None,
+                        help='Compression level.')
+    parser.add_argument('--nworkers', type=int, dest='nworkers', default=None,
+                        help='Number of files compressed in parallel.')
+    parser.add_argument('--list', action="store_true", dest="aslist",
+                        help='Do not compress, return a list of the files.')
+    parser.add_argument('--dos', action="store_true", dest="dos",
+                        help='Include Density of States (DOSCAR) files.')
+    parser.add_argument('--charge', action="store_true", dest="charge",
+                        help='Include charge (CHGCAR) files.')
+    parser.add_argument('--contcar', action="store_true", dest="contcar",
+                        help='Include CONTCAR files.')
+    parser.add_argument('--procar', action="store_true", dest="procar",
+                        help='Include PROCAR files.')
+
+    try:
+        args = parser.parse_args(event.split())
+    except SystemExit as e:
+        return None
+
+    collect = shell.user_ns.get('collect', None)
+    if collect is None:
+        print("Could not find 'collect' object in user namespace.")
+        print("Please load a job-dictionary.")
+        return
+
+    kwargs = {'dos': args.dos, 'charge': args.charge, 'contcar': args.contcar,
+              'procar': args.procar}
+    files = []
+    for name, extract in collect.items():
+        if getattr(extract, 'is_running', False) or not hasattr(extract, 'files'):
+            continue
+        files.extend(u for u in extract.files(**kwargs) if not u.endswith(SUFFIXES))
+
+    if args.aslist:
+        from IPython.utils.text import SList
+        directory = getcwd()
+        return SList([relpath(file, directory) for file in files])
+    results = compact_files(files, format=args.format, level=args.level,
+                            nworkers=args.nworkers)
+    print("Compressed {0} file(s).".format(len(results)))
@@ -34,6 +34,7 @@ def main():
     from os import environ
     from pylada import jobfolder
     from pylada.process.mpi import create_global_comm
+    from pylada.process.journal import Journal
     import pylada
 
     # below would go additional imports.
@@ -73,9 +74,21 @@ def main():
 
     timeout = None if options.timeout <= 0 else options.timeout
 
-    jobfolder = jobfolder.load(options.pickle, timeout=timeout)
     name = environ["PYLADA_JOBARRAY_NAME"]
-    jobfolder[name].compute(comm=pylada.default_comm, outdir=name)
+    journal = Journal(Journal.path_for(options.pickle))
+    if name in journal.finished:
+        return
+    jobfolder = jobfolder.load(options.pickle, timeout=timeout, names=[name])
+    journal.start(name)
+    try:
+        result = jobfolder[name].compute(comm=pylada.default_comm, outdir=name)
+    except Exception:
+        journal.fail(name)
+        raise
+    if getattr(result, 'success', True):
+        journal.finish(name)
+    else:
+        journal.fail(name)
 
 if __name__ == "__main__":
     main()
@@ -35,6 +35,7 @@ def main():
     from pylada import jobfolder
     from pylada.process.mpi import create_global_comm
     from pylada.process.jobfolder import JobFolderProcess
+    from pylada.process.journal import Journal
     import pylada
 
     # below would go additional imports.
@@ -75,7 +76,9 @@ def main():
     timeout = None if options.timeout <= 0 else options.timeout
 
     jobfolder = jobfolder.load(options.pickle, timeout=timeout)
-    process = JobFolderProcess(jobfolder, outdir=getcwd(), nbpools=options.pools)
+    journal = Journal(Journal.path_for(options.pickle))
+    process = JobFolderProcess(jobfolder, outdir=getcwd(), nbpools=options.pools,
+                               journal=journal)
     process.start(pylada.default_comm)
     process.wait(60)
 
@@ -33,6 +33,7 @@ def main():
     from argparse import ArgumentParser
     from pylada import jobfolder
     from pylada.process.mpi import create_global_comm
+    from pylada.process.journal import Journal
     import pylada
 
     # below would go additional imports.
@@ -92,10 +93,15 @@ def main():
 
     timeout = None if options.timeout <= 0 else options.timeout
 
-    jobfolder = jobfolder.load(options.pickle, timeout=timeout)
+    jobfolder = jobfolder.load(options.pickle, timeout=timeout, names=options.names)
     print(('  ipy/lau/scattered_script: jobfolder: %s' % jobfolder))
     print(('  ipy/lau/scattered_script: options: %s' % options))
+    journal = Journal(Journal.path_for(options.pickle))
+    finished = journal.finished
     for name in options.names:
+        if name in finished:
+            logger.info('ipy/lau/scattered_script: journal says finished: %s' % name)
+            continue
         logger.info('ipy/lau/scattered_script: testValidProgram: %s' % testValidProgram)
         logger.info('ipy/lau/scattered_script: name: %s' % name)
         logger.info('ipy/lau/scattered_script: jobfolder[name]: %s' % jobfolder[name])
@@ -111,7 +117,16 @@ def main():
         comm = pylada.default_comm
         if testValidProgram != None:
             comm = None
-        jobfolder[name].compute(comm=comm, outdir=name)
+        journal.start(name)
+        try:
+            result = jobfolder[name].compute(comm=comm, outdir=name)
+        except Exception:
+            journal.fail(name)
+            raise
+        if getattr(result, 'success', True):
+            journal.finish(name)
+        else:
+            journal.fail(name)
         logger.info('ipy/lau/scattered_script: after compute for name: %s' % name)
 
 if __name__ == "__main__":
@@ -72,6 +72,11 @@ class Pylada(Magics):
         from .export import export
         return export(self, line)
 
+    @line_magic
+    def compact(self, line):
+        from .compact import compact
+        return compact(self, line)
+
     @line_magic
     def copyfolder(self, line):
         from .manipfolders import copy_folder
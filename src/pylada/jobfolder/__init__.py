@@ -46,7 +46,8 @@ from .extract import AbstractMassExtract
 from .massextract import MassExtract
 
 
-def save(jobfolder, path='jobfolder.dict', overwrite=False, timeout=None):
+def save(jobfolder, path='jobfolder.dict', overwrite=False, timeout=None,
+         indexed=None, dedup=True):
     """ Pickles a job-folder to file.
 
         :param jobfolder:
@@ -60,6 +61,16 @@ def save(jobfolder, path='jobfolder.dict', overwrite=False, timeout=None):
            Defaults to forever.
         :param bool overwrite:
             if True, then overwrites file.
+        :param bool indexed:
+            If True, saves in the :py:mod:`indexed format
+            <pylada.jobfolder.storage>`, which allows loading single folders
+            without locks. If False, saves a single pickle. If None, keeps the
+            format of the existing file, defaulting to a single pickle.
+        :param bool dedup:
+            If True, functionals and parameter values are :py:mod:`stored once
+            <pylada.jobfolder.dedup>` per distinct content in single pickles.
+            These can still be read with :py:func:`pickle.load`. Indexed files
+            always store them once.
 
         This method first acquire an exclusive lock on the file before writing
         (see :py:meth:`pylada.misc.open_exclusive`).  This way not two processes can
@@ -69,6 +80,8 @@ def save(jobfolder, path='jobfolder.dict', overwrite=False, timeout=None):
     from pickle import dump
     from ..misc import open_exclusive, RelativePath
     from .. import is_interactive
+    from .storage import FolderStore, is_indexed
+    from .dedup import dump_jobfolder
     path = RelativePath(path).path
     if exists(path) and not overwrite:
         if is_interactive:
@@ -77,13 +90,21 @@ def save(jobfolder, path='jobfolder.dict', overwrite=False, timeout=None):
         else:
             raise IOError(
                 '{0} already exists. By default, will not overwrite.'.format(path))
-    with open_exclusive(path, "wb", timeout=timeout) as file:
-        dump(jobfolder, file)
+    if indexed is None:
+        indexed = is_indexed(path)
+    if indexed:
+        FolderStore(path, timeout=timeout).dump(jobfolder)
+    else:
+        with open_exclusive(path, "wb", timeout=timeout) as file:
+            if dedup:
+                dump_jobfolder(jobfolder, file)
+            else:
+                dump(jobfolder, file)
     if is_interactive:
         print("Saved job folder to {0}.".format(path))
 
 
-def load(path='jobfolder.dict', timeout=None):
+def load(path='jobfolder.dict', timeout=None, names=None, lazy=False):
     """ Unpickles a job-folder from file. 
 
         :param str path: 
@@ -91,21 +112,35 @@ def load(path='jobfolder.dict', timeout=None):
         :param int timeout: 
            How long to wait when trying to acquire lock on file.
            Defaults to forever.
+        :param names:
+           Names of the folders of interest. If the file is in the :py:mod:`indexed
+           format <pylada.jobfolder.storage>`, only these folders, their
+           subfolders and their parents are loaded. Ignored for single pickles.
+           Defaults to loading everything.
+        :param bool lazy:
+           If True and the file is in the indexed format, returns a
+           :py:class:`~pylada.jobfolder.storage.LazyJobFolder` which reads the
+           content of each folder only when first accessed. Ignored for single
+           pickles.
         :return: Returns a JobFolder object.
 
         This method first acquire an exclusive lock on the file before reading.
         This way not two processes can read/write to this file while using this
-        function.
+        function. Indexed job-folders are read without locking.
     """
     from os.path import exists
     from pickle import load as load_pickle
     from ..misc import open_exclusive, RelativePath
     from .. import is_interactive
+    from .storage import FolderStore, is_indexed
     path = "job.dict" if path is None else RelativePath(path).path
     if not exists(path):
         raise IOError("File " + path + " does not exist.")
-    with open_exclusive(path, "rb", timeout=timeout) as file:
-        result = load_pickle(file)
+    if is_indexed(path):
+        result = FolderStore(path, timeout=timeout).load(names, lazy=lazy)
+    else:
+        with open_exclusive(path, "rb", timeout=timeout) as file:
+            result = load_pickle(file)
     if is_interactive:
         print("Loaded job list from {0}.".format(path))
     return result
@@ -0,0 +1,180 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to
+#  make it easier to submit large numbers of jobs on supercomputers. It
+#  provides a python interface to physical input, such as crystal structures,
+#  as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs.
+#  It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+#  FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+#  details.
+
+""" Content-addressed pickling of job-folder functionals and parameters.
+
+    Job-folders typically hold thousands of copies of the same functional,
+    differing only in a few parameters. Since each folder holds its own
+    (deep-)copy, a plain pickle stores every copy in full. The pickler defined
+    here instead stores functionals and non-scalar parameter values as blobs
+    keyed by the hash of their own pickle. Each distinct blob is stored once.
+
+    Objects are referenced from the main pickle by ``(kind, hash, n)``, where
+    ``n`` distinguishes different objects with identical content. Objects
+    which were shared in the original tree are thus shared again once
+    unpickled, and copies remain distinct copies.
+
+    Job-folder files written by :py:func:`dump_jobfolder` remain plain pickles,
+    which :py:func:`pickle.load` turns back into the job-folder itself.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['dumps', 'loads', 'dump_jobfolder', 'Deduplicated']
+from pickle import Pickler, Unpickler, HIGHEST_PROTOCOL
+
+FUNCTIONAL = 'functional'
+""" Kind of blob holding a functional. """
+PARAMETER = 'parameter'
+""" Kind of blob holding a parameter value. """
+
+_scalars = (int, float, complex, bool, str, bytes, type(None))
+""" Values too small to be worth deduplicating. """
+
+
+def targets(folders):
+    """ Maps id to (object, kind) of functionals and parameters in folders. """
+    result = {}
+    for folder in folders:
+        functional = folder._functional
+        if functional is not None:
+            result[id(functional)] = functional, FUNCTIONAL
+        for value in folder.params.values():
+            if not isinstance(value, _scalars):
+                result.setdefault(id(value), (value, PARAMETER))
+    return result
+
+
+class DedupPickler(Pickler):
+    """ Pickler which pulls target objects out as content-addressed blobs. """
+
+    def __init__(self, file, targets, protocol=HIGHEST_PROTOCOL):
+        Pickler.__init__(self, file, protocol)
+        self.targets = targets
+        """ Maps id to (object, kind) of objects to store as blobs. """
+        self.protocol = protocol
+        """ Pickle protocol, also used for blobs. """
+        self.blobs = {}
+        """ Maps hash to pickled object. """
+        self._pids = {}
+        self._counts = {}
+
+    def persistent_id(self, obj):
+        from pickle import dumps
+        from hashlib import sha1
+        target = self.targets.get(id(obj))
+        if target is None or target[0] is not obj:
+            return None
+        pid = self._pids.get(id(obj))
+        if pid is None:
+            data = dumps(obj, self.protocol)
+            key = sha1(data).hexdigest()
+            self.blobs.setdefault(key, data)
+            n = self._counts.get(key, 0)
+            self._counts[key] = n + 1
+            pid = self._pids[id(obj)] = target[1], key, n
+        return pid
+
+
+class DedupUnpickler(Unpickler):
+    """ Unpickler resolving content-addressed blobs. """
+
+    def __init__(self, file, blobs, interned=None):
+        """ Creates unpickler.
+
+            :param blobs:
+              Maps hash to pickled object. Can be any object with
+              ``__getitem__``.
+            :param dict interned:
+              If not None, the pickled functionals are interned in this
+              dictionary by hash, so that identical functionals are read only
+              once across calls. Each call still unpickles its own copy.
+        """
+        Unpickler.__init__(self, file)
+        self.blobs = blobs
+        self.interned = interned
+        self._objects = {}
+
+    def persistent_load(self, pid):
+        from pickle import loads
+        kind, key, n = pid
+        result = self._objects.get(pid)
+        if result is None:
+            if self.interned is not None and kind == FUNCTIONAL:
+                if key not in self.interned:
+                    self.interned[key] = self.blobs[key]
+                data = self.interned[key]
+            else:
+                data = self.blobs[key]
+            result = self._objects[pid] = loads(data)
+        return result
+
+
+def dumps(obj, targets):
+    """ Pickles obj, pulling targets out as blobs.
+
+        :returns: (pickle, blobs) with blobs mapping hash to pickled object.
+    """
+    from io import BytesIO
+    buffer = BytesIO()
+    pickler = DedupPickler(buffer, targets)
+    pickler.dump(obj)
+    return buffer.getvalue(), pickler.blobs
+
+
+def loads(data, blobs, interned=None):
+    """ Unpickles an object pickled with :py:func:`dumps`. """
+    from io import BytesIO
+    return DedupUnpickler(BytesIO(data), blobs, interned).load()
+
+
+def _restore(data, blobs):
+    """ Unpickles a tree pickled with :py:func:`dumps`.
+
+        Called when unpickling a :py:class:`Deduplicated` object.
+    """
+    return loads(data, blobs)
+
+
+class Deduplicated(object):
+    """ Deduplicated pickle of a job-folder tree.
+
+        Unpickling this object returns the job-folder tree itself.
+    """
+
+    def __init__(self, data, blobs):
+        self.data = data
+        """ Pickle of the tree, referencing the blobs. """
+        self.blobs = blobs
+        """ Maps hash to pickled object. """
+
+    def __reduce__(self):
+        return _restore, (self.data, self.blobs)
+
+
+def dump_jobfolder(jobfolder, file):
+    """ Pickles a job-folder tree to an open file, storing duplicates once.
+
+        The file holds a single :py:class:`Deduplicated` pickle. It can be
+        read with :py:func:`pickle.load`.
+    """
+    from pickle import dump
+    from .storage import walk
+    data, blobs = dumps(jobfolder, targets(u for _, u in walk(jobfolder.root)))
+    dump(Deduplicated(data, blobs), file, HIGHEST_PROTOCOL)
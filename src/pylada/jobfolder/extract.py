@@ -26,6 +26,98 @@ __all__ = ['AbstractMassExtract']
 
 import six
 from abc import ABCMeta, abstractmethod
+from weakref import WeakKeyDictionary
+from . import logger
+
+_class_attributes_cache = WeakKeyDictionary()
+""" Public attributes of each extraction class. """
+
+
+def class_attributes(cls):
+    """ Public attributes of a class, memoized per class. """
+    try:
+        return _class_attributes_cache[cls]
+    except (KeyError, TypeError):
+        pass
+    result = frozenset(u for u in dir(cls) if u[0] != '_')
+    try:
+        _class_attributes_cache[cls] = result
+    except TypeError:
+        pass
+    return result
+
+
+def job_stamp(directory, filenames=('OUTCAR',)):
+    """ Stamp of the state of a job directory.
+
+        The stamp holds the modification time and size of the given output
+        files and of the directories holding them, and whether the job is
+        running, i.e. whether the '.pylada_is_running' marker exists. It
+        changes whenever the job writes output, creates new output files, e.g.
+        for a new relaxation step, starts or stops.
+
+        :param str directory:
+            Directory of the job. If None, the stamp is None.
+        :param filenames:
+            Output files, relative to the directory or absolute.
+    """
+    from os import stat
+    from os.path import join, exists, dirname, normpath, sep
+    if directory is None:
+        return None
+    directory = normpath(directory)
+    result = [exists(join(directory, '.pylada_is_running'))]
+    paths = [normpath(join(directory, u)) for u in filenames]
+    folders = {directory}
+    for path in paths:
+        # directories down to the file, for files within the job directory.
+        path = dirname(path)
+        while path.startswith(directory + sep) and path not in folders:
+            folders.add(path)
+            path = dirname(path)
+    for path in paths + sorted(folders):
+        try:
+            info = stat(path)
+        except OSError:
+            result.append(None)
+        else:
+            result.append((info.st_mtime_ns, info.st_size))
+    return tuple(result)
+
+
+def output_files(extract):
+    """ Output files of an extraction object, as stamped by :py:func:`job_stamp`.
+
+        These are the ``output_path`` of the object, e.g. pwscf.out, if it has
+        one. Otherwise, they are the files over which it iterates by default,
+        e.g. the OUTCAR of a VASP calculation and those of its relaxation
+        steps. Defaults to the OUTCAR.
+    """
+    if extract is not None:
+        try:
+            if hasattr(extract, 'output_path'):
+                return (str(extract.output_path),)
+            if hasattr(extract, 'files'):
+                result = tuple(sorted(set(str(u) for u in extract.files())))
+                if len(result):
+                    return result
+        except Exception:
+            pass
+    return ('OUTCAR',)
+
+
+def _extract_attribute(item):
+    """ Returns (job name, success, value or exception) for one job. """
+    key, extractor, name = item
+    try:
+        return key, True, getattr(extractor, name)
+    except Exception as e:
+        return key, False, e
+
+
+def _extract_chunk(chunk):
+    """ Extracts an attribute for a list of jobs, in a worker process. """
+    return [_extract_attribute(item) for item in chunk]
 
 
 class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
@@ -47,7 +139,7 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
     """
 
     def __init__(self, path=None, view=None, excludes=None, dynamic=False, ordered=True,
-                 naked_end=None, unix_re=True):
+                 naked_end=None, unix_re=True, nworkers=None, pool=None, chunksize=None):
         """ Initializes extraction object. 
 
             :param str path:
@@ -68,8 +160,18 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
                 True if should return value rather than dict when only one item.
             :param bool unix_re: 
                 Converts regex patterns from unix-like expression.
+            :param int nworkers:
+                Number of workers collecting attributes from the extraction
+                objects. Defaults to :py:data:`pylada.mass_extract_workers`.
+            :param str pool:
+                'thread' or 'process'. Defaults to
+                :py:data:`pylada.mass_extract_pool`.
+            :param int chunksize:
+                Number of jobs sent to a process at a time. Defaults to
+                :py:data:`pylada.mass_extract_chunksize`.
         """
-        from .. import jobparams_naked_end, unix_re
+        from .. import jobparams_naked_end, unix_re, mass_extract_workers, \
+            mass_extract_pool, mass_extract_chunksize
         from ..misc import RelativePath
         from .ordered_dict import OrderedDict
 
@@ -78,7 +180,9 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
         # this fools the derived classes' __setattr__
         self.__dict__.update({'dicttype': dict, 'view': '/', 'naked_end': naked_end,
                               'unix_re': unix_re, '_excludes': excludes,
-                              '_cached_extractors': None, 'dynamic': dynamic})
+                              '_cached_extractors': None, 'dynamic': dynamic,
+                              'nworkers': nworkers, 'pool': pool, 'chunksize': chunksize,
+                              'failures': {}, '_job_stamps': {}, '_extractors_version': 0})
         self.naked_end = jobparams_naked_end if naked_end is None else naked_end
         """ If True and dict to return contains only one item, returns value itself. """
         self.unix_re = unix_re
@@ -88,9 +192,25 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
         self._cached_extractors = None
         """ List of extration objects. """
         self.dynamic = dynamic
-        """ If True chooses a slower but more dynamic caching method. """
+        """ If True chooses a slower but more dynamic caching method.
+
+            Jobs are rescanned incrementally: only those whose output changed
+            since the last scan are re-instantiated.
+        """
+        self._job_stamps = {}
+        """ Maps job names to their output files and stamp at the last scan. """
+        self._extractors_version = 0
+        """ Incremented whenever the cached extraction objects change. """
         self.dicttype = OrderedDict if ordered else dict
         """ Type of dictionary to use. """
+        self.nworkers = mass_extract_workers if nworkers is None else nworkers
+        """ Number of workers collecting attributes. Sequential if 1 or less. """
+        self.pool = mass_extract_pool if pool is None else pool
+        """ Whether attributes are collected by a 'thread' or a 'process' pool. """
+        self.chunksize = mass_extract_chunksize if chunksize is None else chunksize
+        """ Number of jobs sent to a process at a time. """
+        self.failures = {}
+        """ Maps job names to errors raised while collecting the last attribute. """
         if path is None:
             self.__dict__['_rootpath'] = None
         else:
@@ -112,6 +232,12 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
     def uncache(self):
         """ Uncache values. """
         self._cached_extractors = None
+        self._job_stamps = {}
+        self._touch_extractors()
+
+    def _touch_extractors(self):
+        """ Marks the cached extraction objects as changed. """
+        self.__dict__['_extractors_version'] = self.__dict__.get('_extractors_version', 0) + 1
 
     @property
     def excludes(self):
@@ -213,18 +339,63 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
         """
         pass
 
+    def __iter_jobdirs__(self):
+        """ Generator over the directories of all relevant jobs.
+
+            Used by dynamic rescans. By default, goes through
+            :py:meth:`__iter_alljobs__`, with the ``directory`` of each
+            extraction object, if any. Derived classes can override it so that
+            extraction objects are only created for jobs whose output changed.
+
+            :return: (name, directory, factory), where name is the name of the
+              job, directory where its output resides, or None, and factory a
+              callable without arguments returning an extraction object, or
+              None if there is none.
+        """
+        for name, extract in self.__iter_alljobs__():
+            yield name, getattr(extract, 'directory', None), lambda extract=extract: extract
+
+    def _incremental_extractors(self):
+        """ Rescans jobs, re-instantiating only those whose output changed.
+
+            Jobs which are no longer found are dropped from the cache.
+        """
+        if self._cached_extractors is None:
+            # stamps go with the cache, which copies of this object may share.
+            self._cached_extractors = self.dicttype()
+            self._job_stamps = {}
+        cache, stamps = self._cached_extractors, self._job_stamps
+        result, seen = self.dicttype(), set()
+        for name, directory, factory in self.__iter_jobdirs__():
+            seen.add(name)
+            previous = stamps.get(name, None)
+            files = output_files(None) if previous is None else previous[0]
+            stamp = job_stamp(directory, files)
+            if previous is not None and previous[1] == stamp:
+                if name in cache:
+                    result[name] = cache[name]
+                continue
+            extract = factory()
+            self._touch_extractors()
+            if extract is None:
+                cache.pop(name, None)
+            else:
+                cache[name] = result[name] = extract
+                if directory is not None and output_files(extract) != files:
+                    files = output_files(extract)
+                    stamp = job_stamp(directory, files)
+            stamps[name] = files, stamp
+        for name in [u for u in stamps if u not in seen]:
+            del stamps[name]
+            if cache.pop(name, None) is not None:
+                self._touch_extractors()
+        return result
+
     @property
     def _extractors(self):
         """ Goes through all jobs and collects Extract if available. """
         if self.dynamic:
-            if self._cached_extractors is None:
-                self._cached_extractors = self.dicttype()
-            result = self.dicttype()
-            for name, extract in self.__iter_alljobs__():
-                if name not in self._cached_extractors:
-                    self._cached_extractors[name] = extract
-                result[name] = self._cached_extractors[name]
-            return result
+            return self._incremental_extractors()
         else:
             if self._cached_extractors is not None:
                 return self._cached_extractors
@@ -258,11 +429,50 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
     @property
     def _attributes(self):
         """ Returns __dir__ special to the extraction itself. """
-        results = set([])
-        for key, value in self.items():
-            results |= {u for u in dir(value) if u[0] != '_'}
+        return self._view_attributes()
+
+    def _view_attributes(self, items=None):
+        """ Public attributes of the extraction objects in the view.
+
+            Attributes of the classes of the extraction objects are computed
+            once per class. Those set on the objects themselves are added from
+            their ``__dict__``. Both are memoized until the cached extraction
+            objects, the view or the exclusions change.
+
+            :param items:
+                List of (name, extraction object) in the view, if already at
+                hand. Otherwise, the jobs are only iterated over when the
+                memoized value is out of date.
+        """
+        if items is None and self.dynamic:
+            items = list(self.items())
+        elif items is None:
+            # makes sure the cache is built before checking against it.
+            AbstractMassExtract._extractors.__get__(self)
+        excludes = None if self.excludes is None else tuple(self.excludes)
+        key = self.__dict__.get('_extractors_version', 0), self.view, excludes
+        cached = self.__dict__.get('_attribute_cache', None)
+        if cached is not None and cached[0] is self._cached_extractors and cached[1] == key:
+            return cached[2]
+        if items is None:
+            items = self.items()
+        types, instances = set(), set()
+        for name, value in items:
+            types.add(type(value))
+            instances.update(u for u in getattr(value, '__dict__', ()) if u[0] != '_')
+        results = frozenset(instances).union(*[class_attributes(u) for u in types])
+        self.__dict__['_attribute_cache'] = self._cached_extractors, key, results
         return results
 
+    def _has_attribute(self, name, items=None):
+        """ True if any extraction object in the view has this attribute.
+
+            :param items:
+                List of (name, extraction object) in the view, if already at
+                hand.
+        """
+        return name in self._view_attributes(items)
+
     def __dir__(self):
         from itertools import chain
         results = chain([u for u in self.__dict__ if u[0] != '_'],
@@ -270,22 +480,104 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
                         self._attributes)
         return list(set(results))
 
+    def _collect(self, name, items=None):
+        """ Yields (job name, success, value or exception) for all jobs in the view.
+
+            Attributes are extracted sequentially, or over a thread or process
+            pool, depending on :py:attr:`nworkers` and :py:attr:`pool`. Results
+            are yielded in the order of the jobs.
+
+            :param items:
+                List of (name, extraction object) in the view, if already at
+                hand.
+        """
+        from ..error import ValueError
+        if items is None:
+            items = self.items()
+        items = [(key, value, name) for key, value in items]
+        if self.nworkers is None or self.nworkers <= 1 or len(items) <= 1:
+            for item in items:
+                yield _extract_attribute(item)
+            return
+        if self.pool == 'thread':
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=min(self.nworkers, len(items))) as executor:
+                for result in executor.map(_extract_attribute, items):
+                    yield result
+        elif self.pool == 'process':
+            for result in self._collect_processes(items):
+                yield result
+        else:
+            raise ValueError("Unknown pool {0!r}: expected 'thread' or 'process'."
+                             .format(self.pool))
+
+    def _collect_processes(self, items):
+        """ Extracts attributes over a process pool, in chunks of jobs.
+
+            Chunks which cannot be pickled, e.g. because the extraction objects
+            are defined locally, are extracted in this process instead.
+        """
+        from pickle import dumps
+        from concurrent.futures import ProcessPoolExecutor
+        chunksize = max(1, self.chunksize or len(items) // (4 * self.nworkers))
+        chunks = [items[i:i + chunksize] for i in range(0, len(items), chunksize)]
+        with ProcessPoolExecutor(max_workers=min(self.nworkers, len(chunks))) as executor:
+            futures = []
+            for chunk in chunks:
+                try:
+                    dumps(chunk)
+                except Exception:
+                    futures.append(chunk)
+                else:
+                    futures.append(executor.submit(_extract_chunk, chunk))
+            for future in futures:
+                if isinstance(future, list):
+                    results = _extract_chunk(future)
+                else:
+                    results = future.result()
+                for result in results:
+                    yield result
+
     def __getattr__(self, name):
-        """ Returns extracted values. """
+        """ Returns extracted values.
+
+            Jobs for which the attribute cannot be extracted are left out of the
+            result, and the errors are stored in :py:attr:`failures`.
+        """
         from .forwarding_dict import ForwardingDict
-        if name not in AbstractMassExtract._attributes.__get__(self):
+        # dynamic views rescan the jobs on each iteration: only do it once.
+        items = list(self.items()) if self.dynamic else None
+        if not self._has_attribute(name, items):
             raise AttributeError("Unknown attribute {0}.".format(name))
 
-        result = self.dicttype()
-        for key, value in self.items():
-            try:
-                result[key] = getattr(value, name)
-            except:
-                result.pop(key, None)
+        result, failures = self.dicttype(), {}
+        for key, success, value in self._collect(name, items):
+            if success:
+                result[key] = value
+            else:
+                failures[key] = value
+        self.__dict__['failures'] = failures
+        if len(failures):
+            logger.debug("Could not extract {0} from {1} job(s): {2}"
+                         .format(name, len(failures), ', '.join(failures)))
         if self.naked_end and len(result) == 1:
             return result[next(iter(result))]
         return ForwardingDict(dictionary=result, naked_end=self.naked_end)
 
+    def to_table(self, props):
+        """ Collects properties of all jobs in the view into a columnar table.
+
+            Values with the same shape in all jobs go to a numpy record array,
+            ragged values to offset-encoded columns. Units are kept as column
+            metadata. The table can be exported to Arrow, Parquet or HDF5.
+
+            :param props:
+                Name or list of names of the properties to extract.
+            :returns: A :py:class:`~pylada.jobfolder.table.Table`.
+        """
+        from .table import make_table
+        return make_table(self, props)
+
     def __getitem__(self, name):
         """ Returns a view of the current job-dictionary.
 
@@ -314,6 +606,7 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
 
     def __getstate__(self):
         d = self.__dict__.copy()
+        d.pop('_attribute_cache', None)
         return d
 
     def __setstate__(self, arg):
@@ -343,6 +636,7 @@ class AbstractMassExtract(six.with_metaclass(ABCMeta, object)):
 
     def __getstate__(self):
         d = self.__dict__.copy()
+        d.pop('_attribute_cache', None)
         if d["_rootpath"] is not None:
             d["_rootpath"].hook = None
         return d
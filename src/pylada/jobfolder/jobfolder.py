@@ -432,7 +432,7 @@ class JobFolder(object):
             yield prefix, self
         # Walk throught children folderdict.
         for name in self.subfolders():
-            for u in self[name].items(join(prefix, name)):
+            for u in self.children[name].items(join(prefix, name)):
                 yield u
 
     def iterleaves(self):
@@ -442,7 +442,7 @@ class JobFolder(object):
             yield self.name
         # Walk throught children folderdict.
         for name in self.children:
-            for u in self[name].iterleaves():
+            for u in self.children[name].iterleaves():
                 yield u
 
     def values(self):
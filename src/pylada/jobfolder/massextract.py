@@ -85,20 +85,38 @@ class MassExtract(AbstractMassExtract):
             return interactive.jobfolder_path
         return super(MassExtract, self).rootpath
 
-    def __iter_alljobs__(self):
-        """ Generator to go through all relevant jobs.  
+    def __iter_jobdirs__(self):
+        """ Generator to go through the directories of all relevant jobs.
 
-            :return: (name, extractor), where name is the name of the job, and
-              extractor an extraction object.
+            :return: (name, directory, factory), where name is the name of the
+              job, directory its output directory, and factory creates the
+              extraction object, or returns None if it cannot.
         """
         from os.path import join, dirname
 
         for name, job in MassExtract.jobfolder.__get__(self).items():
             if job.is_tagged:
                 continue
+            directory = join(dirname(self.rootpath), name)
+            yield job.name, directory, self._extract_factory(job.functional, directory)
+
+    @staticmethod
+    def _extract_factory(functional, directory):
+        """ Callable creating the extraction object of a job, or None. """
+        def factory():
             try:
-                extract = job.functional.Extract(join(dirname(self.rootpath), name))
+                return functional.Extract(directory)
             except:
-                pass
-            else:
-                yield job.name, extract
+                return None
+        return factory
+
+    def __iter_alljobs__(self):
+        """ Generator to go through all relevant jobs.  
+
+            :return: (name, extractor), where name is the name of the job, and
+              extractor an extraction object.
+        """
+        for name, directory, factory in self.__iter_jobdirs__():
+            extract = factory()
+            if extract is not None:
+                yield name, extract
@@ -0,0 +1,595 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to
+#  make it easier to submit large numbers of jobs on supercomputers. It
+#  provides a python interface to physical input, such as crystal structures,
+#  as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs.
+#  It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+#  FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+#  details.
+
+""" Indexed storage for job-folders.
+
+    By default, :py:func:`~pylada.jobfolder.save` pickles a whole job-folder
+    tree into a single file, which must then be unpickled in its entirety,
+    under an exclusive lock, to access any one folder. The indexed format
+    instead stores one pickled record per folder in an append-only data file,
+    and a small index mapping each folder name to the offset and size of its
+    latest record, and to whether it is executable and tagged. Functionals and
+    parameter values are stored :py:mod:`once per distinct content
+    <pylada.jobfolder.dedup>`, in the same data file:
+
+      - readers never take a lock, so that many jobs can load their folder
+        concurrently,
+      - single folders, or any subset of the tree, can be loaded without
+        unpickling the rest,
+      - a folder can be updated by appending a new record and atomically
+        replacing the index,
+      - a job-folder can be opened :py:class:`lazily <LazyJobFolder>`, reading
+        the content of each folder only when it is first needed.
+
+    The index sits at the path given by the user, so that it can be passed
+    around exactly like a pickled job-folder. The records sit in a sibling
+    file with the extension ``.data``. Both carry the same random token, which
+    lets readers detect that they caught the files in the middle of a rewrite.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['FolderStore', 'LazyJobFolder', 'is_indexed']
+from .jobfolder import JobFolder
+
+MAGIC = b'PYLADA INDEXED JOBFOLDER\n'
+""" First bytes of an index file. """
+DATA_MAGIC = b'PYLADA JOBFOLDER RECORDS\n'
+""" First bytes of a data file. """
+
+
+def is_indexed(path):
+    """ True if path is the index of an indexed job-folder. """
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(MAGIC)) == MAGIC
+    except (IOError, OSError):
+        return False
+
+
+def normname(name):
+    """ Normalizes folder names to the form returned by JobFolder.name. """
+    from os.path import normpath
+    name = normpath('/' + str(name)).strip('/')
+    return '/' if len(name) == 0 else '/' + name + '/'
+
+
+def parentname(name):
+    """ Name of the parent folder. """
+    return normname(name.rstrip('/').rpartition('/')[0])
+
+
+def _node_record(folder):
+    """ Pickled state of a single folder, excluding subfolders.
+
+        :returns: (record, blobs), where the functional and parameter values
+          are pulled out of the record into content-addressed blobs.
+    """
+    from . import dedup
+    functional = folder._functional
+    attrs = {key: value for key, value in folder.__dict__.items()
+             if key not in ('children', 'parent', 'params', '_path', '_flatindex')}
+    attrs['_functional'] = functional
+    return dedup.dumps((attrs, folder.params), dedup.targets([folder]))
+
+
+class _BlobReader(object):
+    """ Reads blobs from an open data file on demand. """
+
+    def __init__(self, file, blobs):
+        self.file = file
+        self.blobs = blobs
+
+    def __getitem__(self, key):
+        offset, size = self.blobs[key]
+        self.file.seek(offset)
+        return self.file.read(size)
+
+
+def _node_state(file, record, blobs, functionals=None):
+    """ Unpickles (attrs, params) of a folder from its record.
+
+        If ``functionals`` is a dictionary, it is used to intern pickled
+        functionals: identical functionals are then read from the file only
+        once, although each folder unpickles its own copy.
+    """
+    from . import dedup
+    return dedup.loads(record, _BlobReader(file, blobs), functionals)
+
+
+def _node_from_state(state):
+    """ Single folder without subfolders from its unpickled state. """
+    result = JobFolder()
+    result.__dict__.update(state[0])
+    result.__dict__['params'] = state[1]
+    return result
+
+
+def walk(folder, name='/'):
+    """ Yields (name, folder) for folder and every subfolder. """
+    yield name, folder
+    for key in folder.subfolders():
+        for u in walk(folder.children[key], name + key + '/'):
+            yield u
+
+
+def _replace(path, writer):
+    """ Atomically replaces path with the output of writer(file). """
+    from os import fsync, rename, remove
+    from os.path import dirname, basename, exists
+    from tempfile import NamedTemporaryFile
+    with NamedTemporaryFile(dir=dirname(path), prefix='.' + basename(path),
+                            delete=False) as file:
+        try:
+            writer(file)
+            file.flush()
+            fsync(file.fileno())
+        except:
+            file.close()
+            if exists(file.name):
+                remove(file.name)
+            raise
+    rename(file.name, path)
+
+
+class FolderStore(object):
+    """ Indexed job-folder on disk. 
+
+        .. code-block:: python
+
+          store = FolderStore('jobfolder.dict')
+          store.dump(jobfolder)
+          # loads a single folder, without its subfolders
+          folder = store.folder('/some/job/')
+          # loads part of the tree, from the root down to the given folders
+          root = store.load(names=['/some/job/'])
+          # replaces one folder (and its subfolders) on disk
+          store.update(folder, '/some/job/')
+    """
+
+    def __init__(self, path, timeout=None):
+        """ Creates handle to an indexed job-folder.
+
+            :param str path:
+              Path to the index. The data file is ``path + '.data'``.
+            :param int timeout:
+              How long to wait when acquiring the lock needed to write to the
+              store. Readers never lock.
+        """
+        from ..misc import RelativePath
+        super(FolderStore, self).__init__()
+        self.path = RelativePath(path).path
+        """ Path to the index file. """
+        self.timeout = timeout
+        """ How long to wait when acquiring the writer lock. """
+        self._index = None
+        """ Cached index, along with the stat of the file it was read from. """
+
+    @property
+    def datapath(self):
+        """ Path to the file holding the folder records. """
+        return self.path + '.data'
+
+    @property
+    def exists(self):
+        """ True if the store exists on disk. """
+        from os.path import exists
+        return is_indexed(self.path) and exists(self.datapath)
+
+    def _read_index(self, retries=100):
+        """ Reads index, making sure it matches the data file.
+
+            :returns: (token, folders, blobs)
+        """
+        from pickle import load
+        from time import sleep
+        from ..error import IOError
+        for i in range(retries):
+            with open(self.path, 'rb') as file:
+                if file.read(len(MAGIC)) != MAGIC:
+                    raise IOError("{0} is not an indexed job-folder.".format(self.path))
+                token, folders, blobs = load(file)
+            with open(self.datapath, 'rb') as file:
+                file.readline()
+                if file.readline().rstrip() == token:
+                    return token, folders, blobs
+            # caught in the middle of a rewrite. Try again.
+            sleep(0.05)
+        raise IOError("Index {0} does not match its data file.".format(self.path))
+
+    def _open_data(self, retries=100):
+        """ Opens the data file, along with a matching index.
+
+            The token of the open data file is checked against that of the
+            index. If the data file was rewritten since the index was read,
+            the index is read again. Records are then read from the open file,
+            which a later rewrite does not affect.
+
+            :returns: (file, (token, folders, blobs))
+        """
+        from time import sleep
+        from ..error import IOError
+        for i in range(retries):
+            state = self._index_state()
+            file = open(self.datapath, 'rb')
+            file.readline()
+            if file.readline().rstrip() == state[0]:
+                return file, state
+            file.close()
+            self._index = None
+            sleep(0.05)
+        raise IOError("Index {0} does not match its data file.".format(self.path))
+
+    def _write_index(self, token, folders, blobs):
+        """ Atomically replaces the index. """
+        from pickle import dump
+
+        def writer(file):
+            file.write(MAGIC)
+            dump((token, folders, blobs), file)
+
+        _replace(self.path, writer)
+        self._index = None
+
+    def _index_state(self):
+        """ Returns cached (token, folders, blobs), re-reading it if needed. """
+        from os import stat
+        st = stat(self.path)
+        key = st.st_ino, st.st_size, st.st_mtime
+        if self._index is None or self._index[0] != key:
+            self._index = key, self._read_index()
+        return self._index[1]
+
+    @property
+    def index(self):
+        """ Maps folder names to the offset and size of their record.
+
+            Values are (offset, size, is_executable, is_tagged) tuples.
+        """
+        return self._index_state()[1]
+
+    @property
+    def blobs(self):
+        """ Maps the hash of functionals and parameters to their offset and size. """
+        return self._index_state()[2]
+
+    def keys(self):
+        """ Sorted names of all folders in the store. """
+        return sorted(self.index.keys())
+
+    def __contains__(self, name):
+        return normname(name) in self.index
+
+    def __len__(self):
+        return len(self.index)
+
+    @staticmethod
+    def _records(file, index, blobs, names):
+        """ Yields (name, folder) from an open data file, in order of appearance. """
+        for name in names:
+            if name not in index:
+                raise KeyError("folder {0} does not exist.".format(name))
+        records = sorted((index[name][:2], name) for name in names)
+        for (offset, size), name in records:
+            file.seek(offset)
+            record = file.read(size)
+            yield name, _node_from_state(_node_state(file, record, blobs))
+
+    def _read_records(self, names=None):
+        """ Yields (name, folder) from disk, in order of appearance in the data.
+
+            If ``names`` is None, yields all folders.
+        """
+        file, (_, index, blobs) = self._open_data()
+        with file:
+            for result in self._records(file, index, blobs, index if names is None else names):
+                yield result
+
+    def _read_state(self, name, functionals=None):
+        """ Reads (attrs, params) of a single folder. """
+        file, (_, index, blobs) = self._open_data()
+        with file:
+            offset, size = index[name][:2]
+            file.seek(offset)
+            record = file.read(size)
+            return _node_state(file, record, blobs, functionals)
+
+    def folder(self, name):
+        """ Loads a single folder, without its parent or subfolders. """
+        return next(self._read_records([normname(name)]))[1]
+
+    def load(self, names=None, lazy=False):
+        """ Loads job-folder tree.
+
+            :param names:
+              If None, loads the whole tree. Otherwise, a list of folder names.
+              Only those folders, their subfolders, and the folders leading
+              to them from the root are loaded.
+            :param bool lazy:
+              If True, returns a tree of :py:class:`LazyJobFolder`, where the
+              content of each folder is only read on first access.
+            :returns: The root of the (possibly partial) tree.
+        """
+        file, (_, index, blobs) = self._open_data()
+        with file:
+            if names is None:
+                wanted = set(index.keys())
+            else:
+                prefixes = [normname(u) for u in names]
+                for name in prefixes:
+                    if name not in index:
+                        raise KeyError("folder {0} does not exist.".format(name))
+                wanted = {u for u in index
+                          if any(u.startswith(p) or p.startswith(u) for p in prefixes)}
+            wanted.add('/')
+            if lazy:
+                functionals = {}
+                nodes = {name: LazyJobFolder(self, name, index[name][2], index[name][3],
+                                             functionals)
+                         for name in wanted}
+                nodes['/'].__dict__['_flatindex'] = FlatIndex(nodes)
+            else:
+                nodes = dict(self._records(file, index, blobs, wanted))
+        for name in sorted(nodes, key=lambda u: u.count('/')):
+            if name == '/':
+                continue
+            parent = nodes[parentname(name)]
+            key = name.rstrip('/').rpartition('/')[2]
+            parent.children[key] = nodes[name]
+            nodes[name].__dict__['parent'] = parent
+        return nodes['/']
+
+    def dump(self, jobfolder):
+        """ Writes a whole job-folder tree, replacing any existing store. """
+        from ..misc import LockFile
+        with LockFile(self.path, timeout=self.timeout):
+            self._rewrite(walk(jobfolder.root))
+
+    @staticmethod
+    def _write_nodes(file, nodes, folders, blobs):
+        """ Appends folder records to file, and blobs not yet in the store. """
+        for name, folder in nodes:
+            record, newblobs = _node_record(folder)
+            for key, data in newblobs.items():
+                if key not in blobs:
+                    blobs[key] = file.tell(), len(data)
+                    file.write(data)
+            folders[name] = (file.tell(), len(record),
+                             folder.is_executable, folder.is_tagged)
+            file.write(record)
+
+    def _rewrite(self, nodes):
+        """ Writes folders to a fresh data file, followed by its index. """
+        from uuid import uuid4
+        token = uuid4().hex.encode('ascii')
+        folders, blobs = {}, {}
+
+        def write_data(file):
+            file.write(DATA_MAGIC + token + b'\n')
+            self._write_nodes(file, nodes, folders, blobs)
+
+        _replace(self.datapath, write_data)
+        self._write_index(token, folders, blobs)
+
+    def update(self, folder, name=None):
+        """ Replaces a folder and its subfolders on disk.
+
+            New records are appended to the data file, and the index is
+            atomically replaced. Readers holding the old index can still read
+            the old records. Functionals and parameters already in the store
+            are not written again.
+
+            :param folder:
+              :py:class:`~pylada.jobfolder.jobfolder.JobFolder` to store.
+            :param str name:
+              Name of the folder in the store. Defaults to ``folder.name``.
+              Missing parents are created as empty folders.
+        """
+        from os import fsync
+        from ..misc import LockFile
+        name = normname(folder.name if name is None else name)
+        with LockFile(self.path, timeout=self.timeout):
+            token, folders, blobs = self._read_index()
+            folders = {key: value for key, value in folders.items()
+                       if not key.startswith(name)}
+            nodes = list(walk(folder, name))
+            parent = name
+            while parent != '/':
+                parent = parentname(parent)
+                if parent in folders:
+                    break
+                nodes.append((parent, JobFolder()))
+            with open(self.datapath, 'ab') as file:
+                self._write_nodes(file, nodes, folders, blobs)
+                file.flush()
+                fsync(file.fileno())
+            self._write_index(token, folders, blobs)
+
+    def remove(self, name):
+        """ Removes a folder and its subfolders from the index. """
+        from ..misc import LockFile
+        name = normname(name)
+        if name == '/':
+            raise KeyError("Will not remove root folder.")
+        with LockFile(self.path, timeout=self.timeout):
+            token, folders, blobs = self._read_index()
+            if name not in folders:
+                raise KeyError("folder {0} does not exist.".format(name))
+            folders = {key: value for key, value in folders.items()
+                       if not key.startswith(name)}
+            self._write_index(token, folders, blobs)
+
+    def compact(self):
+        """ Rewrites the data file without superseded records and blobs. """
+        from ..misc import LockFile
+        with LockFile(self.path, timeout=self.timeout):
+            self._index = None
+            nodes = list(self._read_records())
+            self._rewrite(sorted(nodes, key=lambda u: u[0]))
+
+    def __repr__(self):
+        return "{0.__class__.__name__}({0.path!r})".format(self)
+
+
+def _attached(node, path):
+    """ Top of the tree if node is attached at path, None otherwise. """
+    if path != '/':
+        for key in reversed(path.strip('/').split('/')):
+            parent = node.parent
+            if parent is None or parent.children.get(key) is not node:
+                return None
+            node = parent
+    return node if node.parent is None else None
+
+
+class FlatIndex(dict):
+    """ Maps absolute folder names to the nodes of a lazy tree.
+
+        Entries are only hints: they are checked against the actual tree before
+        use, so that the tree can be modified freely. The index is not carried
+        over when the tree is pickled or copied.
+    """
+
+    def __reduce__(self):
+        return FlatIndex, ()
+
+
+class LazyJobFolder(JobFolder):
+    """ Job-folder whose content is read from a :py:class:`FolderStore` on demand.
+
+        The tree structure, and whether each folder is executable or tagged,
+        comes from the index of the store. The parameters and functional of a
+        folder are only unpickled when first accessed. Identical pickled
+        functionals are read from the store only once per tree, but each folder
+        still gets its own copy, as with any other job-folder.
+
+        The root also keeps a flat map from absolute names to folders, so that
+        :py:meth:`__getitem__`, :py:meth:`__contains__` and :py:attr:`name` need
+        not walk the tree.
+
+        Lazy job-folders are obtained *via* :py:func:`pylada.jobfolder.load` with
+        ``lazy=True``, or :py:meth:`FolderStore.load`.
+    """
+
+    def __init__(self, store=None, path='/', executable=False, tagged=False,
+                 functionals=None):
+        super(LazyJobFolder, self).__init__()
+        self.__dict__['_path'] = path
+        if store is None:
+            return
+        del self.__dict__['params']
+        del self.__dict__['_functional']
+        self.__dict__['_lazy'] = store, executable, functionals
+        if tagged:
+            self.__dict__['_tagged'] = True
+
+    @property
+    def is_materialized(self):
+        """ True if the content of this folder has been read. """
+        return '_lazy' not in self.__dict__
+
+    def _materialize(self):
+        """ Reads the content of this folder from the store. """
+        lazy = self.__dict__.pop('_lazy', None)
+        if lazy is None:
+            return
+        store, executable, functionals = lazy
+        try:
+            attrs, params = store._read_state(self._path, functionals)
+        except:
+            self.__dict__['_lazy'] = lazy
+            raise
+        for key, value in attrs.items():
+            self.__dict__.setdefault(key, value)
+        self.__dict__['params'] = params
+
+    def __getattr__(self, name):
+        if '_lazy' in self.__dict__:
+            self._materialize()
+            return getattr(self, name)
+        return super(LazyJobFolder, self).__getattr__(name)
+
+    @property
+    def is_executable(self):
+        """ True if functional is not None. """
+        lazy = self.__dict__.get('_lazy')
+        if lazy is not None:
+            return lazy[1]
+        return super(LazyJobFolder, self).is_executable
+
+    @property
+    def is_tagged(self):
+        """ True if current folder is tagged. """
+        if '_lazy' in self.__dict__:
+            return '_tagged' in self.__dict__
+        return super(LazyJobFolder, self).is_tagged
+
+    @property
+    def name(self):
+        """ Returns the name of this dictionary as an absolute path. """
+        path = self.__dict__.get('_path')
+        if path is not None and _attached(self, path) is not None:
+            return path
+        return super(LazyJobFolder, self).name
+
+    def _lookup(self, index):
+        """ Folder at index from the flat index of the root, or None. """
+        from os.path import normpath, join
+        index = normpath(str(index))
+        if '..' in index.split('/'):
+            return None
+        root = self.root
+        flat = root.__dict__.get('_flatindex')
+        if not flat:
+            return None
+        path = normname(index if index[0] == '/' else join(self.name, index))
+        result = flat.get(path)
+        if result is None or _attached(result, path) is not root:
+            return None
+        return result
+
+    def __getitem__(self, index):
+        result = self._lookup(index)
+        if result is not None:
+            return result
+        return super(LazyJobFolder, self).__getitem__(index)
+
+    def __contains__(self, index):
+        if self._lookup(index) is not None:
+            return True
+        return super(LazyJobFolder, self).__contains__(index)
+
+    def untag(self):
+        """ Untags this folder. """
+        self._materialize()
+        super(LazyJobFolder, self).untag()
+
+    def __delattr__(self, name):
+        self._materialize()
+        return super(LazyJobFolder, self).__delattr__(name)
+
+    def __getstate__(self):
+        self._materialize()
+        return super(LazyJobFolder, self).__getstate__()
+
+    def __copy__(self):
+        result = super(LazyJobFolder, self).__copy__()
+        result.__dict__.pop('_flatindex', None)
+        result.__dict__.pop('_path', None)
+        return result
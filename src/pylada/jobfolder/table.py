@@ -0,0 +1,291 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Columnar tables of mass-extracted properties.
+
+    :py:func:`make_table` collects properties from all jobs of a
+    :py:class:`~pylada.jobfolder.extract.AbstractMassExtract` into a
+    :py:class:`Table`. Values which have the same shape in every job are
+    stored in a numpy record array, one row per job. Values with different
+    shapes, such as eigenvalues, are stored offset-encoded: a flat array of
+    values, concatenated along their first axis, and an array of offsets
+    into it. Units are stripped from the values and kept as column metadata.
+
+    Tables can be exported to Arrow, Parquet and HDF5, provided pyarrow or
+    h5py are installed.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['Table', 'make_table']
+
+
+def _strip_units(value, units=None):
+    """ Returns magnitude and units of a value.
+
+        Quantities are rescaled to the given units, if any.
+    """
+    from numpy import asarray
+    if not hasattr(value, 'rescale'):
+        return asarray(value), units
+    if units is None:
+        units = str(value.dimensionality)
+    elif str(value.dimensionality) != units:
+        value = value.rescale(units)
+    return asarray(value.magnitude), units
+
+
+def _column(values):
+    """ Converts the values of one property into a column.
+
+        :returns: A tuple (kind, data, units). If the shapes of all values are
+          the same, kind is 'fixed' and data a single array with one row per
+          value. Otherwise, kind is 'ragged' and data a tuple (values,
+          offsets).  Missing values, i.e. None, are zeroed in fixed columns
+          and empty in ragged columns.
+    """
+    from numpy import zeros, result_type, concatenate, cumsum
+
+    units, arrays = None, []
+    for value in values:
+        if value is None:
+            arrays.append(None)
+            continue
+        value, units = _strip_units(value, units)
+        arrays.append(value)
+    present = [u for u in arrays if u is not None]
+    if len(present) == 0:
+        return 'fixed', zeros(len(arrays)), units
+    dtype = result_type(*present)
+
+    shapes = set(u.shape for u in present)
+    if len(shapes) == 1:
+        shape = shapes.pop()
+        data = zeros((len(arrays),) + shape, dtype=dtype)
+        for i, value in enumerate(arrays):
+            if value is not None:
+                data[i] = value
+        return 'fixed', data, units
+
+    # values are concatenated along their first axis when possible.
+    if any(u.ndim == 0 for u in present) or len(set(u.shape[1:] for u in present)) != 1:
+        arrays = [None if u is None else u.ravel() for u in arrays]
+        present = [u for u in arrays if u is not None]
+    trailing = present[0].shape[1:]
+    sizes = [0 if u is None else len(u) for u in arrays]
+    offsets = zeros(len(arrays) + 1, dtype='int64')
+    offsets[1:] = cumsum(sizes)
+    data = concatenate([u.astype(dtype) for u in present]) if len(present) \
+        else zeros((0,) + trailing, dtype=dtype)
+    return 'ragged', (data, offsets), units
+
+
+class Table(object):
+    """ Properties of a set of jobs, stored column-wise.
+
+        Fixed-shape properties are fields of :py:attr:`records`, alongside
+        the 'job' field holding the name of each job. Ragged properties are
+        stored in :py:attr:`ragged` as (values, offsets) tuples, where the
+        values of the i-th job are ``values[offsets[i]:offsets[i+1]]``.
+    """
+
+    def __init__(self, records, ragged=None, units=None, missing=None, failures=None):
+        super(Table, self).__init__()
+        self.records = records
+        """ Record array with one row per job. """
+        self.ragged = {} if ragged is None else ragged
+        """ Offset-encoded ragged columns. """
+        self.units = {} if units is None else units
+        """ Units of each column with units. """
+        self.missing = {} if missing is None else missing
+        """ Boolean masks of the jobs for which a property is missing. """
+        self.failures = {} if failures is None else failures
+        """ Errors raised while extracting each property, indexed by job. """
+
+    @property
+    def columns(self):
+        """ Names of the property columns. """
+        return [u for u in self.records.dtype.names if u != 'job'] + list(self.ragged)
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, name):
+        """ Column of values.
+
+            Returns a numpy array for fixed columns, and a list of arrays,
+            one per job, for ragged columns.
+        """
+        from ..error import KeyError
+        if name in self.ragged:
+            values, offsets = self.ragged[name]
+            return [values[offsets[i]:offsets[i + 1]] for i in range(len(offsets) - 1)]
+        if name in self.records.dtype.names:
+            return self.records[name]
+        raise KeyError("Unknown column {0}.".format(name))
+
+    def to_arrow(self):
+        """ Converts to a pyarrow table.
+
+            Multi-dimensional values become (nested) fixed-size lists, ragged
+            columns become lists. Units are stored in the metadata of each
+            field.
+        """
+        import pyarrow
+        arrays, fields = [], []
+        for name in self.records.dtype.names:
+            data = self.records[name]
+            mask = self.missing.get(name, None)
+            if data.ndim == 1:
+                array = pyarrow.array(data, mask=mask)
+            else:
+                array = _arrow_nested(pyarrow, data)
+            arrays.append(array)
+            fields.append(self._arrow_field(pyarrow, name, array.type))
+        for name, (values, offsets) in self.ragged.items():
+            array = pyarrow.ListArray.from_arrays(pyarrow.array(offsets.astype('int32')),
+                                                  _arrow_nested(pyarrow, values))
+            arrays.append(array)
+            fields.append(self._arrow_field(pyarrow, name, array.type))
+        return pyarrow.Table.from_arrays(arrays, schema=pyarrow.schema(fields))
+
+    def _arrow_field(self, pyarrow, name, type):
+        """ Arrow field, with units as metadata. """
+        units = self.units.get(name, None)
+        metadata = None if units is None else {'units': units}
+        return pyarrow.field(name, type, metadata=metadata)
+
+    def to_parquet(self, path, **kwargs):
+        """ Writes the table to a parquet file.
+
+            Keyword arguments are passed on to :py:func:`pyarrow.parquet.write_table`.
+        """
+        from pyarrow.parquet import write_table
+        from ..misc import RelativePath
+        write_table(self.to_arrow(), RelativePath(path).path, **kwargs)
+
+    def to_hdf5(self, path, group='/'):
+        """ Writes the table to an HDF5 file.
+
+            Each fixed column is a dataset of the given group. Each ragged
+            column is a group with 'values' and 'offsets' datasets. Units and
+            masks of missing jobs are stored as attributes.
+        """
+        from h5py import File
+        from ..misc import RelativePath
+        with File(RelativePath(path).path, 'a') as file:
+            root = file.require_group(group)
+            for name in self.records.dtype.names:
+                dataset = root.create_dataset(name, data=_hdf5_data(self.records[name]))
+                self._hdf5_attrs(dataset, name)
+            for name, (values, offsets) in self.ragged.items():
+                column = root.create_group(name)
+                column.create_dataset('values', data=_hdf5_data(values))
+                column.create_dataset('offsets', data=offsets)
+                self._hdf5_attrs(column, name)
+
+    def _hdf5_attrs(self, node, name):
+        """ Stores units and missing jobs as HDF5 attributes. """
+        if name in self.units:
+            node.attrs['units'] = self.units[name]
+        if name in self.missing:
+            node.attrs['missing'] = self.missing[name]
+
+    def __repr__(self):
+        return "<{0}: {1} jobs, columns {2}>".format(
+            self.__class__.__name__, len(self), ', '.join(self.columns))
+
+
+def _arrow_nested(pyarrow, data):
+    """ Arrow array of the rows of a numpy array, with nested fixed-size lists. """
+    if data.ndim == 1:
+        return pyarrow.array(data)
+    array = pyarrow.array(data.reshape(-1))
+    for size in data.shape[:0:-1]:
+        array = pyarrow.FixedSizeListArray.from_arrays(array, size)
+    return array
+
+
+def _hdf5_data(data):
+    """ HDF5 cannot store numpy unicode strings: encodes them as utf-8 bytes. """
+    from numpy import char
+    return char.encode(data, 'utf-8') if data.dtype.kind == 'U' else data
+
+
+def make_table(massextract, props):
+    """ Collects properties from all jobs into a :py:class:`Table`.
+
+        Properties are extracted one at a time, using the worker pool of the
+        mass-extraction object. Jobs for which a property cannot be extracted,
+        or is None, are flagged in :py:attr:`Table.missing`. Errors are kept
+        in :py:attr:`Table.failures`, indexed by property and then by job.
+
+        :param massextract:
+            A :py:class:`~pylada.jobfolder.extract.AbstractMassExtract` instance.
+        :param props:
+            Names of the properties to extract.
+        :returns: A :py:class:`Table`.
+    """
+    from numpy import dtype as np_dtype, zeros, array, recarray
+    from ..error import AttributeError, ValueError
+
+    if isinstance(props, str):
+        props = [props]
+    items = list(massextract.items())
+    for name in props:
+        if name == 'job':
+            raise ValueError("'job' is reserved for the names of the jobs.")
+        if not massextract._has_attribute(name, items):
+            raise AttributeError("Unknown attribute {0}.".format(name))
+
+    jobs = [key for key, value in items]
+    index = {key: i for i, key in enumerate(jobs)}
+    fields, columns, ragged, units, missing, failures = [], [], {}, {}, {}, {}
+    for name in props:
+        values = [None] * len(jobs)
+        errors = {}
+        for key, success, value in massextract._collect(name, items):
+            if success:
+                values[index[key]] = value
+            else:
+                errors[key] = value
+        if len(errors):
+            failures[name] = errors
+        if any(u is None for u in values):
+            missing[name] = array([u is None for u in values], dtype=bool)
+        if len(errors) == len(jobs) and len(jobs):
+            raise ValueError("Could not extract {0} from any job.".format(name))
+        kind, data, unit = _column(values)
+        if unit is not None:
+            units[name] = unit
+        if kind == 'ragged':
+            ragged[name] = data
+            continue
+        dtype = data.dtype if unit is None else np_dtype(data.dtype, metadata={'units': unit})
+        fields.append((name, dtype, data.shape[1:]))
+        columns.append((name, data))
+
+    names = array(jobs) if len(jobs) else array([], dtype='U1')
+    records = zeros(len(jobs), dtype=[('job', names.dtype)] + fields)
+    records['job'] = names
+    for name, data in columns:
+        records[name] = data
+    return Table(records.view(recarray), ragged=ragged, units=units, missing=missing,
+                 failures=failures)
@@ -28,6 +28,7 @@ __all__ = ['testValidProgram', 'copyfile', 'Changedir',
 
 from types import ModuleType
 from sys import version_info
+from collections import namedtuple
 
 from .changedir import Changedir
 from .relativepath import RelativePath
@@ -69,37 +70,115 @@ def setTestValidProgram(pgm):
         testValidProgram = os.path.expanduser(pgm)
 
 
-def _copyfile_impl(src, dest):
-    """ Copies files by hand. 
+FICLONE = 0x40049409
+""" Linux ioctl request cloning a file, i.e. creating a copy-on-write reflink. """
 
-        Makes sure that files are actually copied to disk, as opposed to
-        buffered. Does not check for existence or anything.
+CopyReport = namedtuple('CopyReport', ['method', 'nbytes', 'seconds'])
+""" How a file was copied, how many bytes were copied, and how long it took. """
+
+
+def _reflink(infile, outfile):
+    """ Clones a file on copy-on-write file-systems. Raises OSError on failure. """
+    from fcntl import ioctl
+    ioctl(outfile.fileno(), FICLONE, infile.fileno())
+
+
+def _kernel_copy(infile, outfile, size):
+    """ Copies data within the kernel, with copy_file_range or sendfile.
+
+        Raises OSError or AttributeError if neither is available.
     """
-    from os import stat, fsync
+    import os
+    copy = getattr(os, 'copy_file_range', None)
+    method = 'copy_file_range'
+    if copy is None:
+        method = 'sendfile'
+
+        def copy(src, dst, count, offset_src=None, offset_dst=None):
+            return os.sendfile(dst, src, offset_src, count)
+    offset = 0
+    while offset < size:
+        done = copy(infile.fileno(), outfile.fileno(), min(size - offset, 1 << 30),
+                    offset, offset)
+        if done == 0:
+            break
+        offset += done
+    if offset != size:
+        raise OSError("Kernel copy stopped after {0} of {1} bytes.".format(offset, size))
+    return method
+
+
+def _copyfile_impl(src, dest, hardlink=False, fsync=None):
+    """ Copies files without going through python buffers when possible.
+
+        Tries in order:
+
+        - a hard-link, if ``hardlink`` is True. Only for files which neither
+          source nor destination will modify, since they share their content.
+        - a reflink, i.e. a copy-on-write clone, on file-systems which support it.
+        - a copy within the kernel, with ``copy_file_range`` or ``sendfile``.
+        - a copy by chunks of 1MB.
+
+        Does not check for existence or anything.
+
+        :param fsync:
+            Whether to flush the copy to disk before returning. Defaults to
+            :py:data:`pylada.copyfile_fsync`.
+        :returns: a :py:data:`CopyReport`.
+    """
+    from os import stat, fsync as os_fsync, link, remove
+    from os.path import lexists
+    from time import time
 
-    stepsize = 2**20
+    if fsync is None:
+        from .. import copyfile_fsync as fsync
+    start = time()
     size = stat(src).st_size
-    if size == 0:
-        with open(dest, 'wb') as outfile:
+
+    if hardlink:
+        try:
+            if lexists(dest):
+                remove(dest)
+            link(src, dest)
+        except OSError:
             pass
-        return
+        else:
+            return CopyReport('hardlink', size, time() - start)
 
+    method = 'empty'
     with open(dest, 'wb') as outfile:
         with open(src, 'rb') as infile:
-            steps = [stepsize] * (size // stepsize)
-            if size % stepsize != 0:
-                steps += [size % stepsize]
-            for step in steps:
-                buffer = infile.read(step)
-                if buffer is None:
-                    break
-                outfile.write(buffer)
+            if size > 0:
+                method = None
+                try:
+                    _reflink(infile, outfile)
+                    method = 'reflink'
+                except (OSError, ImportError):
+                    pass
+                if method is None:
+                    try:
+                        method = _kernel_copy(infile, outfile, size)
+                    except (OSError, AttributeError):
+                        infile.seek(0)
+                        outfile.seek(0)
+                        outfile.truncate()
+                if method is None:
+                    method = 'chunks'
+                    stepsize = 2**20
+                    while True:
+                        buffer = infile.read(stepsize)
+                        if not buffer:
+                            break
+                        outfile.write(buffer)
         # makes sure stuff is written to disk prior to returning.
-        outfile.flush()
-        fsync(outfile.fileno())
+        if fsync:
+            outfile.flush()
+            os_fsync(outfile.fileno())
+    return CopyReport(method, size, time() - start)
 
 
-def copyfile(src, dest=None, nothrow=None, symlink=False, aslink=False, nocopyempty=False):
+def copyfile(src, dest=None, nothrow=None, symlink=False, aslink=False, nocopyempty=False,
+             hardlink=False, fsync=None, report=False):
     """ Copy ``src`` file onto ``dest`` directory or file.
 
         :param src:
@@ -126,6 +205,17 @@ def copyfile(src, dest=None, nothrow=None, symlink=False, aslink=False, nocopyem
             ``src`` itself. Defaults to False.
         :parma nocopyempty:
             Does not perform copy if file is empty. Defaults to False.
+        :param hardlink:
+            Creates a hard-link rather than a copy, if possible. Only for files
+            which neither the source nor the destination will modify, e.g.
+            read-only restart inputs. Otherwise, files are cloned (reflink) on
+            file-systems which support it, or copied within the kernel.
+        :param fsync:
+            Whether to flush copies to disk before returning. Defaults to
+            :py:data:`pylada.copyfile_fsync`.
+        :param report:
+            If True, returns a :py:data:`CopyReport` with the method used, the
+            number of bytes and the time spent, rather than True.
 
         This function fails selectively, depending on what is in ``nothrow`` list.
     """
@@ -189,7 +279,11 @@ def copyfile(src, dest=None, nothrow=None, symlink=False, aslink=False, nocopyem
                 with chdir(local_path(dest).dirname):
                     ln(relpath(src, dirname(dest)), basename(dest))
         else:
-            _copyfile_impl(src, dest)
+            from .. import logger
+            result = _copyfile_impl(src, dest, hardlink=hardlink, fsync=fsync)
+            logger.debug("misc/copyfile: {0} -> {1}: {2.nbytes} bytes in {2.seconds:.3f}s ({2.method})"
+                         .format(src, dest, result))
+            return result if report else True
     except:
         if 'never' in nothrow:
             return False
@@ -26,6 +26,43 @@
 
 from .process import Process
 
+BLOBDIR = '.pylada_blobs'
+""" Name of the directory where pickled functionals are stored. """
+
+
+def write_blob(obj, directory):
+    """ Pickles an object to a content-addressed file.
+
+        The file is named after the hash of the pickle, and only written if it
+        does not exist yet, so that identical objects, e.g. the functional
+        shared by all the jobs of a job-folder, are stored once. It is written
+        under a temporary name and then moved in place, so that concurrent
+        processes never see partial files.
+
+        :returns: Path to the file.
+    """
+    from hashlib import sha256
+    from os import makedirs, rename, getpid
+    from os.path import join, exists
+    from pickle import dumps
+    data = dumps(obj)
+    result = join(directory, '{0}.pickle'.format(sha256(data).hexdigest()))
+    if exists(result):
+        return result
+    if not exists(directory):
+        makedirs(directory, exist_ok=True)
+    temporary = '{0}.{1}.part'.format(result, getpid())
+    with open(temporary, 'wb') as file:
+        file.write(data)
+    rename(temporary, result)
+    return result
+
+
+def _params_path(script):
+    """ Path of the pickled parameters loaded by a script. """
+    from os.path import splitext
+    return splitext(script)[0] + '.pickle'
+
 
 class CallProcess(Process):
     """ Calls functional in child python process.
@@ -43,6 +80,8 @@ class CallProcess(Process):
                  stderr=None,
                  maxtrials=1,
                  dompi=False,
+                 blobdir=None,
+                 blob=None,
                  **kwargs):
         """ Initializes a process.
 
@@ -61,10 +100,18 @@ class CallProcess(Process):
             :param int maxtrials:
               Maximum number of times to try re-launching each process upon
               failure.
+            :param str blobdir:
+              Directory where the pickled functional is stored. Defaults to
+              the :py:data:`BLOBDIR` subdirectory of ``outdir``.
+            :param str blob:
+              Path to the functional already pickled with
+              :py:func:`write_blob`, if any. Drivers launching many jobs with
+              the same functional pass it to avoid pickling it for each job.
             :param kwargs:
               Keyword arguments to the callables should be given here, as keyword
               arguments to :py:class:`CallProcess`.
         """
+        from os.path import join
         from ..misc import RelativePath
         super(CallProcess, self).__init__(maxtrials=maxtrials)
         self.functional = functional
@@ -81,6 +128,14 @@ class CallProcess(Process):
         """ Whether to run with mpi or not. """
         self.params = kwargs.copy()
         """ Extra parameters to pass on to iterator. """
+        self.blobdir = join(self.outdir, BLOBDIR) if blobdir is None \
+            else RelativePath(blobdir).path
+        """ Directory where the pickled functional is stored. """
+        self.blob = blob
+        """ Path to the pickled functional.
+
+            None until the functional is first written to :py:attr:`blobdir`.
+        """
 
     def poll(self):
         """ Polls current job. """
@@ -115,38 +170,56 @@ class CallProcess(Process):
             raise Fail()
         self._next()
 
-    def _next(self):
-        """ Launches actual calculation. """
-        from pickle import dumps
-        from sys import executable, path as pypath
+    def _write_script(self):
+        """ Writes the python script executed by the child process.
+
+            The functional is pickled to a content-addressed file in
+            :py:attr:`blobdir`, unless :py:attr:`blob` is already set. The
+            parameters differ from job to job. They are pickled to a file next
+            to the script, and removed along with it. The script loads both by
+            path.
+
+            :returns: Path to the script.
+        """
+        from sys import path as pypath
+        from pickle import dump
         from tempfile import NamedTemporaryFile
-        from .program import ProgramProcess
         from ..misc import local_path
-        # creates temp input script.
+        if self.dompi:
+            params = self.params
+        else:
+            params = {'comm': self._comm}
+            params.update(self.params)
+        if self.blob is None:
+            self.blob = write_blob(self.functional, self.blobdir)
+
         local_path(self.outdir).ensure(dir=True)
         with NamedTemporaryFile(
                 dir=self.outdir, suffix='.py', delete=False,
                 mode='w') as stdin:
+            with open(_params_path(stdin.name), 'wb') as file:
+                dump(params, file)
+            stdin.write("from sys import path\n"
+                        "path[:] = {0!r}\n\n".format(pypath))
+            if self.dompi:
+                stdin.write("from mpi4py import MPI\n")
+            stdin.write("from pickle import load\n\n"
+                        "with open({0!r}, 'rb') as file:\n"
+                        "    params = load(file)\n"
+                        "with open({1!r}, 'rb') as file:\n"
+                        "    functional = load(file)\n\n"
+                        .format(_params_path(stdin.name), self.blob))
             if self.dompi:
-                params = self.params
-                stdin.write("from sys import path\n"
-                            "path[:] = {0!r}\n\n"
-                            "from mpi4py import MPI\n"
-                            "from pickle import loads\n"
-                            "params, functional = loads({1!r})\n\n"
-                            "params['comm'] = MPI.COMM_WORLD\n"
-                            "functional(**params)\n".format(
-                                pypath, dumps((params, self.functional))))
-            else:
-                params = {'comm': self._comm}
-                params.update(self.params)
-                stdin.write("from sys import path\n"
-                            "path[:] = {0!r}\n\n"
-                            "from pickle import loads\n"
-                            "params, functional = loads({1!r})\n\n"
-                            "functional(**params)\n".format(
-                                pypath, dumps((params, self.functional))))
-            self._stdin = stdin.name
+                stdin.write("params['comm'] = MPI.COMM_WORLD\n")
+            stdin.write("functional(**params)\n")
+        return stdin.name
+
+    def _next(self):
+        """ Launches actual calculation. """
+        from sys import executable
+        from .program import ProgramProcess
+        # creates temp input script.
+        self._stdin = self._write_script()
 
         # now create process. maxtrials is one if Extract exists, so that we can
         # check success using that instead.
@@ -175,17 +248,17 @@ class CallProcess(Process):
         return False
 
     def _cleanup(self):
-        """ Removes temporary script. """
+        """ Removes temporary script and its parameters. """
         from os import remove
         super(CallProcess, self)._cleanup()
         if not hasattr(self, '_stdin'):
             return
-        try:
-            remove(self._stdin)
-        except:
-            pass
-        finally:
-            del self._stdin
+        for path in [self._stdin, _params_path(self._stdin)]:
+            try:
+                remove(path)
+            except:
+                pass
+        del self._stdin
 
     def wait(self):
         """ Waits for process to end, then cleanup. """
@@ -40,11 +40,15 @@ class JobFolderProcess(Process):
           created. To modify :py:attr:`jobfolder`, one should call
           :py:meth:`update`.
 
+        If a :py:attr:`journal` is given, each start, finish, and failure is
+        appended to it. A relaunched driver then skips the folders the journal
+        records as finished, without having to re-parse their output.
+
         .. seealso:: :py:class:`~pylada.process.pool.PoolProcess`
     """
 
     def __init__(self, jobfolder, outdir, maxtrials=1, nbpools=1,
-                 keepalive=False, **kwargs):
+                 keepalive=False, journal=None, **kwargs):
         """ Initializes a process.
 
             :param jobfolder:
@@ -71,11 +75,16 @@ class JobFolderProcess(Process):
             :param int maxtrials:
               Maximum number of times to try re-launching each process upon
               failure. 
+            :param journal:
+              Path to a :py:class:`~pylada.process.journal.Journal` file, or a
+              journal instance. If given, folders recorded there as finished are
+              not launched again, and subsequent events are appended to it.
             :param kwargs:
               Keyword arguments to the functionals in the executable folders. These
               arguments will be applied indiscriminately to all folders.
         """
         from ..misc import RelativePath
+        from .journal import Journal
         super(JobFolderProcess, self).__init__(maxtrials)
 
         self.jobfolder = jobfolder
@@ -106,9 +115,25 @@ class JobFolderProcess(Process):
         """ Set of finished runs. """
         self._torun = set()
         """ List of jobs to run. """
+        self._blobs = {}
+        """ Maps id of functionals to (functional, path to its pickle).
+
+            Functionals shared by many folders are thus pickled only once.
+        """
         for name, job in self.jobfolder.items():
             if not job.is_tagged:
                 self._torun.add(name)
+        self.journal = journal
+        """ Journal where start, finish and failure events are recorded.
+
+            None if no journal is kept.
+        """
+        if isinstance(self.journal, str):
+            self.journal = Journal(self.journal)
+        if self.journal is not None and not kwargs.get('overwrite', False):
+            finished = self.journal.finished & self._torun
+            self._finished |= finished
+            self._torun -= finished
 
         self.errors = {}
         """ Map between name of failed jobs and exception. """
@@ -150,9 +175,11 @@ class JobFolderProcess(Process):
                 if process.poll() == True:
                     self._finished.add(name)
                     finished.append(i)
+                    self._record('finish', name)
             except Exception as e:
                 self.errors[name] = e
                 finished.append(i)
+                self._record('fail', name, _exit_code(e))
         for i in sorted(finished)[::-1]:
             name, process = self.process.pop(i)
             process._cleanup()
@@ -217,14 +244,16 @@ class JobFolderProcess(Process):
                     process = IteratorProcess(jobfolder.functional,
                                               join(self.outdir, name), **params)
                 else:
-                    process = CallProcess(self.functional, join(
-                        self.outdir, name), **params)
+                    process = CallProcess(jobfolder.functional, join(self.outdir, name),
+                                          blob=self._blob(jobfolder.functional), **params)
                 # appends process and starts it.
                 self.process.append((name, process))
+                self._record('start', name)
                 try:
                     process.start(local_comms.pop())
                 except Exception as e:
                     self.errors[name] = e
+                    self._record('fail', name, _exit_code(e))
                     name, process = self.process.pop(-1)
                     process._cleanup()
                     raise
@@ -235,6 +264,21 @@ class JobFolderProcess(Process):
             for comm in local_comms:
                 comm.cleanup()
 
+    def _blob(self, functional):
+        """ Path to the pickled functional, written once per functional object. """
+        from os.path import join
+        from .call import write_blob, BLOBDIR
+        found = self._blobs.get(id(functional))
+        if found is None or found[0] is not functional:
+            found = functional, write_blob(functional, join(self.outdir, BLOBDIR))
+            self._blobs[id(functional)] = found
+        return found[1]
+
+    def _record(self, event, name, code=None):
+        """ Appends event to the journal, if any. """
+        if self.journal is not None:
+            self.journal.record(event, name, code)
+
     def kill(self):
         """ Kills all currently running processes. 
 
@@ -341,3 +385,10 @@ class JobFolderProcess(Process):
             for name in self.jobfolder.root.keys():
                 if name in self._finished:
                     del self.jobfolder.root[name]
+
+
+def _exit_code(exception):
+    """ Exit code carried by a failure, if any. """
+    args = getattr(exception, 'args', ())
+    if len(args) > 0 and isinstance(args[0], int):
+        return args[0]
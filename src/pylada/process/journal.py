@@ -0,0 +1,143 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to
+#  make it easier to submit large numbers of jobs on supercomputers. It
+#  provides a python interface to physical input, such as crystal structures,
+#  as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs.
+#  It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the
+#  terms of the GNU General Public License as published by the Free Software
+#  Foundation, either version 3 of the License, or (at your option) any later
+#  version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY
+#  WARRANTY; without even the implied warranty of MERCHANTABILITY or FITNESS
+#  FOR A PARTICULAR PURPOSE.  See the GNU General Public License for more
+#  details.
+
+""" Append-only journal of job-folder execution events.
+
+    A :py:class:`~pylada.process.jobfolder.JobFolderProcess` driver killed at
+    walltime would otherwise have to rediscover which folders are done by
+    re-creating an extraction object for each one. Instead, it can record
+    each start, finish, and failure to a small text file and replay that file
+    when relaunched.
+
+    Each event is a single line ``timestamp event code name`` appended to the
+    file and flushed to disk immediately. A line truncated by a crash is
+    simply ignored on replay.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['Journal']
+
+
+class Journal(object):
+    """ Append-only record of job-folder execution events. """
+
+    START = 'start'
+    """ Event recorded when a folder is launched. """
+    FINISH = 'finish'
+    """ Event recorded when a folder completes successfully. """
+    FAIL = 'fail'
+    """ Event recorded when a folder fails. """
+
+    def __init__(self, path, fsync=True):
+        """ Creates a journal.
+
+            :param str path:
+              Path to the journal file. It is created on the first event.
+            :param bool fsync:
+              Whether to force each event to disk as it is recorded.
+        """
+        from ..misc import RelativePath
+        super(Journal, self).__init__()
+        self.path = RelativePath(path).path
+        """ Path to the journal file. """
+        self.fsync = fsync
+        """ Whether to force each event to disk as it is recorded. """
+
+    @staticmethod
+    def path_for(pickle):
+        """ Path of the journal associated with a job-folder pickle. """
+        return pickle + '.journal'
+
+    def record(self, event, name, code=None):
+        """ Appends an event to the journal.
+
+            :param str event: One of ``start``, ``finish``, or ``fail``.
+            :param str name: Name of the job-folder.
+            :param code: Exit code of failed jobs, if known.
+        """
+        from os import open as osopen, write, close, fsync
+        from os import O_WRONLY, O_APPEND, O_CREAT
+        from time import time
+        from ..error import ValueError
+        if event not in (self.START, self.FINISH, self.FAIL):
+            raise ValueError("Unknown journal event {0}.".format(event))
+        if len(name.split()) != 1:
+            raise ValueError("Cannot journal job-folder named {0!r}.".format(name))
+        code = '-' if code is None else str(code).replace(' ', '_')
+        line = '{0:.3f} {1} {2} {3}\n'.format(time(), event, code, name)
+        # a single write to a file opened in append mode, so that concurrent
+        # writers do not interleave partial lines.
+        fd = osopen(self.path, O_WRONLY | O_APPEND | O_CREAT, 0o644)
+        try:
+            write(fd, line.encode('utf-8'))
+            if self.fsync:
+                fsync(fd)
+        finally:
+            close(fd)
+
+    def start(self, name):
+        """ Records that a job-folder was launched. """
+        self.record(self.START, name)
+
+    def finish(self, name):
+        """ Records that a job-folder completed successfully. """
+        self.record(self.FINISH, name)
+
+    def fail(self, name, code=None):
+        """ Records that a job-folder failed. """
+        self.record(self.FAIL, name, code)
+
+    def __iter__(self):
+        """ Iterates over (timestamp, event, code, name) of recorded events. """
+        from os.path import exists
+        if not exists(self.path):
+            return
+        with open(self.path, 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    break
+                data = line.decode('utf-8', 'replace').split()
+                if len(data) != 4 or data[1] not in (self.START, self.FINISH, self.FAIL):
+                    continue
+                try:
+                    timestamp = float(data[0])
+                except ValueError:
+                    continue
+                code = None if data[2] == '-' else data[2]
+                yield timestamp, data[1], code, data[3]
+
+    def replay(self):
+        """ Maps each job-folder name to its last recorded event.
+
+            Values are (event, timestamp, code) tuples.
+        """
+        result = {}
+        for timestamp, event, code, name in self:
+            result[name] = event, timestamp, code
+        return result
+
+    @property
+    def finished(self):
+        """ Set of job-folders whose last recorded event is a success. """
+        return {name for name, (event, _, _) in self.replay().items()
+                if event == self.FINISH}
+
+    def __repr__(self):
+        return "{0.__class__.__name__}({0.path!r})".format(self)
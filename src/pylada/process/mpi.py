@@ -33,9 +33,132 @@ class MPISizeError(error.ValueError):
     pass
 
 
+class FreeList(object):
+    """ Sorted free-list of machine slots used for mpi placement.
+
+        Machines are kept in a list sorted by number of free slots, so that the
+        best-fitting machine for a request is found by bisection. Placement
+        prefers, in order:
+
+          - a single machine, choosing the one with the fewest free slots which
+            can still hold the request, so that whole nodes are kept intact for
+            later jobs,
+          - otherwise, whole machines taken largest first, which minimizes the
+            number of hosts spanned by the job, with the remainder placed again
+            on the best-fitting machine.
+
+        Ties are broken by the order of the machines in the input dictionary,
+        so that placement is deterministic.
+
+        The free-list is updated in place as slots are allocated and given
+        back, together with the input dictionary of machines. It keeps running
+        totals of free and stranded slots, so that neither requires a pass over
+        the machines.
+    """
+
+    def __init__(self, machines, capacity=None):
+        super(FreeList, self).__init__()
+        self.machines = machines
+        """ Map of machines to free slots, kept in sync with the free-list. """
+        self._slots = sorted(
+            (n, i, key) for i, (key, n) in enumerate(machines.items()) if n > 0)
+        """ Sorted list of (free slots, order, machine). """
+        self._orders = {key: i for i, key in enumerate(machines)}
+        """ Order of each machine, used to break ties. """
+        self.capacity = {} if capacity is None else capacity
+        """ Largest number of free slots seen on each machine.
+
+            Machines are usually whole when first seen, so this stands in for
+            the size of each node.
+        """
+        self.total = 0
+        """ Total number of free slots. """
+        self._stranded = 0
+        """ Number of free slots on partially used machines. """
+        for n, order, key in self._slots:
+            self._count(key, 0, n)
+
+    def __len__(self):
+        return len(self._slots)
+
+    def _count(self, key, old, new):
+        """ Updates running totals when a machine goes from old to new free slots. """
+        capacity = self.capacity.get(key, 0)
+        if 0 < old < capacity:
+            self._stranded -= old
+        if new > capacity:
+            self.capacity[key] = capacity = new
+        if 0 < new < capacity:
+            self._stranded += new
+        self.total += new - old
+
+    def _set(self, key, n):
+        """ Sets the number of free slots of a machine. """
+        from bisect import bisect_left, insort
+        old = self.machines.get(key, 0)
+        if key not in self._orders:
+            self._orders[key] = len(self._orders)
+        order = self._orders[key]
+        if old > 0:
+            del self._slots[bisect_left(self._slots, (old, order))]
+        if n > 0:
+            insort(self._slots, (n, order, key))
+            self.machines[key] = n
+        else:
+            self.machines.pop(key, None)
+        self._count(key, old, n)
+
+    def add(self, key, n):
+        """ Gives back n slots on a machine. """
+        self._set(key, self.machines.get(key, 0) + n)
+
+    @property
+    def fragmentation(self):
+        """ Ratio of free slots stranded on partially used machines to all free slots.
+
+            Whole free machines are not fragmentation: they can still hold any
+            job which fits on a node.
+        """
+        if self.total == 0:
+            return 0e0
+        return float(self._stranded) / float(self.total)
+
+    def best_fit(self, nprocs):
+        """ Index of smallest machine with at least nprocs free slots.
+
+            None if no single machine can hold nprocs processes.
+        """
+        from bisect import bisect_left
+        index = bisect_left(self._slots, (nprocs,))
+        return index if index < len(self._slots) else None
+
+    def allocate(self, nprocs):
+        """ Removes nprocs slots from the free-list.
+
+            :returns: A list of (machine, slots) tuples.
+            :raises MPISizeError: if there are too few free slots.
+        """
+        if nprocs > self.total:
+            raise MPISizeError((nprocs, self.total))
+        result = []
+        while nprocs > 0:
+            index = self.best_fit(nprocs)
+            if index is None:
+                n, order, key = self._slots[-1]
+                result.append((key, n))
+                self._set(key, 0)
+                nprocs -= n
+                continue
+            n, order, key = self._slots[index]
+            result.append((key, nprocs))
+            self._set(key, n - nprocs)
+            nprocs = 0
+        return result
+
+
 class Communicator(dict):
     """ Communicator to create MPI processes. """
-    __slots__ = ['_nodefile', 'machines', 'parent', '__weakref__']
+    __slots__ = ['_nodefile', 'machines', 'parent', '_freelist', '__weakref__']
     """ Mostly to limit the possibility of circular references. """
 
     def __init__(self, *args, **kwargs):
@@ -58,6 +181,12 @@ class Communicator(dict):
             If None, then this should be :py:data:`pylada.default_comm`, eg the very
             first communicator setup at the start of the application.
         """
+        self._freelist = None
+        """ :py:class:`FreeList` over :py:attr:`machines`.
+
+            Created on first use, and updated as processes are lent and given
+            back.
+        """
 
     def lend(self, nprocs):
         """ Lend n processes from this communicator.
@@ -65,6 +194,10 @@ class Communicator(dict):
             After the call, this communicator will not have acccess to the machines
             lent to the returned communicator. They should be given back when
             cleanup is called on the result.
+
+            Machines are chosen by :py:class:`FreeList`: the job is placed on as
+            few hosts as possible, preferring partially used machines which fit
+            it exactly over breaking up whole nodes.
         """
         from pylada import do_multiple_mpi_programs
         from weakref import ref
@@ -86,23 +219,42 @@ class Communicator(dict):
         result.machines = {}
         result.parent = ref(self)
         if len(self.machines) != 0:
-            while result['n'] != nprocs:
-                key, value = list(self.machines.items())[0]
-                if result['n'] + value > nprocs:
-                    result.machines[key] = nprocs - result['n']
-                    self.machines[key] = value - result.machines[key]
-                    result['n'] = sum(result.machines.values())
-                    self['n'] = sum(self.machines.values())
-                else:
-                    result.machines[key] = value
-                    result['n'] += value
-                    self.machines.pop(key)
-                    self['n'] -= value
+            freelist = self._free_list()
+            for key, value in freelist.allocate(nprocs):
+                result.machines[key] = value
+            result['n'] = nprocs
+            self['n'] = freelist.total
         else:
             result['n'] = nprocs
             self['n'] -= nprocs
         return result
 
+    def _free_list(self):
+        """ :py:class:`FreeList` over the machines of this communicator.
+
+            The free-list is kept from call to call. It is only built again if
+            :py:attr:`machines` was replaced or modified directly, as detected
+            from its number of machines and processes.
+        """
+        freelist = self._freelist
+        if freelist is None or freelist.machines is not self.machines \
+                or len(freelist) != len(self.machines) or freelist.total != self['n']:
+            capacity = None if freelist is None else freelist.capacity
+            freelist = self._freelist = FreeList(self.machines, capacity)
+        return freelist
+
+    @property
+    def fragmentation(self):
+        """ Fragmentation of the free processes of this communicator.
+
+            Defined as the ratio of free slots stranded on partially used
+            machines to the total number of free slots. Machines which are
+            entirely free do not count. It is zero when there are no free
+            processes or when all of them sit on whole nodes, and one when every
+            free slot is left over on a node already running other jobs.
+        """
+        return self._free_list().fragmentation
+
     def split(self, n=2):
         """ Creates list of splitted Communicator.
 
@@ -138,11 +290,10 @@ class Communicator(dict):
             comm = other.lend(n)
             self.acquire(comm)
             return
-        for key, value in other.machines.items():
-            if key in self.machines:
-                self.machines[key] += value
-            else:
-                self.machines[key] = value
+        if len(other.machines) != 0:
+            freelist = self._free_list()
+            for key, value in other.machines.items():
+                freelist.add(key, value)
         self['n'] += other['n']
         other.machines = {}
         other['n'] = 0
@@ -197,11 +348,10 @@ class Communicator(dict):
         # return nodes to parent.
         parent = None if self.parent is None else self.parent()
         if parent is not None:
-            for key, value in self.machines.items():
-                if key in parent.machines:
-                    parent.machines[key] += value
-                else:
-                    parent.machines[key] = value
+            if len(self.machines) != 0:
+                freelist = parent._free_list()
+                for key, value in self.machines.items():
+                    freelist.add(key, value)
             parent['n'] += self['n']
             self.parent = None
             self.machines = {}
@@ -229,6 +379,7 @@ class Communicator(dict):
         self.update(value[0])
         self.machines, self._nodefile = value[1:]
         self.parent = None
+        self._freelist = None
 
 
 def create_global_comm(nprocs, dir=None):
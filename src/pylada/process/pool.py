@@ -20,7 +20,7 @@
 #  <http://www.gnu.org/licenses/>.
 ###############################
 
-from .jobfolder import JobFolderProcess
+from .jobfolder import JobFolderProcess, _exit_code
 
 
 class PoolProcess(JobFolderProcess):
@@ -75,7 +75,7 @@ class PoolProcess(JobFolderProcess):
     """
 
     def __init__(self, jobfolder, outdir, processalloc, maxtrials=1,
-                 keepalive=False, **kwargs):
+                 keepalive=False, journal=None, **kwargs):
         """ Initializes a process.
 
             :param jobfolder:
@@ -107,12 +107,17 @@ class PoolProcess(JobFolderProcess):
             :param int maxtrials:
               Maximum number of times to try re-launching each process upon
               failure. 
+            :param journal:
+              Path to a :py:class:`~pylada.process.journal.Journal` file, or a
+              journal instance. Folders recorded there as finished are not
+              launched again.
             :param kwargs:
               Keyword arguments to the functionals in the executable folders. These
               arguments will be applied indiscriminately to all folders.
         """
         super(PoolProcess, self).__init__(jobfolder, outdir, maxtrials,
-                                          keepalive=keepalive,  **kwargs)
+                                          keepalive=keepalive, journal=journal,
+                                          **kwargs)
         del self.nbpools  # not needed here.
 
         self.processalloc = processalloc
@@ -173,13 +178,16 @@ class PoolProcess(JobFolderProcess):
                     process = IteratorProcess(jobfolder.functional,
                                               join(self.outdir, name), **params)
                 else:
-                    process = CallProcess(self.functional, join(self.outdir, name), **params)
+                    process = CallProcess(jobfolder.functional, join(self.outdir, name),
+                                          blob=self._blob(jobfolder.functional), **params)
                 # appends process and starts it.
                 self.process.append((name, process))
+                self._record('start', name)
                 try:
                     process.start(self._comm.lend(nprocs))
                 except Exception as e:
                     self.errors[name] = e
+                    self._record('fail', name, _exit_code(e))
                     name, process = self.process.pop(-1)
                     process._cleanup()
         except:
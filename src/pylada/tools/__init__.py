@@ -121,9 +121,20 @@ def check_success_generator(function):
     return wrapper
 
 
-def make_cached(method):
-    """ Caches the result of a method for futur calls. """
+def make_cached(method=None, persistent=True):
+    """ Caches the result of a method for futur calls.
+
+        Results are also stored on disk if :py:data:`pylada.extraction_cache`
+        is set. See :py:mod:`pylada.tools.diskcache`. Stored results are only
+        discarded when the output file of the extraction object changes. Hence
+        methods reading other files, e.g. the CONTCAR, are decorated with
+        ``make_cached(persistent=False)``, so that their results are only kept
+        in memory.
+    """
     from functools import wraps
+    from .diskcache import cached_call
+    if method is None:
+        return lambda method: make_cached(method, persistent)
 
     @wraps(method)
     def wrapped(*args, **kwargs):
@@ -132,7 +143,8 @@ def make_cached(method):
             setattr(args[0], '_properties_cache', {})
         cache = getattr(args[0], '_properties_cache')
         if method.__name__ not in cache:
-            cache[method.__name__] = method(*args, **kwargs)
+            cache[method.__name__] = cached_call(method, args, kwargs) if persistent \
+                else method(*args, **kwargs)
         logger.debug('tools/init make_cached: set method: %s' % method.__name__)
         return cache[method.__name__]
     return wrapped
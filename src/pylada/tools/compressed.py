@@ -0,0 +1,528 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Reading and writing compressed output files.
+
+    Finished calculations can be compacted to save quota: an OUTCAR becomes
+    OUTCAR.gz, OUTCAR.xz or OUTCAR.zst. :py:func:`open_output` opens any of
+    these transparently, given the name of the uncompressed file.
+
+    Files compacted by :py:func:`compress` are written in seekable formats:
+
+    - gzip files are blocked (BGZF): a series of gzip members holding at most
+      64kB of data each, whose compressed size is stored in their header.
+    - zstd files follow the zstd seekable format: independent frames followed
+      by a seek table in a skippable frame.
+
+    Both are valid gzip and zstd files, readable by standard tools. Random
+    access into them, e.g. to read the last lines of an OUTCAR, only
+    decompresses the blocks being read. Other gzip files, and xz files, are
+    read sequentially.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['SUFFIXES', 'find_output', 'open_output', 'compress', 'compact']
+from io import RawIOBase
+
+SUFFIXES = ('.gz', '.xz', '.zst')
+""" Suffixes of compressed output files, in order of precedence. """
+
+BGZF_BLOCKSIZE = 0xff00
+""" Uncompressed size of blocked-gzip blocks. """
+
+ZSTD_FRAMESIZE = 1 << 20
+""" Uncompressed size of the frames of seekable zstd files. """
+
+BLOCKSIZE = 1 << 20
+""" Size of the reads when skipping through sequentially compressed files. """
+
+_BGZF_EOF = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00\x1b\x00' \
+    b'\x03\x00\x00\x00\x00\x00\x00\x00\x00\x00'
+""" Empty block marking the end of a blocked-gzip file. """
+
+_ZSTD_SKIPPABLE = 0x184D2A5E
+""" Magic number of the skippable frame holding a zstd seek table. """
+
+_ZSTD_SEEKABLE = 0x8F92EAB1
+""" Magic number ending a zstd seek table. """
+
+TABLES_SIZE = 256
+""" Number of block tables kept in memory. """
+
+_tables = None
+""" Maps table reader and path to ((modification time, size), table). """
+
+
+def find_output(path):
+    """ Path to an output file, or to its compressed version, or None.
+
+        The uncompressed file takes precedence.
+    """
+    from os.path import exists
+    if exists(path):
+        return path
+    for suffix in SUFFIXES:
+        if exists(path + suffix):
+            return path + suffix
+    return None
+
+
+def _zstandard():
+    """ Imports the optional zstandard package. """
+    from ..error import ImportError
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("The zstandard package is required for .zst files.")
+    return zstandard
+
+
+def _bgzf_blocks(file):
+    """ Table of the blocks of a blocked-gzip file, or None if not blocked.
+
+        :returns: list of (compressed offset, compressed size, size)
+    """
+    from struct import unpack
+    result, offset = [], 0
+    while True:
+        file.seek(offset)
+        header = file.read(18)
+        if len(header) == 0:
+            return result
+        if len(header) < 18 or header[:4] != b'\x1f\x8b\x08\x04' \
+           or header[12:14] != b'BC' or unpack('<H', header[14:16])[0] != 2:
+            return None
+        csize = unpack('<H', header[16:18])[0] + 1
+        file.seek(offset + csize - 4)
+        size = unpack('<I', file.read(4))[0]
+        result.append((offset, csize, size))
+        offset += csize
+
+
+def _zstd_frames(file):
+    """ Table of the frames of a seekable zstd file, or None if not seekable.
+
+        :returns: list of (compressed offset, compressed size, size)
+    """
+    from struct import unpack
+    from os import SEEK_END
+    size = file.seek(0, SEEK_END)
+    if size < 17:
+        return None
+    file.seek(size - 9)
+    nframes, descriptor, magic = unpack('<IBI', file.read(9))
+    if magic != _ZSTD_SEEKABLE:
+        return None
+    entry = 12 if descriptor & 0x80 else 8
+    file.seek(size - 9 - nframes * entry)
+    table = file.read(nframes * entry)
+    result, offset = [], 0
+    for i in range(nframes):
+        csize, dsize = unpack('<II', table[i * entry:i * entry + 8])
+        result.append((offset, csize, dsize))
+        offset += csize
+    return result
+
+
+def _block_table(path, read_table):
+    """ Table of the blocks of a file, cached until the file changes.
+
+        :param str path: Path to the compressed file.
+        :param read_table:
+            Callable reading the table from the file opened in binary mode,
+            e.g. :py:func:`_bgzf_blocks`.
+    """
+    from collections import OrderedDict
+    from os import stat
+    from os.path import abspath
+    global _tables
+    if _tables is None:
+        _tables = OrderedDict()
+    path = abspath(path)
+    info = stat(path)
+    stamp = info.st_mtime_ns, info.st_size
+    cached = _tables.pop((read_table, path), None)
+    if cached is None or cached[0] != stamp:
+        with open(path, 'rb') as file:
+            cached = stamp, read_table(file)
+    _tables[read_table, path] = cached
+    while len(_tables) > TABLES_SIZE:
+        _tables.popitem(last=False)
+    return cached[1]
+
+
+class StreamReader(RawIOBase):
+    """ Sequential reader of a compressed file.
+
+        Wrapped in a :py:class:`io.BufferedReader` by :py:func:`open_output`,
+        for files which are not block-compressed. Seeking forward decompresses
+        and discards data. Seeking backward decompresses the file again from
+        its start.
+    """
+
+    def __init__(self, path, open_stream):
+        """ Opens a file given a decompressing stream factory.
+
+            :param str path: Path to the compressed file.
+            :param open_stream:
+                Callable returning a new decompressing stream over the file.
+        """
+        super(StreamReader, self).__init__()
+        self.name = path
+        """ Path to the compressed file. """
+        self._open_stream = open_stream
+        self._stream = open_stream()
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def _skip(self, offset=None):
+        """ Reads forward up to an offset, or to the end if None. """
+        while offset is None or self._position < offset:
+            size = BLOCKSIZE if offset is None else min(offset - self._position, BLOCKSIZE)
+            data = self._stream.read(size)
+            if len(data) == 0:
+                break
+            self._position += len(data)
+        return self._position
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self._skip()
+        if offset < self._position:
+            self._stream.close()
+            self._stream, self._position = self._open_stream(), 0
+        return self._skip(max(0, offset))
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        data = self._stream.read(len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        self._stream.close()
+        super(StreamReader, self).close()
+
+
+class BlockReader(RawIOBase):
+    """ Random access into a file compressed as independent blocks.
+
+        Wrapped in a :py:class:`io.BufferedReader` by :py:func:`open_output`.
+        Only the blocks being read are decompressed. The last block read is
+        kept in memory.
+    """
+
+    def __init__(self, path, blocks, decompress):
+        """ Opens a file given its table of blocks.
+
+            :param str path: Path to the compressed file.
+            :param blocks:
+                list of (compressed offset, compressed size, size) tuples.
+            :param decompress:
+                Callable decompressing the bytes of one block.
+        """
+        from bisect import bisect_right
+        super(BlockReader, self).__init__()
+        self.name = path
+        """ Path to the compressed file. """
+        self._file = open(path, 'rb')
+        self._blocks = blocks
+        self._decompress = decompress
+        self._starts, total = [], 0
+        for offset, csize, size in blocks:
+            self._starts.append(total)
+            total += size
+        self.size = total
+        """ Size of the uncompressed data. """
+        self._position = 0
+        self._cached = None, None
+        self._bisect = bisect_right
+
+    def _block(self, i):
+        """ Uncompressed data of the i-th block. """
+        if self._cached[0] != i:
+            offset, csize, size = self._blocks[i]
+            self._file.seek(offset)
+            self._cached = i, self._decompress(self._file.read(csize))
+        return self._cached[1]
+
+    def pread(self, start, end):
+        """ Uncompressed bytes between two offsets. """
+        start, end = max(0, start), min(end, self.size)
+        result = []
+        while start < end:
+            i = self._bisect(self._starts, start) - 1
+            data = self._block(i)
+            begin = start - self._starts[i]
+            chunk = data[begin:begin + end - start]
+            if len(chunk) == 0:
+                break
+            result.append(chunk)
+            start += len(chunk)
+        return b''.join(result)
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def writable(self):
+        return False
+
+    def seek(self, offset, whence=0):
+        if whence == 1:
+            offset += self._position
+        elif whence == 2:
+            offset += self.size
+        self._position = max(0, offset)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        data = self.pread(self._position, self._position + len(buffer))
+        buffer[:len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+    def close(self):
+        self._file.close()
+        self._cached = None, None
+        super(BlockReader, self).close()
+
+
+class BlockView(object):
+    """ Read-only bytes-like view of a block-compressed file.
+
+        Supports the few operations used to search files backwards: length,
+        slicing and :py:meth:`rfind`.
+    """
+
+    def __init__(self, reader):
+        super(BlockView, self).__init__()
+        self.reader = reader
+        """ :py:class:`BlockReader` instance. """
+
+    def __len__(self):
+        return self.reader.size
+
+    def __getitem__(self, index):
+        from ..error import TypeError
+        if not isinstance(index, slice) or index.step not in (None, 1):
+            raise TypeError("Only contiguous slices are supported.")
+        start, stop, step = index.indices(len(self))
+        return self.reader.pread(start, stop)
+
+    def rfind(self, sub, start=0, end=None):
+        """ Last offset of a substring, searching backwards one block at a time. """
+        if end is None:
+            end = len(self)
+        step = max(BGZF_BLOCKSIZE, 2 * len(sub))
+        stop = end
+        while stop > start:
+            begin = max(start, stop - step)
+            found = self.reader.pread(begin, min(end, stop + len(sub) - 1)).rfind(sub)
+            if found != -1:
+                return begin + found
+            stop = begin
+        return -1
+
+
+def _lzma_file(path):
+    """ LZMA file object with a name. """
+    from lzma import LZMAFile
+
+    class NamedLZMAFile(LZMAFile):
+        name = path
+    return NamedLZMAFile(path, 'rb')
+
+
+def _open_binary(path):
+    """ Opens a possibly compressed file in binary mode. """
+    from io import BufferedReader
+    if path.endswith('.gz'):
+        from gzip import GzipFile
+        from zlib import decompress
+        blocks = _block_table(path, _bgzf_blocks)
+        if blocks is None:
+            return GzipFile(path, 'rb')
+        return BufferedReader(BlockReader(path, blocks, lambda u: decompress(u, 31)),
+                              BGZF_BLOCKSIZE)
+    if path.endswith('.xz'):
+        return _lzma_file(path)
+    if path.endswith('.zst'):
+        zstandard = _zstandard()
+        frames = _block_table(path, _zstd_frames)
+        if frames is None:
+            def open_stream():
+                return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'),
+                                                                  closefd=True)
+            return BufferedReader(StreamReader(path, open_stream), ZSTD_FRAMESIZE)
+        decompressor = zstandard.ZstdDecompressor()
+        return BufferedReader(BlockReader(path, frames, decompressor.decompress),
+                              ZSTD_FRAMESIZE)
+    return open(path, 'rb')
+
+
+def open_output(path, mode='r'):
+    """ Opens an output file for reading, whether compressed or not.
+
+        :param str path:
+            Path to the uncompressed file. If it does not exist, the same path
+            with one of the :py:data:`SUFFIXES` is opened instead.
+        :param str mode:
+            'r' or 'rb'.
+        :raise IOError: if neither the file nor a compressed version exist.
+    """
+    from io import TextIOWrapper
+    from ..error import IOError
+    actual = find_output(path)
+    if actual is None:
+        raise IOError("Path {0} does not exist.\n".format(path))
+    if actual == path and not path.endswith(SUFFIXES):
+        return open(path, mode)
+    result = _open_binary(actual)
+    return result if 'b' in mode else TextIOWrapper(result)
+
+
+def block_view(file):
+    """ Lazy bytes-like view of a block-compressed file, or None. """
+    reader = getattr(getattr(file, 'buffer', file), 'raw', None)
+    return BlockView(reader) if isinstance(reader, BlockReader) else None
+
+
+def _write_bgzf(source, destination, level):
+    """ Compresses a stream as blocked gzip. """
+    from struct import pack
+    from zlib import compressobj, crc32, DEFLATED
+    while True:
+        data = source.read(BGZF_BLOCKSIZE)
+        if len(data) == 0:
+            break
+        compressor = compressobj(level, DEFLATED, -15)
+        deflated = compressor.compress(data) + compressor.flush()
+        header = b'\x1f\x8b\x08\x04\x00\x00\x00\x00\x00\xff\x06\x00BC\x02\x00'
+        destination.write(header + pack('<H', len(deflated) + 25))
+        destination.write(deflated)
+        destination.write(pack('<II', crc32(data) & 0xffffffff, len(data)))
+    destination.write(_BGZF_EOF)
+
+
+def _write_zstd(source, destination, level):
+    """ Compresses a stream as seekable zstd. """
+    from struct import pack
+    zstandard = _zstandard()
+    compressor = zstandard.ZstdCompressor(level=level)
+    table = []
+    while True:
+        data = source.read(ZSTD_FRAMESIZE)
+        if len(data) == 0:
+            break
+        frame = compressor.compress(data)
+        destination.write(frame)
+        table.append(pack('<II', len(frame), len(data)))
+    footer = pack('<IBI', len(table), 0, _ZSTD_SEEKABLE)
+    entries = b''.join(table)
+    destination.write(pack('<II', _ZSTD_SKIPPABLE, len(entries) + len(footer)))
+    destination.write(entries + footer)
+
+
+def _write_xz(source, destination, level):
+    """ Compresses a stream as xz. """
+    from lzma import LZMACompressor
+    compressor = LZMACompressor(preset=level)
+    while True:
+        data = source.read(1 << 20)
+        if len(data) == 0:
+            break
+        destination.write(compressor.compress(data))
+    destination.write(compressor.flush())
+
+
+def compress(path, format='gz', level=None, remove=True):
+    """ Compresses an output file in a seekable format.
+
+        The compressed file is written next to the original, under a temporary
+        name, then moved in place. Its modification time is that of the
+        original.
+
+        :param str path: File to compress.
+        :param str format: 'gz', 'xz' or 'zst'.
+        :param int level:
+            Compression level. Defaults to 6 for gzip and xz, 3 for zstd.
+        :param bool remove: Whether to remove the original file.
+        :returns: Path to the compressed file.
+    """
+    from os import stat, utime, remove as remove_file, rename
+    from os.path import exists
+    from ..error import ValueError
+    writers = {'gz': (_write_bgzf, 6), 'xz': (_write_xz, 6), 'zst': (_write_zstd, 3)}
+    if format not in writers:
+        raise ValueError("Unknown compression format {0!r}.".format(format))
+    writer, default = writers[format]
+    result = path + '.' + format
+    temporary = result + '.part'
+    info = stat(path)
+    try:
+        with open(path, 'rb') as source, open(temporary, 'wb') as destination:
+            writer(source, destination, default if level is None else level)
+        utime(temporary, ns=(info.st_atime_ns, info.st_mtime_ns))
+        rename(temporary, result)
+    except:
+        if exists(temporary):
+            remove_file(temporary)
+        raise
+    if remove:
+        remove_file(path)
+    return result
+
+
+def compact(paths, format='gz', level=None, nworkers=None, remove=True):
+    """ Compresses files in parallel.
+
+        Files which are already compressed are skipped.
+
+        :param paths: Iterable over the files to compress.
+        :param int nworkers: Number of threads. Defaults to the number of CPUs.
+        :returns: list of (path, compressed path) tuples.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    paths = [u for u in paths if not u.endswith(SUFFIXES)]
+    if len(paths) == 0:
+        return []
+    with ThreadPoolExecutor(max_workers=nworkers) as executor:
+        results = executor.map(lambda u: compress(u, format, level, remove), paths)
+        return list(zip(paths, results))
@@ -0,0 +1,205 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Persistent cache of extracted properties.
+
+    Properties decorated with :py:func:`~pylada.tools.make_cached` are kept in
+    memory for the lifetime of the extraction object only. When
+    :py:data:`pylada.extraction_cache` is set to a path, they are also stored
+    in an SQLite database at that path, keyed by the output file they were
+    extracted from, the class and the name of the property. Each entry is
+    stamped with the modification time and size of the output file, and
+    discarded as soon as the file changes. Properties read from other files,
+    decorated with ``make_cached(persistent=False)``, are not stored.
+
+    The database is shared by all processes and threads. Its size is kept
+    under :py:data:`pylada.extraction_cache_size` bytes by evicting least
+    recently used entries.
+
+    Extraction objects take part by defining a ``_persistent_key`` method
+    returning the path of their output file and a stamp, as is done by the
+    :py:func:`~pylada.tools.extract.search_factory` mixins. The stamp may
+    cover other files as well: VASP extraction objects add the CONTCAR, from
+    which the structure and its derived properties are read. Failures to read
+    or write the cache never prevent extraction.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['ExtractionCache', 'cached_call', 'file_stamp']
+
+_connections = None
+""" Per-thread open caches. """
+
+EVICTION_PERIOD = 64
+""" Number of insertions between checks of the size of the cache. """
+
+ATIME_RESOLUTION = 3600
+""" Access times are updated at most this often, in seconds. """
+
+
+def file_stamp(path):
+    """ Returns (realpath, stamp), where the stamp changes with the file. """
+    from os import stat
+    from os.path import realpath
+    path = realpath(path)
+    st = stat(path)
+    return path, '{0!r}:{1}'.format(st.st_mtime, st.st_size)
+
+
+class ExtractionCache(object):
+    """ SQLite store of pickled properties. """
+
+    def __init__(self, path, maxsize=None, timeout=60):
+        """ Opens or creates the store.
+
+            :param str path: Path to the SQLite database.
+            :param int maxsize:
+              Maximum size of stored values, in bytes. If None, the cache
+              is not limited.
+            :param timeout:
+              How long to wait for other processes to release the database.
+        """
+        import sqlite3
+        from os.path import expanduser, expandvars
+        super(ExtractionCache, self).__init__()
+        self.path = expandvars(expanduser(path))
+        """ Path to the database. """
+        self.maxsize = maxsize
+        """ Maximum size of stored values, in bytes. """
+        self.connection = sqlite3.connect(self.path, timeout=timeout)
+        """ Connection to the database. """
+        self._inserts = 0
+        with self.connection:
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS properties ("
+                "  path TEXT, name TEXT, stamp TEXT, value BLOB,"
+                "  size INTEGER, atime REAL, PRIMARY KEY (path, name))")
+            self.connection.execute(
+                "CREATE INDEX IF NOT EXISTS properties_atime ON properties (atime)")
+
+    def get(self, path, name, stamp):
+        """ Returns (True, value) if present and up to date, (False, None) otherwise. """
+        from pickle import loads
+        from time import time
+        row = self.connection.execute(
+            "SELECT stamp, value, atime FROM properties WHERE path=? AND name=?",
+            (path, name)).fetchone()
+        if row is None or row[0] != stamp:
+            return False, None
+        now = time()
+        if now - row[2] > ATIME_RESOLUTION:
+            with self.connection:
+                self.connection.execute(
+                    "UPDATE properties SET atime=? WHERE path=? AND name=?", (now, path, name))
+        return True, loads(row[1])
+
+    def set(self, path, name, stamp, value):
+        """ Stores a value, replacing older versions. """
+        from pickle import dumps, HIGHEST_PROTOCOL
+        from time import time
+        import sqlite3
+        value = dumps(value, HIGHEST_PROTOCOL)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO properties VALUES (?, ?, ?, ?, ?, ?)",
+                (path, name, stamp, sqlite3.Binary(value), len(value), time()))
+        self._inserts += 1
+        if self._inserts % EVICTION_PERIOD == 1:
+            self.evict()
+
+    def evict(self):
+        """ Removes least recently used entries until the cache fits in maxsize. """
+        if self.maxsize is None:
+            return
+        with self.connection:
+            total = self.connection.execute(
+                "SELECT COALESCE(SUM(size), 0) FROM properties").fetchone()[0]
+            if total <= self.maxsize:
+                return
+            rows = []
+            for rowid, size in self.connection.execute(
+                    "SELECT rowid, size FROM properties ORDER BY atime"):
+                if total <= self.maxsize:
+                    break
+                rows.append((rowid,))
+                total -= size
+            self.connection.executemany("DELETE FROM properties WHERE rowid=?", rows)
+
+    def remove(self, path):
+        """ Removes all properties extracted from a given file. """
+        with self.connection:
+            self.connection.execute("DELETE FROM properties WHERE path=?", (path,))
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM properties").fetchone()[0]
+
+    def close(self):
+        self.connection.close()
+
+
+def extraction_cache():
+    """ Cache at :py:data:`pylada.extraction_cache`, or None if disabled.
+
+        Caches are opened once per thread and process.
+    """
+    from os import getpid
+    from threading import local
+    import pylada
+    global _connections
+    path = getattr(pylada, 'extraction_cache', None)
+    if path is None:
+        return None
+    if _connections is None:
+        _connections = local()
+    caches = getattr(_connections, 'caches', None)
+    if caches is None or _connections.pid != getpid():
+        caches = _connections.caches = {}
+        _connections.pid = getpid()
+    maxsize = getattr(pylada, 'extraction_cache_size', None)
+    if path not in caches:
+        caches[path] = ExtractionCache(path, maxsize)
+    caches[path].maxsize = maxsize
+    return caches[path]
+
+
+def cached_call(method, args, kwargs):
+    """ Calls a method, going through the persistent cache if enabled. """
+    from .. import logger
+    if len(args) != 1 or len(kwargs) or not hasattr(args[0], '_persistent_key'):
+        return method(*args, **kwargs)
+    try:
+        cache = extraction_cache()
+        if cache is not None:
+            path, stamp = args[0]._persistent_key()
+            name = '{0.__module__}.{0.__name__}.{1}'.format(args[0].__class__, method.__name__)
+            found, value = cache.get(path, name, stamp)
+            if found:
+                return value
+    except Exception as e:
+        logger.debug('tools/diskcache: could not read cache: %s' % e)
+        cache = None
+    result = method(*args, **kwargs)
+    if cache is not None:
+        try:
+            cache.set(path, name, stamp, result)
+        except Exception as e:
+            logger.debug('tools/diskcache: could not write cache: %s' % e)
+    return result
@@ -119,6 +119,89 @@ class AbstractExtractBase(six.with_metaclass(ABCMeta, object)):
         return "{0}(\"{1}\")".format(self.__class__.__name__, self._directory.unexpanded)
 
 
+BLOCKSIZE = 1 << 16
+""" Size of the blocks read when searching files backwards. """
+
+
+def map_file(file, lazy=False):
+    """ Memory-map of a file opened for reading, or its whole content.
+
+        Text files are mapped through their underlying binary buffer. Files
+        which cannot be mapped, e.g. empty or compressed files, are read in
+        full.
+
+        :param bool lazy:
+            If True, block-compressed files are returned as a
+            :py:class:`~pylada.tools.compressed.BlockView`, which decompresses
+            only the blocks being accessed.
+    """
+    from io import FileIO
+    from mmap import mmap, ACCESS_READ
+    from .compressed import block_view
+    file = getattr(file, 'buffer', file)
+    if lazy:
+        view = block_view(file)
+        if view is not None:
+            return view
+    if isinstance(getattr(file, 'raw', file), FileIO):
+        try:
+            return mmap(file.fileno(), 0, access=ACCESS_READ)
+        except Exception:
+            pass
+    file.seek(0)
+    return file.read()
+
+
+def _reverse_lines(data, blocksize=None):
+    """ Yields lines of a mapped file, from last to first.
+
+        Lines are decoded as latin-1 and keep their end-of-line character.
+    """
+    if blocksize is None:
+        blocksize = BLOCKSIZE
+    end, carry = len(data), ''
+    while end > 0:
+        start = max(0, end - blocksize)
+        pieces = (data[start:end].decode('latin-1') + carry).split('\n')
+        lines = [u + '\n' for u in pieces[:-1]]
+        if len(pieces[-1]):
+            lines.append(pieces[-1])
+        # first line may continue in the previous block.
+        carry = lines.pop(0) if start > 0 and len(lines) else ''
+        for line in lines[::-1]:
+            yield line
+        end = start
+    if len(carry):
+        yield carry
+
+
+def _rsearch_window(regex, data, blocksize=None):
+    """ Yields regex matches from last to first, over a growing window.
+
+        The window starts at a line boundary near the end of the data, and is
+        doubled until it reaches the start of the file. Matches touching the
+        start of the window could be truncated, and are only accepted once the
+        window has grown past them.
+    """
+    if blocksize is None:
+        blocksize = BLOCKSIZE
+    size, window, last = len(data), blocksize, len(data) + 1
+    while True:
+        start = max(0, size - window)
+        if start > 0:
+            start = data.rfind(b'\n', 0, start) + 1
+        text = data[start:].decode('latin-1')
+        found = [u for u in regex.finditer(text)
+                 if (start == 0 or u.start() > 0) and start + u.start() < last]
+        for match in found[::-1]:
+            yield match
+        if len(found):
+            last = start + found[0].start()
+        if start == 0:
+            break
+        window *= 2
+
+
 def search_factory(name, methname, module, filename=None):
     """ Factory to create Mixing classes capable of search a given file. """
     if filename is None:
@@ -131,16 +214,16 @@ def search_factory(name, methname, module, filename=None):
     """.format(filename, methname.upper())
 
     def __outcar__(self):
-        """ Returns path to OUTCAR file.
+        """ Returns OUTCAR file opened for reading.
+
+            Compressed files, e.g. OUTCAR.gz, are opened if the OUTCAR itself
+            does not exist.
 
             :raise IOError: if the OUTCAR file does not exist. 
         """
-        from os.path import exists, join
-        from ..error import IOError
-        path = join(self.directory, getattr(self, methname.upper()))
-        if not exists(path):
-            raise IOError("Path {0} does not exist.\n".format(path))
-        return open(path, 'r')
+        from os.path import join
+        from .compressed import open_output
+        return open_output(join(self.directory, getattr(self, methname.upper())))
     __outcar__.__name__ = '__{0}__'.format(methname.lower())
 
     def _search_OUTCAR(self, regex, flags=0):
@@ -167,20 +250,30 @@ def search_factory(name, methname, module, filename=None):
     _find_first_OUTCAR.__name__ = '_find_first_{0}'.format(methname.upper())
 
     def _rsearch_OUTCAR(self, regex, flags=0):
-        """ Looks for all matches starting from the end. """
+        """ Looks for all matches starting from the end.
+
+            The file is read backwards in blocks, so that finding the last
+            match only reads the end of the file. In multiline mode, the
+            window searched from the end of the file is doubled until it holds
+            a match.
+        """
         from re import compile, M as moultline
 
-        regex = compile(regex)
+        regex = compile(regex, flags)
         with getattr(self, __outcar__.__name__)() as file:
-            lines = file.read() if moultline & flags else file.readlines()
-        if moultline & flags:
-            for v in [u for u in regex.finditer(lines)][::-1]:
-                yield v
-        else:
-            for line in lines[::-1]:
-                found = regex.search(line)
-                if found is not None:
-                    yield found
+            data = map_file(file, lazy=True)
+            try:
+                if moultline & flags:
+                    for found in _rsearch_window(regex, data):
+                        yield found
+                else:
+                    for line in _reverse_lines(data):
+                        found = regex.search(line)
+                        if found is not None:
+                            yield found
+            finally:
+                if hasattr(data, 'close'):
+                    data.close()
     _rsearch_OUTCAR.__name__ = '_rsearch_{0}'.format(methname.upper())
 
     def _find_last_OUTCAR(self, regex, flags=0):
@@ -190,7 +283,16 @@ def search_factory(name, methname, module, filename=None):
         return None
     _find_last_OUTCAR.__name__ = '_find_last_{0}'.format(methname.upper())
 
+    def _persistent_key(self):
+        """ Path and stamp of the file, used as key in persistent caches. """
+        from os.path import join
+        from .diskcache import file_stamp
+        from .compressed import find_output
+        path = join(self.directory, getattr(self, methname.upper()))
+        return file_stamp(find_output(path) or path)
+
     attrs = {__outcar__.__name__: __outcar__,
+             '_persistent_key': _persistent_key,
              _search_OUTCAR.__name__: _search_OUTCAR,
              _rsearch_OUTCAR.__name__: _rsearch_OUTCAR,
              _find_first_OUTCAR.__name__: _find_first_OUTCAR,
@@ -20,8 +20,61 @@
 #  <http://www.gnu.org/licenses/>.
 ###############################
 
+from weakref import WeakKeyDictionary
 from .keywords import BaseKeyword
 
+_output_orders = WeakKeyDictionary()
+""" Rendering order of the keywords, per block class and set of keywords. """
+
+
+def _dependency_order(values):
+    """ Orders keys such that dependencies are rendered first.
+
+        A key is rendered after the keys named in the ``depends`` attribute of
+        its value, and after any key whose value declares that it
+        ``modifies`` one of these names or the key itself. Otherwise, the
+        input order is kept. Circular dependencies are broken by taking the
+        first remaining key in input order.
+    """
+    from heapq import heapify, heappush, heappop
+    keys = list(values)
+    index = dict((key, i) for i, key in enumerate(keys))
+    modifiers = {}
+    for key, value in values.items():
+        for name in getattr(value, 'modifies', ()):
+            modifiers.setdefault(name, set()).add(key)
+
+    before = dict((key, set()) for key in keys)
+    for key, value in values.items():
+        for name in (getattr(value, 'depends', None) or ()):
+            if name in index:
+                before[key].add(name)
+            before[key] |= modifiers.get(name, set())
+        before[key] |= modifiers.get(key, set())
+        before[key].discard(key)
+
+    after = dict((key, set()) for key in keys)
+    for key, names in before.items():
+        for name in names:
+            after[name].add(key)
+    ready = [index[key] for key in keys if len(before[key]) == 0]
+    heapify(ready)
+    result, remaining = [], set(keys)
+    while len(remaining):
+        if len(ready) == 0:
+            # circular dependencies: falls back to the input order.
+            ready = [min(index[key] for key in remaining)]
+        key = keys[heappop(ready)]
+        if key not in remaining:
+            continue
+        remaining.discard(key)
+        result.append(key)
+        for other in after[key]:
+            before[other].discard(key)
+            if len(before[other]) == 0 and other in remaining:
+                heappush(ready, index[other])
+    return tuple(result)
+
 
 class AttrBlock(BaseKeyword):
     """ Defines block input to CRYSTAL. 
@@ -202,6 +255,7 @@ class AttrBlock(BaseKeyword):
 
     def __getstate__(self):
         d = self.__dict__.copy()
+        d.pop('_output_cache', None)
         crysinput = d.pop('_input')
         return d, crysinput
 
@@ -210,18 +264,67 @@ class AttrBlock(BaseKeyword):
         self.__dict__.update(value[0])
 
     def output_map(self, **kwargs):
-        """ Map of keyword, value """
+        """ Map of keyword, value
+
+            Keywords are rendered once each, in the order given by their
+            dependencies (see :py:attr:`BaseKeyword.depends`), so that a keyword
+            sees the values other keywords may set while rendering. The map
+            itself follows the input order.
+        """
         from .tree import Tree
 
         root = Tree()
         result = root if getattr(self, 'keyword', None) is None \
             else root.descend(self.keyword)
-        for key, value in self._input.items():
-            self._output_map(result, key, value, **kwargs)
+        order, outputs, tokens = self._output_order(), {}, {}
+        for key in order:
+            outputs[key] = self._render(key, self._input[key], tokens, **kwargs)
+        for key in self._input:
+            result.update(outputs.get(key, None))
         if len(result) == 0:
             return None
         return root
 
+    def _output_order(self):
+        """ Order in which the keywords are rendered.
+
+            The order is computed once per class and set of keywords.
+        """
+        signature = tuple((key, type(value)) for key, value in self._input.items())
+        orders = _output_orders.setdefault(self.__class__, {})
+        if signature not in orders:
+            orders[signature] = _dependency_order(self._input)
+        return orders[signature]
+
+    def _render(self, key, value, tokens, **kwargs):
+        """ Output tree of a single keyword.
+
+            The output of keywords which declare their dependencies is cached
+            until either the keyword or its dependencies change.
+            ``tokens`` holds the representation of the dependencies,
+            computed at most once per call to :py:meth:`output_map`.
+        """
+        from .tree import Tree
+        depends = getattr(value, 'depends', None)
+        token = None
+        if depends is not None:
+            for name in depends:
+                if name not in tokens:
+                    tokens[name] = repr(kwargs[name] if name in kwargs
+                                        else getattr(self, name, None))
+            token = (repr(value),) + tuple(tokens[name] for name in depends)
+            cached = self.__dict__.get('_output_cache', {}).get(key, None)
+            if cached is not None and cached[0] == token:
+                return cached[1]
+
+        tree = Tree()
+        self._output_map(tree, key, value, **kwargs)
+        for name in getattr(value, 'modifies', ()):
+            tokens.pop(name, None)
+        if token is not None:
+            self.__dict__.setdefault('_output_cache', {})[key] = token, tree
+        return tree
+
     @staticmethod
     def _output_map(_tree, _key, _value, **kwargs):
         """ Modifies output tree for given keyword/value. """
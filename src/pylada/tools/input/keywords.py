@@ -42,6 +42,22 @@ class BaseKeyword(object):
           pairs. The groups are dealt with by
           :py:class:`~pylada.tools.block.AttrBlock`.
     """
+    depends = None
+    """ Names read by :py:meth:`output_map`.
+
+        Each name refers either to an argument of :py:meth:`output_map`, e.g.
+        ``structure``, or to another attribute of the enclosing block. If a
+        tuple, then :py:meth:`output_map` is a pure function of the keyword
+        itself and of these names: the enclosing block renders the keyword
+        after the ones it depends upon, and caches its output until any of
+        them changes. If None, the output is never cached.
+    """
+    modifies = ()
+    """ Names modified by :py:meth:`output_map`.
+
+        The enclosing block renders the keywords depending on these names
+        after this one.
+    """
 
     def __init__(self, keyword=None, raw=None):
         """ Creates a block. 
@@ -20,7 +20,11 @@
 #  <http://www.gnu.org/licenses/>.
 ###############################
 
-""" Module to decorate properties with json transcripters. """
+""" Module to decorate properties with json transcripters.
+
+    It also describes whole objects, e.g. functionals, in JSON. See
+    :py:func:`dumps_state`.
+"""
 
 
 def section(name):
@@ -104,3 +108,238 @@ def pickled(function):
     function.to_json = to_json
     function.from_json = from_json
     return function
+
+
+STATE_FORMAT = 1
+""" Version of the format written by :py:func:`dumps_state`. """
+TAG = '__pylada__'
+""" Key marking JSON objects which describe python objects. """
+UNIT_MODULES = ('quantities', 'pylada.physics')
+""" Modules where units are looked for. """
+ALLOWED_MODULES = ('pylada', 'numpy', 'quantities', 'collections')
+""" Packages from which classes and functions may be referenced.
+
+    Only types are referenced from :py:mod:`builtins`. References to anything
+    else are refused, both when describing and when reading objects back.
+"""
+
+
+def _reference(object):
+    """ Importable name of a class or function.
+
+        :raise ValueError: if the object cannot be imported back from its name.
+    """
+    from ..error import ValueError
+    module = getattr(object, '__module__', None)
+    name = getattr(object, '__qualname__', getattr(object, '__name__', None))
+    if module is None or name is None or '<' in name or module == '__main__':
+        raise ValueError('Cannot reference {0!r}.'.format(object))
+    try:
+        resolved = _resolve('{0}:{1}'.format(module, name))
+    except (ImportError, AttributeError, ValueError):
+        resolved = None
+    if resolved is not object:
+        raise ValueError('Cannot reference {0!r}.'.format(object))
+    return '{0}:{1}'.format(module, name)
+
+
+def _unit_reference(unit):
+    """ Importable name of a unit, from :py:data:`UNIT_MODULES`.
+
+        Units are not parsed from strings, since that goes through ``eval``.
+    """
+    from ..error import ValueError
+    for module in UNIT_MODULES:
+        for name in (unit.symbol, unit.name):
+            reference = '{0}:{1}'.format(module, name)
+            try:
+                if _resolve(reference) is unit:
+                    return reference
+            except (ImportError, AttributeError, ValueError):
+                continue
+    raise ValueError('Cannot reference unit {0!r}.'.format(unit))
+
+
+_references = {}
+""" Objects resolved from their names. """
+
+
+def _resolve(reference):
+    """ Imports a class or function from its name.
+
+        :raise ValueError: if the name is not from :py:data:`ALLOWED_MODULES`,
+            or is a :py:mod:`builtins` other than a type.
+    """
+    module, name = reference.split(':')
+    if module != 'builtins' \
+            and not any(module == u or module.startswith(u + '.') for u in ALLOWED_MODULES):
+        from ..error import ValueError
+        raise ValueError('References to {0!r} are not allowed.'.format(reference))
+    try:
+        return _references[reference]
+    except KeyError:
+        pass
+    from importlib import import_module
+    from ..error import ValueError
+    result = import_module(module)
+    for attr in name.split('.'):
+        result = getattr(result, attr)
+    if module == 'builtins' and not isinstance(result, type):
+        raise ValueError('References to {0!r} are not allowed.'.format(reference))
+    _references[reference] = result
+    return result
+
+
+def _resolve_class(reference, base=object):
+    """ Imports a class from its name, checking that it derives from base. """
+    from ..error import ValueError
+    result = _resolve(reference)
+    if not isinstance(result, type) or not issubclass(result, base):
+        raise ValueError('{0!r} is not a {1.__name__} class.'.format(reference, base))
+    return result
+
+
+def _encode(object):
+    """ Transforms an object into JSON-compatible data. """
+    from types import FunctionType, BuiltinFunctionType
+    from numpy import ndarray, generic
+    from quantities import Quantity
+    from ..error import ValueError
+    from .extract import AbstractExtractBase
+    if object is None or isinstance(object, (bool, int, float, str)):
+        return object
+    if isinstance(object, list):
+        return [_encode(u) for u in object]
+    if isinstance(object, dict):
+        if type(object) is dict and TAG not in object \
+                and all(isinstance(k, str) for k in object):
+            return {k: _encode(v) for k, v in object.items()}
+        result = {TAG: 'dict', 'items': [[_encode(k), _encode(v)] for k, v in object.items()]}
+        if type(object) is not dict:
+            result['ref'] = _reference(type(object))
+        return result
+    if isinstance(object, tuple):
+        return {TAG: 'tuple', 'items': [_encode(u) for u in object]}
+    if isinstance(object, (set, frozenset)):
+        return {TAG: type(object).__name__, 'items': [_encode(u) for u in object]}
+    if isinstance(object, Quantity):
+        return {TAG: 'quantity', 'value': object.magnitude.tolist(),
+                'dtype': str(object.dtype),
+                'units': [[_unit_reference(u), p] for u, p in object.dimensionality.items()]}
+    if isinstance(object, (ndarray, generic)):
+        return {TAG: 'array', 'value': object.tolist(), 'dtype': str(object.dtype)}
+    if isinstance(object, (type, FunctionType, BuiltinFunctionType)):
+        return {TAG: 'ref', 'ref': _reference(object)}
+    if isinstance(object, AbstractExtractBase):
+        # describes a copy, so that the directory hook of the object is left untouched.
+        state = object.__copy__().__getstate__()
+        state.pop('_properties_cache', None)
+        return {TAG: 'object', 'ref': _reference(type(object)), 'state': _encode(state)}
+    if not hasattr(object, '__dict__') or hasattr(type(object), '__slots__'):
+        raise ValueError('Cannot describe {0!r}.'.format(type(object)))
+    getstate = getattr(type(object), '__getstate__', None)
+    state = object.__dict__ if getstate is None else getstate(object)
+    return {TAG: 'object', 'ref': _reference(type(object)), 'state': _encode(state)}
+
+
+def _decode(data):
+    """ Recreates tagged objects, called for each JSON object from the inside out. """
+    kind = data.get(TAG, None)
+    if kind is None:
+        return data
+    if kind == 'object':
+        cls = _resolve_class(data['ref'])
+        result = cls.__new__(cls)
+        if hasattr(cls, '__setstate__'):
+            result.__setstate__(data['state'])
+        else:
+            result.__dict__.update(data['state'])
+        return result
+    if kind == 'ref':
+        return _resolve(data['ref'])
+    if kind == 'tuple':
+        return tuple(data['items'])
+    if kind == 'dict':
+        items = ((k if not isinstance(k, list) else tuple(k), v) for k, v in data['items'])
+        return _resolve_class(data['ref'], dict)(items) if 'ref' in data else dict(items)
+    if kind == 'array':
+        from numpy import array
+        return array(data['value'], dtype=data['dtype'])[()]
+    if kind == 'quantity':
+        from numpy import array
+        result = array(data['value'], dtype=data['dtype'])
+        for reference, power in data['units']:
+            result = result * _resolve(reference)**power
+        return result
+    if kind == 'set':
+        return set(data['items'])
+    if kind == 'frozenset':
+        return frozenset(data['items'])
+    from ..error import ValueError
+    raise ValueError('Unknown kind of object {0!r}.'.format(kind))
+
+
+def dumps_state(object):
+    """ Describes an object as a JSON string.
+
+        Objects are described by a reference to their class and by their state,
+        as given to pickles by ``__getstate__`` or ``__dict__``. Results cached
+        by extraction objects are not described. Unlike unpickling or
+        executing a representation, reading the result back never runs any
+        code other than the ``__setstate__`` of the classes involved.
+
+        :raise ValueError: if an object cannot be described, e.g. a lambda.
+    """
+    from json import dumps
+    return dumps({'format': STATE_FORMAT, 'state': _encode(object)}, separators=(',', ':'))
+
+
+def loads_state(string):
+    """ Recreates an object from the result of :py:func:`dumps_state`. """
+    from json import loads
+    from ..error import ValueError
+    data = loads(string, object_hook=_decode)
+    if not isinstance(data, dict) or data.get('format', None) != STATE_FORMAT:
+        raise ValueError('Unknown format of object description.')
+    return data['state']
+
+
+def dump_state(object, path):
+    """ Writes the description of an object to a file.
+
+        The description is written to a temporary file first, and then renamed.
+
+        :raise ValueError: if the object cannot be described.
+    """
+    from os import replace
+    string = dumps_state(object)
+    with open(path + '.tmp', 'w') as file:
+        file.write(string)
+    replace(path + '.tmp', path)
+
+
+_loaded = {}
+""" Descriptions read by :py:func:`load_state`, with the stamps of their files. """
+LOADED_SIZE = 4096
+""" Maximum number of descriptions held by :py:data:`_loaded`. """
+
+
+def load_state(path):
+    """ Reads an object written by :py:func:`dump_state`.
+
+        The description is cached until the file changes. A new object is
+        recreated from it on each call, so that callers may modify the result.
+    """
+    from os import stat
+    from os.path import abspath
+    path = abspath(path)
+    info = stat(path)
+    stamp = info.st_mtime_ns, info.st_size
+    if path in _loaded and _loaded[path][0] == stamp:
+        return loads_state(_loaded[path][1])
+    with open(path) as file:
+        string = file.read()
+    if len(_loaded) >= LOADED_SIZE:
+        _loaded.pop(next(iter(_loaded)))
+    _loaded[path] = stamp, string
+    return loads_state(string)
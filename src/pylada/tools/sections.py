@@ -0,0 +1,201 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Section indices of program output files.
+
+    Most extraction properties only need a few lines of an output file: the
+    last structure, the last block of forces, the last total energy... Rather
+    than reading the whole file again for each of them, the file is scanned
+    once for the lines which start each section of interest. The byte offsets
+    of these lines are kept in a :py:class:`SectionIndex`, and properties only
+    read the lines they need. The last occurence of a section is found from
+    the index, without searching the file backwards.
+
+    Indices are cached per file and rebuilt whenever the size or the
+    modification time of the file changes.
+"""
+__docformat__ = 'restructuredtext en'
+__all__ = ['SectionIndex', 'section_index']
+
+CACHE_SIZE = 64
+""" Number of indices kept in memory. """
+
+_cache = None
+""" Maps index class and file path to ((modification time, size), index). """
+
+SCAN_SIZE = 1 << 20
+""" Size of the pieces in which block-compressed files are scanned. """
+
+SCAN_OVERLAP = 1 << 12
+""" Bytes read past each piece, so that sections spanning pieces are matched. """
+
+
+def _regex(sections):
+    """ Single regex matching the first line of any section. """
+    from re import compile, M
+    groups = b'|'.join(b'(?P<' + name.encode('ascii') + b'>' + pattern + b')'
+                       for name, pattern in sections)
+    return compile(b'^[ \\t]*(?:' + groups + b')', M)
+
+
+def _finditer(regex, data):
+    """ Yields the section name and offset of each match.
+
+        Block-compressed files are scanned one piece at a time, so that only
+        one piece is decompressed in memory. Pieces end on a line boundary.
+    """
+    from .compressed import BlockView
+    if not isinstance(data, BlockView):
+        for found in regex.finditer(data):
+            yield found.lastgroup, found.start()
+        return
+    start, size, aligned = 0, len(data), True
+    while start < size:
+        piece = data[start:start + SCAN_SIZE + SCAN_OVERLAP]
+        if start + len(piece) >= size:
+            end = len(piece)
+        else:
+            end = piece.rfind(b'\n', 0, SCAN_SIZE) + 1
+        for found in regex.finditer(piece):
+            if found.start() >= max(end, 1):
+                break
+            # a piece starting mid-line does not start a section.
+            if aligned or found.start() > 0:
+                yield found.lastgroup, start + found.start()
+        aligned = end > 0
+        start += end if aligned else SCAN_SIZE
+
+
+class SectionIndex(object):
+    """ Offsets of the sections of an output file.
+
+        Derived classes define the sections they index in :py:attr:`SECTIONS`.
+    """
+
+    SECTIONS = ()
+    """ Name and pattern of the first line of each indexed section.
+
+        Patterns are matched at the start of a line, after leading blanks.
+    """
+    regex = None
+    """ Compiled regex matching the first line of each section. """
+
+    def __init__(self, file):
+        """ Scans a file once for all sections.
+
+            :param file:
+              File opened for reading. Text files are read through their
+              underlying binary buffer.
+        """
+        from .extract import map_file
+        super(SectionIndex, self).__init__()
+        cls = self.__class__
+        if cls.__dict__.get('regex', None) is None:
+            cls.regex = _regex(cls.SECTIONS)
+        self.sections = {name: [] for name, _ in self.SECTIONS}
+        """ Maps section names to the offsets of their first line. """
+        data = map_file(file, lazy=True)
+        try:
+            self.size = len(data)
+            """ Size of the file when indexed. """
+            for name, offset in _finditer(self.regex, data):
+                self.sections[name].append(offset)
+        finally:
+            if hasattr(data, 'close'):
+                data.close()
+
+    def __getitem__(self, name):
+        """ Offsets of all occurences of a section. """
+        return self.sections[name]
+
+    def first(self, name):
+        """ Offset of the first occurence of a section, or None. """
+        offsets = self.sections[name]
+        return offsets[0] if len(offsets) else None
+
+    def last(self, name, before=None):
+        """ Offset of the last occurence of a section, or None.
+
+            :param int before:
+              If given, only occurences starting before this offset are
+              considered.
+        """
+        from bisect import bisect_left
+        offsets = self.sections[name]
+        n = len(offsets) if before is None else bisect_left(offsets, before)
+        return offsets[n - 1] if n > 0 else None
+
+    def next(self, name, after):
+        """ Offset of the first occurence of a section after an offset, or None. """
+        from bisect import bisect_right
+        offsets = self.sections[name]
+        n = bisect_right(offsets, after)
+        return offsets[n] if n < len(offsets) else None
+
+    @staticmethod
+    def lines(file, offset):
+        """ Yields lines of a file, starting at the given byte offset. """
+        file = getattr(file, 'buffer', file)
+        file.seek(offset)
+        for line in file:
+            yield line.decode('utf-8', 'replace')
+
+    @staticmethod
+    def text(file, start, end=None):
+        """ Text of a file between two byte offsets.
+
+            If ``end`` is None, reads to the end of the file.
+        """
+        file = getattr(file, 'buffer', file)
+        file.seek(start)
+        data = file.read() if end is None else file.read(end - start)
+        return data.decode('utf-8', 'replace')
+
+
+def section_index(cls, file):
+    """ Index of an open file, cached until the file changes.
+
+        :param cls:
+          :py:class:`SectionIndex` derived class with which to index the file.
+        :param file:
+          File opened for reading. The index is cached if the file has a
+          ``name`` attribute referring to an existing path.
+    """
+    from collections import OrderedDict
+    from os import stat
+    from os.path import realpath
+    global _cache
+    if _cache is None:
+        _cache = OrderedDict()
+    try:
+        path = realpath(file.name)
+        st = stat(path)
+    except (AttributeError, TypeError, OSError):
+        return cls(file)
+    key = st.st_mtime, st.st_size
+    cached = _cache.pop((cls, path), None)
+    if cached is None or cached[0] != key:
+        cached = key, cls(file)
+    _cache[cls, path] = cached
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    return cached[1]
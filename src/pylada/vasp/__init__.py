@@ -38,13 +38,13 @@
     compiled.
 """
 __docformat__ = "restructuredtext en"
-__all__ = ['Vasp', 'Extract', 'Specie', 'MassExtract', 'relax', 'emass', 'read_input', 'exec_input']
+__all__ = ['Vasp', 'Extract', 'Specie', 'MassExtract', 'relax', 'emass', 'warmstart', 'read_input', 'exec_input']
 from pylada import logger
 logger.getChild("vasp")
 from .extract import Extract, MassExtract
 from .specie import Specie
 from .functional import Vasp
-from . import relax, emass
+from . import relax, emass, warmstart
 
 
 def read_input(filepath="input.py", namespace=None):
@@ -99,36 +99,79 @@ class Extract(ExtractDFT):
         return sorted(result)
 
     @property
+    @make_cached
     def breakpoints(self):
         """ Indices for start of each path. """
         from numpy import any, abs, cross
+        kpoints = self.kpoints
         breakpoints, last_dir = [0], None
-        for i, k in enumerate(self.kpoints[1:]):
+        for i, k in enumerate(kpoints[1:]):
             if last_dir is None:
-                last_dir = k - self.kpoints[breakpoints[-1]]
-            elif any(abs(cross(last_dir, k - self.kpoints[breakpoints[-1]])) > 1e-8):
+                last_dir = k - kpoints[breakpoints[-1]]
+            elif any(abs(cross(last_dir, k - kpoints[breakpoints[-1]])) > 1e-8):
                 breakpoints.append(i + 1)
                 last_dir = None
-        return breakpoints + [len(self.kpoints)]
+        return breakpoints + [len(kpoints)]
 
     @property
+    @make_cached
     def directions(self):
         """ Direction for each path. """
         from numpy import array
         from numpy.linalg import norm
         from quantities import angstrom
-        results = []
-        breakpoints = self.breakpoints
-        for start, end in zip(breakpoints[:-1], breakpoints[1:]):
-            results.append(self.kpoints[end - 1] - self.kpoints[start])
-            results[-1] /= norm(results[-1])
+        breakpoints = array(self.breakpoints)
+        results = self.kpoints[breakpoints[1:] - 1] - self.kpoints[breakpoints[:-1]]
+        results = results / norm(results, axis=1)[:, None]
         return array(results) / angstrom
 
+    def _fits(self, orders):
+        """ Taylor coefficients of all bands, for each direction.
+
+            Paths with the same number of k-points are fitted together, with a
+            single batched least-square solve over all directions and bands.
+            Results are cached for each set of orders.
+
+            :returns: An array of shape (directions, orders, bands) if all
+                paths have the same length, and a list of (orders, bands)
+                arrays otherwise.
+        """
+        from numpy import array, dot, pi, arange, repeat, stack, sum, matmul
+        from numpy.linalg import inv, pinv
+        from math import factorial
+
+        cache = self.__dict__.setdefault('_properties_cache', {})
+        key = '_fits{0!r}'.format(tuple(orders))
+        if key in cache:
+            return cache[key]
+
+        breakpoints = array(self.breakpoints)
+        starts, lengths = breakpoints[:-1], breakpoints[1:] - breakpoints[:-1]
+        directions = self.directions.magnitude
+        recipcell = inv(self.structure.cell).T * 2e0 * pi / self.structure.scale
+        # projection of each k-point on the direction of its path.
+        path = repeat(arange(len(starts)), lengths)
+        kpoints = getattr(self.kpoints, 'magnitude', self.kpoints)
+        x = sum(directions[path] * dot(kpoints, recipcell.T), axis=1)
+        x = getattr(x, 'magnitude', x)
+        parameters = stack([x**i / factorial(i) for i in orders], axis=1)
+        measurements = self.eigenvalues.magnitude
+
+        results = [None] * len(starts)
+        for n in set(lengths):
+            paths = (lengths == n).nonzero()[0]
+            indices = starts[paths, None] + arange(n)
+            fits = matmul(pinv(parameters[indices]), measurements[indices])
+            for i, fit in zip(paths, fits):
+                results[i] = fit
+        if len(set(lengths)) == 1:
+            results = array(results)
+        cache[key] = results
+        return results
+
     def emass(self, orders=None):
         """ Computes effective mass for each direction. """
-        from numpy import dot, concatenate, pi, array
-        from numpy.linalg import inv, lstsq
-        from math import factorial
+        from numpy import array
         from quantities import angstrom, emass, h_bar
         from ..error import ValueError
 
@@ -136,20 +179,8 @@ class Extract(ExtractDFT):
         if 2 not in orders:
             raise ValueError('Cannot compute effective masses without second order term.')
 
-        results = []
-        breakpoints = self.breakpoints
-        recipcell = inv(self.structure.cell).T * 2e0 * pi / self.structure.scale
-        for start, end, direction in zip(breakpoints[:-1],
-                                         breakpoints[1:],
-                                         self.directions):
-            kpoints = self.kpoints[start:end]
-            x = dot(direction, dot(recipcell, kpoints.T))
-            measurements = self.eigenvalues[start:end].copy()
-            parameters = concatenate([x[:, None]**i / factorial(i) for i in orders], axis=1)
-            fit = lstsq(parameters, measurements)
-            results.append(fit[0][orders.index(2)])
-
-        result = (array(results) * self.eigenvalues.units * angstrom**2 / h_bar**2)
+        results = array([u[orders.index(2)] for u in self._fits(orders)])
+        result = (results * self.eigenvalues.units * angstrom**2 / h_bar**2)
         return 1. / result.rescale(1 / emass)
 
     def fit_directions(self, orders=None):
@@ -158,30 +189,16 @@ class Extract(ExtractDFT):
             When dealing with degenerate states, it is better to look at each
             computed direction separately, since the order of bands might depend on
             the direction (in which case it is difficult to construct a tensor).
+
+            The fits are copies: modifying them does not affect the cache.
         """
-        from numpy import dot, concatenate, pi
-        from numpy.linalg import inv, lstsq
-        from math import factorial
+        from numpy import array
         from ..error import ValueError
 
         orders = self._orders(orders)
         if 2 not in orders:
             raise ValueError('Cannot compute effective masses without second order term.')
-
-        results = []
-        breakpoints = self.breakpoints
-        recipcell = inv(self.structure.cell).T * 2e0 * pi / self.structure.scale
-        for start, end, direction in zip(breakpoints[:-1],
-                                         breakpoints[1:],
-                                         self.directions):
-            kpoints = self.kpoints[start:end]
-            x = dot(direction, dot(recipcell, kpoints.T))
-            measurements = self.eigenvalues[start:end].copy()
-            parameters = concatenate([x[:, None]**i / factorial(i) for i in orders], axis=1)
-            fit = lstsq(parameters, measurements)
-            results.append(fit[0])
-
-        return results
+        return [array(u) for u in self._fits(orders)]
 
     def files(self, **kwargs):
         """ Exports files from both calculations. """
@@ -351,10 +368,10 @@ def iter_emass(functional, structure=None, outdir=None, center=None,
         kpoints[6:18] *= 1e0 / sqrt(2.)
         kpoints[18:] *= 1e0 / sqrt(3.)
     else:
-        directions = array(directions).reshape(-1, 3)
-        directions = array([array(d) / norm(d) for d in directions])
+        directions = array(directions, dtype='float64').reshape(-1, 3)
+        directions /= norm(directions, axis=1)[:, None]
         points = arange(-0.5, 0.5 + 1e-8, 1.0 / float(nbpoints))
-        kpoints = array([d * p for d in directions for p in points])
+        kpoints = (directions[:, None, :] * points[None, :, None]).reshape(-1, 3)
 
     functional.kpoints = kpoints * range + center
 
@@ -102,32 +102,50 @@ class MassExtract(AbstractMassExtract):
         # this will throw on unknown kwargs arguments.
         super(MassExtract, self).__init__(path=path, **kwargs)
 
-    def __iter_alljobs__(self):
-        """ Goes through all directories with an OUTVAR. """
+    def __iter_jobdirs__(self):
+        """ Goes through all directories with an OUTCAR.
+
+            Extraction objects are only created when calling the factory, so
+            that dynamic rescans can skip unchanged directories.
+        """
         from os import walk
         from os.path import relpath, join
-        from . import Extract as VaspExtract
-        from ..relax import RelaxExtract
+        from ...tools.compressed import SUFFIXES
 
+        outcars = ['OUTCAR'] + ['OUTCAR' + u for u in SUFFIXES]
         for dirpath, dirnames, filenames in walk(self.rootpath, topdown=True, followlinks=True):
-            if 'OUTCAR' not in filenames:
+            if not any(u in filenames for u in outcars):
                 continue
-            if 'relax_cellshape' in dirnames or 'relax_ions' in dirnames:
+            relax = 'relax_cellshape' in dirnames or 'relax_ions' in dirnames
+            if relax:
                 dirnames[:] = [u for u in dirnames if u not in ['relax_cellshape', 'relax_ions']]
+            directory = join(self.rootpath, dirpath)
+            yield join('/', relpath(dirpath, self.rootpath)), directory, \
+                self._extract_factory(directory, relax)
+
+    @staticmethod
+    def _extract_factory(directory, relax):
+        """ Callable creating the extraction object of a directory, or None. """
+        def factory():
+            from . import Extract as VaspExtract
+            from ..relax import RelaxExtract
+            if relax:
                 try:
-                    result = RelaxExtract(join(self.rootpath, dirpath))
+                    return RelaxExtract(directory)
                 except:
-                    try:
-                        result = VaspExtract(join(self.rootpath, dirpath))
-                    except:
-                        continue
-            else:
-                try:
-                    result = VaspExtract(join(self.rootpath, dirpath))
-                except:
-                    continue
+                    pass
+            try:
+                return VaspExtract(directory)
+            except:
+                return None
+        return factory
 
-            yield join('/', relpath(dirpath, self.rootpath)), result
+    def __iter_alljobs__(self):
+        """ Goes through all directories with an OUTCAR. """
+        for name, directory, factory in self.__iter_jobdirs__():
+            result = factory()
+            if result is not None:
+                yield name, result
 
     def __copy__(self):
         """ Returns a shallow copy. """
@@ -138,5 +156,6 @@ class MassExtract(AbstractMassExtract):
     @property
     def _attributes(self):
         """ Returns __dir__ set special to the extraction itself. """
+        from ...jobfolder.extract import class_attributes
         from . import Extract as VaspExtract
-        return list(set([u for u in dir(VaspExtract) if u[0] != '_'] + ['details']))
+        return class_attributes(VaspExtract) | {'details'}
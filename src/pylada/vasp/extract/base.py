@@ -38,6 +38,37 @@ class ExtractBase(object):
         """ Initializes the extraction class. """
         super(ExtractBase, self).__init__()
 
+    @property
+    def _outcar_index(self):
+        """ Section index of the OUTCAR.
+
+            Built in a single pass over the file, and shared by all extraction
+            objects until the OUTCAR changes.
+
+            .. seealso:: :py:mod:`pylada.vasp.extract.outcar`
+        """
+        from .outcar import outcar_index
+        with self.__outcar__() as file:
+            return outcar_index(file)
+
+    def _search_sections(self, section, regex, reverse=False):
+        """ Yields matches of a regex on the first line of each indexed section. """
+        from re import compile
+        regex = compile(regex)
+        index = self._outcar_index
+        offsets = index[section][::-1] if reverse else index[section]
+        with self.__outcar__() as file:
+            for offset in offsets:
+                found = regex.search(next(index.lines(file, offset), ''))
+                if found is not None:
+                    yield found
+
+    def _find_last_section(self, section, regex):
+        """ Returns last match of a regex on the first line of a section. """
+        for last in self._search_sections(section, regex, True):
+            return last
+        return None
+
     @property
     @make_cached
     def ialgo(self):
@@ -82,26 +113,37 @@ class ExtractBase(object):
         return float(self._find_first_OUTCAR(r"ENCUT\s*=\s*(\S+)").group(1)) * eV
 
     @property
-    @make_cached
+    @make_cached(persistent=False)
     def functional(self):
         """ Returns vasp functional used for calculation.
 
 
             The vasp functional is the python object used to generate the OUTCAR
-            over which this extraction object acts. Pylada pastes a representation
-            of the functional at the end of the OUTCAR. This is what is extracted.
+            over which this extraction object acts. Pylada saves a description
+            of the functional next to the OUTCAR. This is what is extracted.
             Hence this attribute will work only on OUTCAR's generated by Pylada.
+
+            Descriptions are read without executing code, and may only refer
+            to classes from :py:data:`pylada.tools.json.ALLOWED_MODULES`.
+            Older calculations saved a python representation of the
+            functional instead, which is still executed.
         """
         import os
         from .. import Vasp
         from .. import exec_input
+        from ...tools.json import load_state
+        from .. import files
+
+        funPath = os.path.join(self.directory, files.FUNCTIONAL_STATE)
+        if os.path.exists(funPath):
+            return load_state(funPath)
 
         # nomodoutcar
         # regex = compile('#+ FUNCTIONAL #+\n((.|\n)*)\n#+ END FUNCTIONAL #+')
         #with self.__outcar__() as file: result = regex.search(file.read())
         # if result is None: return None
 
-        funPath = os.path.join(self.directory, 'pylada.FUNCTIONAL')
+        funPath = os.path.join(self.directory, files.FUNCTIONAL)
         with open(funPath) as fin:
             result = fin.read()
 
@@ -148,13 +190,12 @@ class ExtractBase(object):
             r'^\s*LOOP\+:\s+\w+\s+time\s+([.0-9]+):\s+\w+\s+time\s+([.0-9]+)\s*$')
         tlist = []
         with self.__outcar__() as file:
-            lines = file.readlines()
-        for line in lines:
-            mat = re.match(regex, line)
-            if mat != None:
-                cpuTime = float(mat.group(1))
-                realTime = float(mat.group(2))
-                tlist.append([cpuTime, realTime])
+            for line in file:
+                mat = re.match(regex, line)
+                if mat != None:
+                    cpuTime = float(mat.group(1))
+                    realTime = float(mat.group(2))
+                    tlist.append([cpuTime, realTime])
         return tlist
 
     @property
@@ -228,38 +269,40 @@ class ExtractBase(object):
     @make_cached
     def _grep_structure(self):
         """ Greps cell and positions from OUTCAR. """
-        from re import compile
         from ...crystal import Structure
         from numpy.linalg import inv
         from numpy import array
 
-        with self.__outcar__() as file:
-            lines = file.readlines()
-        atom_index, cell_index = None, None
-        atom_re = compile(r"""^\s*POSITION\s+""")
-        cell_re = compile(r"""^\s*direct\s+lattice\s+vectors\s+""")
-        for index, line in enumerate(lines[::-1]):
-            if atom_re.search(line) is not None:
-                atom_index = index - 1
-            if cell_re.search(line) is not None:
-                cell_index = index
-                break
-        if atom_index is None or cell_index is None:
+        index = self._outcar_index
+        cell_offset = index.last('lattice')
+        atom_offset = None if cell_offset is None else index.next('positions', cell_offset)
+        if atom_offset is None:
             raise GrepError("Could not find structure description in OUTCAR.")
+        with self.__outcar__() as file:
+            lines = index.lines(file, cell_offset)
+            next(lines)
+            cell = [next(lines) for i in range(3)]
+            lines = index.lines(file, atom_offset)
+            next(lines)
+            next(lines)
+            atoms = []
+            for line in lines:
+                if len(line.split()) != 6:
+                    break
+                atoms.append(line)
         result = Structure()
         try:
             for i in range(3):
-                result.cell[:, i] = array(lines[-cell_index + i].split()[:3], dtype="float64")
+                result.cell[:, i] = array(cell[i].split()[:3], dtype="float64")
         except:
             for i in range(3):
-                result.cell[i,:] = array(lines[-cell_index + i].split()[-3:], dtype="float64")
+                result.cell[i,:] = array(cell[i].split()[-3:], dtype="float64")
             result.cell = inv(result.cell)
         # Get list like ['S', 'S', 'S', 'S', 'S', 'S', 'Fe', 'Fe']
         species = [type for type, n in zip(self.species, self.stoichiometry) for i in range(n)]
-        while atom_index > 0 and len(lines[-atom_index].split()) == 6:
-            result.add_atom(pos=array(lines[-atom_index].split()[:3], dtype="float64"),
+        for line in atoms:
+            result.add_atom(pos=array(line.split()[:3], dtype="float64"),
                             type=species.pop(-1))
-            atom_index -= 1
 
         return result
 
@@ -442,7 +485,7 @@ class ExtractBase(object):
         return (result / self.volume).rescale(g / cm**3)
 
     @property
-    @make_cached
+    @make_cached(persistent=False)
     def _contcar_structure(self):
         """ Greps structure from CONTCAR. """
         from ...crystal import read
@@ -849,111 +892,109 @@ class ExtractBase(object):
             result = result[:-1]
         return result
 
-    def _unpolarized_values(self, which):
-        """ Returns spin-unpolarized eigenvalues and occupations. """
-        # which = 1: select eigenvalues
-        # which = 2: select occupations
-        from re import compile, finditer
-        import re
+    def _band_values(self, text, which):
+        """ Parses the eigenvalue blocks found in text.
 
-        with self.__outcar__() as file:
-            lines = file.readlines()
-        # Finds last first kpoint.
-        spin_comp1_re = compile(r"\s*k-point\s+1\s*:\s*(\S+)\s+(\S+)\s+(\S+)\s*")
-        found = None
-        for i, line in enumerate(lines[::-1]):
-            found = spin_comp1_re.match(line)
-            if found is not None:
-                break
-        if found is None:
-            raise GrepError("Could not extract eigenvalues/occupation from OUTCAR.")
+            Each k-point block looks like::
 
-        # Here i is the distance from file end of the last line like:
-        #  k-point   1 :       0.0000    0.0000    0.0000
+               k-point     1 :       0.0000    0.0000    0.0000
+               band No.  band energies     occupation
+                   1      -5.3915      2.00000
+                   2       1.7486      2.00000
+                 ...
+
+            Blocks are located with a regex on their header only. Their bodies
+            extend to the next empty line, and are converted to floats in a
+            single call to numpy.
 
-        # now greps actual results.
+            If that fails, eg because some fields overflowed, the bodies are
+            parsed line by line instead, converting only the requested column.
+
+            :param str text: Part of the OUTCAR holding the blocks.
+            :param int which: Column to return.
+            :returns: A (kpoint, band) numpy array, or a list of lists if
+              the k-points do not all have the same number of bands.
+        """
+        from re import compile, M
+        from numpy import array
         if self.is_dft:
-            kp_re = r"\s*k-point\s+(?:(?:\d|\*)+)\s*:\s*(?:\S+)\s*(?:\S+)\s*(?:\S+)\n"\
-                    r"\s*band\s+No\.\s+band\s+energies\s+occupation\s*\n"\
-                    r"(\s*(?:\d+)\s+(?:\S+)\s+(?:\S+)\s*\n)+"
-            skip, cols = 2, 3
+            header = compile(r"^[ \t]*k-point[ \t]+[\d*]+[ \t]*:.*\n"
+                             r"[ \t]*band[ \t]+No\.[ \t]+band[ \t]+energies"
+                             r"[ \t]+occupation[ \t]*\n", M)
+            cols = 3
         else:
-            kp_re = r"\s*k-point\s+(?:(?:\d|\*)+)\s*:\s*(?:\S+)\s*(?:\S+)\s*(?:\S+)\n"\
-                    r"\s*band\s+No\.\s+.*\n\n"\
-                    r"(\s*(?:\d+)\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)"\
-                    r"\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)\s*\n)+"
-            skip, cols = 3, 8
-        results = []
-        for kp in finditer(kp_re, "".join(lines[-i - 1:]), re.M):
-            # Each iteration is a k-point.
-            # dummy is a list of sublists, one sublist per OUTCAR line, like:
-            #   [['1', '-30.5498', '2.00000'],
-            #    ['2', '-30.5497', '2.00000'],
-            #    ['3', '-30.3889', '2.00000'],
-            #    ['4', '-30.3889', '2.00000'],
-            #    ['5', '-30.3857', '2.00000'],
-            #    ...
-            #    ['28', '7.5661', '0.00000'],
-            #    [], []]
-            # We only process those elements having len == cols (here, 3).
-            # We append the "which" column value to results.
-
-            dummy = [u.split() for u in kp.group(0).split('\n')[skip:]]
-            results.append([float(u[which]) for u in dummy if len(u) == cols])
-
-        # results is a list of sublists, one sublist per k-point,
-        # containing the band energies:
-        #  [[-30.5498, -30.5497, -30.3889, -30.3889, ...],
-        #   [-30.5371, -30.5371, -30.4543, -30.4542, ...],
-        #   ...
-        #   [-30.6596, -30.6596, -30.4905, -30.4905, ...],
-        #   [-30.6604, -30.6603, -30.4906, -30.4906, ...]]
-        return results
+            header = compile(r"^[ \t]*k-point[ \t]+[\d*]+[ \t]*:.*\n"
+                             r"[ \t]*band[ \t]+No\..*\n[ \t]*\n", M)
+            cols = 8
+        blank = compile(r"\n[ \t]*(?:\n|$)")
+        bodies = []
+        for found in header.finditer(text):
+            end = blank.search(text, found.end() - 1)
+            body = text[found.end():len(text) if end is None else end.start()]
+            bodies.append(body.rstrip())
+        if len(bodies) == 0:
+            return array([], dtype="float64")
+        try:
+            values = array(" ".join(bodies).split(), dtype="float64")
+        except ValueError:
+            # overflowing fields, e.g. '*****', or fields running into each other.
+            values = None
+        nbands = bodies[0].count('\n') + 1
+        if values is not None and values.size == len(bodies) * nbands * cols \
+                and all(u.count('\n') + 1 == nbands for u in bodies):
+            return values.reshape(len(bodies), nbands, cols)[:, :, which]
+        # blocks are not all alike or some fields are not numbers: convert line
+        # by line, only keeping lines with the right number of columns.
+        result = []
+        for body in bodies:
+            rows = [u.split() for u in body.split('\n')]
+            result.append([float(u[which]) for u in rows if len(u) == cols])
+        if any(len(u) != len(result[0]) for u in result):
+            return result
+        return array(result, dtype="float64")
 
-    def _spin_polarized_values(self, which):
-        """ Returns spin-polarized eigenvalues and occupations. """
-        from re import compile, finditer
-        import re
+    def _unpolarized_values(self, which):
+        """ Returns spin-unpolarized eigenvalues and occupations.
 
+            :param int which:
+              1 for eigenvalues, 2 for occupations. Other columns are available
+              for GW calculations.
+            :returns: A (kpoint, band) numpy array.
+        """
+        # Finds last first kpoint, e.g. the last line like:
+        #  k-point   1 :       0.0000    0.0000    0.0000
+        index = self._outcar_index
+        start = index.last('kpoint1')
+        if start is None:
+            raise GrepError("Could not extract eigenvalues/occupation from OUTCAR.")
         with self.__outcar__() as file:
-            lines = file.readlines()
+            text = index.text(file, start)
+        return self._band_values(text, which)
+
+    def _spin_polarized_values(self, which):
+        """ Returns spin-polarized eigenvalues and occupations.
+
+            :returns: A (spin, kpoint, band) numpy array, or a list with one
+              item per spin if the spin components do not have the same shape.
+        """
+        from numpy import array
+
         # Finds last spin components.
-        spin_comp1_re = compile(r"""\s*spin\s+component\s+(1|2)\s*$""")
-        spins = [None, None]
-        for i, line in enumerate(lines[::-1]):
-            found = spin_comp1_re.match(line)
-            if found is None:
-                continue
-            if found.group(1) == '1':
-                if spins[1] is None:
-                    raise GrepError("Could not find two spin components in OUTCAR.")
-                spins[0] = i
-                break
-            else:
-                spins[1] = i
+        index = self._outcar_index
+        spins = [index.last('spin1'), index.last('spin2')]
+        if spins[0] is not None and (spins[1] is None or spins[0] > spins[1]):
+            raise GrepError("Could not find two spin components in OUTCAR.")
+        if spins[1] is not None:
+            spins[0] = index.last('spin1', before=spins[1])
         if spins[0] is None or spins[1] is None:
             raise GrepError("Could not extract eigenvalues/occupation from OUTCAR.")
-
-        # now greps actual results.
-        if self.is_dft:
-            kp_re = r"\s*k-point\s+(?:(?:\d|\*)+)\s*:\s*(?:\S+)\s*(?:\S+)\s*(?:\S+)\n"\
-                    r"\s*band\s+No\.\s+band\s+energies\s+occupation\s*\n"\
-                    r"(\s*(?:\d+)\s+(?:\S+)\s+(?:\S+)\s*\n)+"
-            skip, cols = 2, 3
-        else:
-            kp_re = r"\s*k-point\s+(?:(?:\d|\*)+)\s*:\s*(?:\S+)\s*(?:\S+)\s*(?:\S+)\n"\
-                    r"\s*band\s+No\.\s+.*\n\n"\
-                    r"(\s*(?:\d+)\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)"\
-                    r"\s+(?:\S+)\s+(?:\S+)\s+(?:\S+)\s*\n)+"
-            skip, cols = 3, 8
-        results = [[], []]
-        for kp in finditer(kp_re, "".join(lines[-spins[0]:-spins[1]]), re.M):
-            dummy = [u.split() for u in kp.group(0).split('\n')[skip:]]
-            results[0].append([float(u[which]) for u in dummy if len(u) == cols])
-        for kp in finditer(kp_re, "".join(lines[-spins[1]:]), re.M):
-            dummy = [u.split() for u in kp.group(0).split('\n')[skip:]]
-            results[1].append([u[which] for u in dummy if len(u) == cols])
-        return results
+        with self.__outcar__() as file:
+            texts = index.text(file, spins[0], spins[1]), index.text(file, spins[1])
+        results = [self._band_values(text, which) for text in texts]
+        if any(isinstance(u, list) for u in results) \
+                or results[0].shape != results[1].shape:
+            return results
+        return array(results, dtype="float64")
 
     @property
     @make_cached
@@ -1117,9 +1158,10 @@ class ExtractBase(object):
             :param bool contcar: Include CONTCAR file
             :param bool procar: Include PROCAR file
         """
-        from os.path import exists, join
+        from os.path import join
         from glob import iglob
         from itertools import chain
+        from ...tools.compressed import find_output
         files = [self.OUTCAR]
         if kwargs.get('stdout', False):
             files.append('stdout')
@@ -1140,8 +1182,8 @@ class ExtractBase(object):
         if kwargs.get('procar', False):
             files.append('PROCAR')
         for file in files:
-            file = join(self.directory, file)
-            if exists(file):
+            file = find_output(join(self.directory, file))
+            if file is not None:
                 yield file
         # Add RelaxCellShape directories.
         for dir in chain(iglob(join(self.directory, "relax_cellshape/[0-9]/")),
@@ -1308,7 +1350,7 @@ class ExtractBase(object):
         from quantities import eV
         regex = r"""energy\s+without\s+entropy=\s*(\S+)\s+energy\(sigma->0\)\s+=\s+(\S+)"""
         try:
-            result = [float(u.group(1)) for u in self._search_OUTCAR(regex)]
+            result = [float(u.group(1)) for u in self._search_sections('energy', regex)]
         except TypeError:
             raise GrepError("Could not find energies in OUTCAR")
         if len(result) == 0:
@@ -1323,7 +1365,7 @@ class ExtractBase(object):
             raise AttributeError('not a DFT calculation.')
         from quantities import eV
         regex = r"""energy\s+without\s+entropy=\s*(\S+)\s+energy\(sigma->0\)\s+=\s+(\S+)"""
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('energy', regex)
         if result is None:
             raise GrepError("Could not find energy in OUTCAR")
         return float(result.group(1)) * eV
@@ -1339,7 +1381,7 @@ class ExtractBase(object):
             raise AttributeError('not a DFT calculation.')
         from quantities import eV
         regex = r"""E-fermi\s*:\s*(\S+)"""
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('fermi', regex)
         if result is None:
             raise GrepError("Could not find fermi energy in OUTCAR")
         return float(result.group(1)) * eV
@@ -1365,7 +1407,7 @@ class ExtractBase(object):
         from quantities import kbar as kB
         regex = r"""external\s+pressure\s*=\s*(\S+)\s*kB\s+Pullay\s+stress\s*=\s*(\S+)\s*kB"""
         try:
-            result = [float(u.group(1)) for u in self._search_OUTCAR(regex)]
+            result = [float(u.group(1)) for u in self._search_sections('pressure', regex)]
         except TypeError:
             raise GrepError("Could not find pressures in OUTCAR")
         if len(result) == 0:
@@ -1380,7 +1422,7 @@ class ExtractBase(object):
             raise AttributeError('not a DFT calculation.')
         from quantities import kbar as kB
         regex = r"""external\s+pressure\s*=\s*(\S+)\s*kB\s+Pullay\s+stress\s*=\s*(\S+)\s*kB"""
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('pressure', regex)
         if result is None:
             raise GrepError("Could not find pressure in OUTCAR")
         return float(result.group(1)) * kB
@@ -1392,7 +1434,7 @@ class ExtractBase(object):
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
         regex = r"""^\s*E-fermi\s*:\s*(\S+)\s+XC\(G=0\)\s*:\s*(\S+)\s+alpha\+bet\s*:(\S+)\s*$"""
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('fermi', regex)
         if result is None:
             raise GrepError("Could not find alpha+bet in OUTCAR")
         return float(result.group(3))
@@ -1404,7 +1446,7 @@ class ExtractBase(object):
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
         regex = r"""^\s*E-fermi\s*:\s*(\S+)\s+XC\(G=0\)\s*:\s*(\S+)\s+alpha\+bet\s*:(\S+)\s*$"""
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('fermi', regex)
         if result is None:
             raise GrepError("Could not find xc(G=0) in OUTCAR")
         return float(result.group(2))
@@ -1418,7 +1460,7 @@ class ExtractBase(object):
         from quantities import kbar as kB
         regex = r"external\s+pressure\s*=\s*(\S+)\s*kB\s+"                        \
                 r"Pullay\s+stress\s*=\s*(\S+)\s*kB"
-        result = self._find_last_OUTCAR(regex)
+        result = self._find_last_section('pressure', regex)
         if result is None:
             raise GrepError("Could not find pulay pressure in OUTCAR")
         return float(result.group(2)) * kB
@@ -1429,12 +1471,11 @@ class ExtractBase(object):
         """ Greps recommended or actual fft setting from OUTCAR. """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
-        from re import search, M as re_M
         from numpy import array
-        regex = r"(?!I would recommend the setting:\s*\n)"                         \
-            r"\s*dimension x,y,z NGX =\s+(\d+)\s+NGY =\s+(\d+)\s+NGZ =\s+(\d+)"
-        with self.__outcar__() as file:
-            result = search(regex, file.read(), re_M)
+        regex = r"\s*dimension x,y,z NGX =\s+(\d+)\s+NGY =\s+(\d+)\s+NGZ =\s+(\d+)"
+        result = None
+        for result in self._search_sections('fft', regex):
+            break
         if result is None:
             raise GrepError("Could not FFT grid in OUTCAR.""")
         return array([int(result.group(1)),
@@ -1447,17 +1488,23 @@ class ExtractBase(object):
         """ Greps recommended or actual fft setting from OUTCAR. """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
-        from re import search, M as re_M
+        from re import search
         from numpy import array
-        regex = r"I would recommend the setting:\s*\n"                             \
-            r"\s*dimension x,y,z NGX =\s+(\d+)\s+NGY =\s+(\d+)\s+NGZ =\s+(\d+)"
-        with self.__outcar__() as file:
-            result = search(regex, file.read(), re_M)
+        regex = r"\s*dimension x,y,z NGX =\s+(\d+)\s+NGY =\s+(\d+)\s+NGZ =\s+(\d+)"
+        index = self._outcar_index
+        result = None
+        for start in index['recommend']:
+            with self.__outcar__() as file:
+                lines = index.lines(file, start)
+                next(lines)
+                result = search(regex, next(lines, ''))
+            if result is not None:
+                break
         if result is None:
             raise GrepError("Could not recommended FFT grid in OUTCAR.""")
         return array([int(result.group(1)), int(result.group(2)), int(result.group(3))])
 
-    def _partial_charges_impl(self, grep):
+    def _partial_charges_impl(self, section):
         """ Greps partial charges from OUTCAR.
 
             This is a numpy array where the first dimension is the ion (eg one row
@@ -1485,25 +1532,32 @@ class ExtractBase(object):
               2       -0.005  -0.006   0.000  -0.011
             ------------------------------------------------
             tot       -0.022  -0.014  -1.935  -1.970
+
+            :param str section:
+              Name of the :py:mod:`OUTCAR section <pylada.vasp.extract.outcar>`
+              holding the table, e.g. 'charge' or 'magnetization'.
         """
         import re
         from numpy import array
 
         result = []
-        with self.__outcar__() as file:
-            lines = file.readlines()
-        found = re.compile(grep)
-        for index in range(1, len(lines) + 1):
-            if found.search(lines[-index]) is not None:
-                break
-        if index == len(lines):
+        index = self._outcar_index
+        start = index.last(section)
+        if start is None:
             return None
-        index -= 4
         line_re = re.compile(r"""^\s*\d+((\s+\S+)+)\s*$""")
-        for i in range(0, index):
-            match = line_re.match(lines[-index + i])
-            if match is None:
-                break
+        with self.__outcar__() as file:
+            lines = index.lines(file, start)
+            # skips title, empty line, header and separator.
+            for i in range(4):
+                next(lines, None)
+            matches = []
+            for line in lines:
+                match = line_re.match(line)
+                if match is None:
+                    break
+                matches.append(match)
+        for match in matches:
             stgs = match.group(1).split()
             stgs = stgs[:-1]     # omit the last column, "tot"
             vals = [float(stg) for stg in stgs]
@@ -1521,7 +1575,7 @@ class ExtractBase(object):
         """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
-        return self._partial_charges_impl(r"""\s*total\s+charge\s*$""")
+        return self._partial_charges_impl('charge')
 
     @property
     @make_cached
@@ -1534,7 +1588,7 @@ class ExtractBase(object):
         """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
-        return self._partial_charges_impl(r"""^\s*magnetization\s*\(x\)\s*$""")
+        return self._partial_charges_impl('magnetization')
 
     @property
     @make_cached
@@ -1607,26 +1661,26 @@ class ExtractBase(object):
         """ Greps average atomic electrostatic potentials from OUTCAR. """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
-        from re import compile, X as reX
+        from re import compile
         from numpy import array
         from quantities import eV
 
-        with self.__outcar__() as file:
-            lines = file.readlines()
-        regex = compile(r"average\s+\(electrostatic\)\s+potential\s+at\s+core",
-                        reX)
-        for i, line in enumerate(lines[::-1]):
-            if regex.search(line) is not None:
-                break
-        if -i + 2 >= len(lines):
+        index = self._outcar_index
+        start = index.last('electropot')
+        if start is None:
             raise GrepError("Could not find average atomic potential in file.")
         regex = compile(r"""(?:\s|\d){8}\s*(-?\d+\.\d+)""")
         result = []
-        for line in lines[-i + 2:]:
-            data = line.split()
-            if len(data) == 0:
-                break
-            result.extend([m.group(1) for m in regex.finditer(line)])
+        with self.__outcar__() as file:
+            lines = index.lines(file, start)
+            # skips title and test-charge header.
+            for i in range(3):
+                next(lines, None)
+            for line in lines:
+                data = line.split()
+                if len(data) == 0:
+                    break
+                result.extend([m.group(1) for m in regex.finditer(line)])
 
         return array(result, dtype="float64") * eV
 
@@ -1691,15 +1745,22 @@ class ExtractBase(object):
         from numpy import zeros, abs, array
         from numpy.linalg import det
         from quantities import eV, J, kbar
-        from re import finditer, M
+        from re import compile
         if self.isif < 1:
             return None
         pattern                                                                    \
-            = r"""\s*Total\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*\n"""    \
-            r"""\s*in kB\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*\n"""
+            = compile(r"""\s*Total\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*\n"""
+                      r"""\s*in kB\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s+(\S+)\s*\n""")
+        index = self._outcar_index
         result = []
         with self.__outcar__() as file:
-            for regex in finditer(pattern, file.read(), M):
+            blocks = []
+            for start in index['stress']:
+                lines = index.lines(file, start)
+                regex = pattern.match(next(lines, '') + next(lines, ''))
+                if regex is not None:
+                    blocks.append(regex)
+            for regex in blocks:
                 stress = zeros((3, 3), dtype="float64"), zeros((3, 3), dtype="float64")
                 for i in range(2):
                     for j in range(3):
@@ -1728,22 +1789,42 @@ class ExtractBase(object):
     @property
     @make_cached
     def forces(self):
-        """ Forces on each atom. """
+        """ Forces on each atom.
+
+            Taken from the last complete table of forces, e.g. one closed by a
+            separator and the total drift. The table of a step still being
+            written, or cut short by a killed calculation, is skipped.
+        """
         if not self.is_dft:
             raise AttributeError('not a DFT calculation.')
         from numpy import array
         from quantities import angstrom, eV
-        from re import finditer, M
-        pattern = r""" *POSITION\s*TOTAL-FORCE\s*\(eV\/Angst\)\s*\n"""              \
-                  r"""\s*-+\s*\n"""                                                 \
-                  r"""(?:\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s+\S+\s*\n)+"""             \
-                  r"""\s*-+\s*\n"""                                                 \
-                  r"""\s*total drift"""
+        index = self._outcar_index
         with self.__outcar__() as file:
-            for regex in finditer(pattern, file.read(), M):
-                pass
-        return array([u.split()[3:] for u in regex.group(0).split('\n')[2:-2]],
-                     dtype="float64") * eV / angstrom
+            for start in index['positions'][::-1]:
+                result = self._force_table(index.lines(file, start))
+                if result is not None:
+                    return array(result, dtype="float64") * eV / angstrom
+        raise GrepError("Could not find forces in OUTCAR.")
+
+    @staticmethod
+    def _force_table(lines):
+        """ Forces of a table starting at its title, or None if incomplete. """
+        # skips title and separator.
+        next(lines, None)
+        next(lines, None)
+        result = []
+        for line in lines:
+            data = line.split()
+            if len(data) != 6:
+                break
+            result.append(data[3:])
+        else:
+            return None
+        if len(data) != 1 or data[0].strip('-') != '' \
+                or not next(lines, '').lstrip().startswith('total drift'):
+            return None
+        return result
 
     @property
     @make_cached
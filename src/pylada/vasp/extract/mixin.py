@@ -57,15 +57,31 @@ class IOMixin(OutcarSearchMixin):
         OutcarSearchMixin.__init__(self)
 
     def __contcar__(self):
-        """ Returns path to FUNCCAR file.
+        """ Returns CONTCAR file opened for reading.
 
-            :raise IOError: if the FUNCCAR file does not exist. 
+            Compressed files, e.g. CONTCAR.gz, are opened if the CONTCAR itself
+            does not exist.
+
+            :raise IOError: if the CONTCAR file does not exist. 
+        """
+        from os.path import join
+        from ...tools.compressed import open_output
+        return open_output(join(self.directory, self.CONTCAR))
+
+    def _persistent_key(self):
+        """ Path and stamp of the OUTCAR, used as key in persistent caches.
+
+            The stamp also covers the CONTCAR, if any, since the structure
+            and the properties derived from it are read from there.
         """
-        from os.path import exists, join
-        path = join(self.directory, self.CONTCAR)
-        if not exists(path):
-            raise IOError("Path {0} does not exist.\n".format(path))
-        return open(path, 'r')
+        from os.path import join
+        from ...tools.diskcache import file_stamp
+        from ...tools.compressed import find_output
+        path, stamp = OutcarSearchMixin._persistent_key(self)
+        contcar = find_output(join(self.directory, self.CONTCAR))
+        if contcar is not None:
+            stamp += ':' + file_stamp(contcar)[1]
+        return path, stamp
 
     @property
     def is_running(self):
@@ -0,0 +1,76 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Section index of OUTCAR files.
+
+    Most extraction properties only need a few lines of the OUTCAR: the last
+    structure, the last block of eigenvalues, the last charge table... Rather
+    than reading the whole file again for each of them, the OUTCAR is scanned
+    once for the lines which start each section of interest. The byte offsets
+    of these lines are kept in an :py:class:`OutcarIndex`, and properties only
+    read the lines they need.
+
+    Indices are cached per file and rebuilt whenever the size or the
+    modification time of the file changes.
+
+    .. seealso:: :py:mod:`pylada.tools.sections`
+"""
+__docformat__ = 'restructuredtext en'
+__all__ = ['OutcarIndex', 'outcar_index', 'SECTIONS']
+from ...tools.sections import SectionIndex
+
+SECTIONS = (
+    ('lattice', br'direct[ \t]+lattice[ \t]+vectors'),
+    ('positions', br'POSITION[ \t]+TOTAL-FORCE'),
+    ('kpoint1', br'k-point[ \t]+1[ \t]*:'),
+    ('spin1', br'spin[ \t]+component[ \t]+1[ \t]*$'),
+    ('spin2', br'spin[ \t]+component[ \t]+2[ \t]*$'),
+    ('charge', br'total[ \t]+charge[ \t]*$'),
+    ('magnetization', br'magnetization[ \t]*\(x\)[ \t]*$'),
+    ('electropot', br'average[ \t]+\(electrostatic\)[ \t]+potential[ \t]+at[ \t]+core'),
+    ('stress', br'Total(?:[ \t]+\S+){6}[ \t]*\n[ \t]*in kB'),
+    ('fft', br'dimension[ \t]+x,y,z[ \t]+NGX[ \t]*='),
+    ('recommend', br'I[ \t]+would[ \t]+recommend[ \t]+the[ \t]+setting:'),
+    ('energy', br'energy[ \t]+without[ \t]+entropy='),
+    ('pressure', br'external[ \t]+pressure[ \t]*='),
+    ('fermi', br'E-fermi[ \t]*:'),
+)
+""" Name and pattern of the first line of each indexed section.
+
+    Patterns are matched at the start of a line, after leading blanks.
+"""
+
+
+class OutcarIndex(SectionIndex):
+    """ Offsets of the sections of an OUTCAR file. """
+    SECTIONS = SECTIONS
+
+
+def outcar_index(file):
+    """ Index of an open OUTCAR, cached until the file changes.
+
+        :param file:
+          OUTCAR opened for reading. The index is cached if the file has a
+          ``name`` attribute referring to an existing path.
+    """
+    from ...tools.sections import section_index
+    return section_index(OutcarIndex, file)
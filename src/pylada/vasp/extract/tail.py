@@ -0,0 +1,237 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Incremental reader of growing OUTCAR files.
+
+    While VASP runs, the OUTCAR grows by one ionic step at a time. An
+    :py:class:`OutcarTail` remembers the byte offset of the end of the last
+    ionic step it parsed, and only reads bytes appended since. Energies,
+    forces and stresses of the ionic steps accumulate in append-only
+    histories, so that polling many running calculations costs as much as
+    the output they wrote since the last poll.
+"""
+__docformat__ = 'restructuredtext en'
+__all__ = ['OutcarTail', 'outcar_tail']
+
+HEAD_SIZE = 4096
+""" Number of bytes at the start of the file used to detect restarts. """
+CACHE_SIZE = 1024
+""" Number of tailers kept by :py:func:`outcar_tail`. """
+
+_cache = None
+""" Maps file paths to tailers. """
+
+
+class OutcarTail(object):
+    """ Follows a growing OUTCAR, one ionic step at a time.
+
+        An ionic step is complete once the table of forces following its
+        energy and stress has been written. Incomplete steps at the end of the
+        file are read again on the next :py:meth:`update`.
+    """
+
+    def __init__(self, path):
+        """ Creates a tailer for an OUTCAR.
+
+            Nothing is read until :py:meth:`update` is called.
+        """
+        from ...misc import RelativePath
+        super(OutcarTail, self).__init__()
+        self.path = RelativePath(path).path
+        """ Path to the OUTCAR. """
+        self.offset = 0
+        """ Byte offset of the end of the last complete ionic step. """
+        self._inode = None
+        self._head = None
+        self._energies = []
+        self._forces = []
+        self._stresses = []
+
+    def update(self):
+        """ Parses ionic steps appended since the last update.
+
+            If the file was truncated or replaced, e.g. by a restart, the
+            histories are cleared and the file is read from the start. A
+            restart writing to the same file is detected from a checksum of
+            its first bytes, even if the file has since grown past the last
+            offset.
+
+            :returns: Number of new ionic steps.
+        """
+        from os import stat
+        from zlib import crc32
+        try:
+            info = stat(self.path)
+        except OSError:
+            return 0
+        if info.st_ino != self._inode or info.st_size < self.offset:
+            self.reset()
+            self._inode = info.st_ino
+        with open(self.path, 'rb') as file:
+            if self._head is not None:
+                length, checksum = self._head
+                if crc32(file.read(length)) != checksum:
+                    self.reset()
+                    self._inode = info.st_ino
+            if info.st_size == self.offset:
+                return 0
+            file.seek(self.offset)
+            data = file.read(info.st_size - self.offset)
+        if self.offset == 0 and len(data):
+            head = data[:HEAD_SIZE]
+            self._head = len(head), crc32(head)
+        return self._parse(data)
+
+    def reset(self):
+        """ Forgets all parsed steps. """
+        self.offset = 0
+        self._inode = None
+        self._head = None
+        self._energies, self._forces, self._stresses = [], [], []
+
+    def _parse(self, data):
+        """ Parses complete ionic steps from new bytes.
+
+            VASP 4 prints the energy of an ionic step before its table of
+            forces, whereas VASP 5 and 6 print it after. Hence a step is
+            complete once both its table of forces and its energy have been
+            read, in whichever order.
+        """
+        from re import compile
+        energy_regex = compile(br'^\s*energy\s+without\s+entropy=\s*(\S+)')
+        nsteps, position, base = 0, 0, self.offset
+        energy, stress, forces, table = None, None, None, False
+        end = data.rfind(b'\n') + 1
+        while position < end:
+            start = position
+            eol = data.index(b'\n', position) + 1
+            line, position = data[position:eol], eol
+            if table:
+                values = line.split()
+                if len(values) == 6:
+                    forces.append([float(u) for u in values[3:]])
+                    continue
+                if len(forces) == 0 and line.strip().startswith(b'---'):
+                    continue
+                # end of the table of forces.
+                table = False
+                if energy is None:
+                    continue
+            else:
+                found = energy_regex.match(line)
+                if found is not None:
+                    energy = float(found.group(1))
+                    if forces is None:
+                        continue
+                elif line.lstrip().startswith(b'in kB'):
+                    values = line.split()[2:8]
+                    if len(values) == 6:
+                        stress = [float(u) for u in values]
+                    continue
+                elif line.lstrip().startswith(b'POSITION') and b'TOTAL-FORCE' in line:
+                    if forces is not None:
+                        # previous step had no energy.
+                        self._close(None, stress, forces, base + start)
+                        nsteps += 1
+                        stress = None
+                    forces, table = [], True
+                    continue
+                else:
+                    continue
+            # both energy and forces were read: the ionic step is complete.
+            self._close(energy, stress, forces, base + position)
+            energy, stress, forces = None, None, None
+            nsteps += 1
+        return nsteps
+
+    def _close(self, energy, stress, forces, offset):
+        """ Records a complete ionic step, ending at the given offset. """
+        self._energies.append(energy)
+        self._stresses.append(stress)
+        self._forces.append(forces)
+        self.offset = offset
+
+    @property
+    def nsteps(self):
+        """ Number of complete ionic steps parsed so far. """
+        return len(self._forces)
+
+    @property
+    def total_energies(self):
+        """ Energies without entropy of each ionic step, in eV. """
+        from numpy import array
+        from quantities import eV
+        return array([u for u in self._energies if u is not None], dtype='float64') * eV
+
+    @property
+    def forces(self):
+        """ Forces on each atom, for each ionic step, in eV/angstrom. """
+        from numpy import array
+        from quantities import eV, angstrom
+        return array(self._forces, dtype='float64') * eV / angstrom
+
+    @property
+    def stresses(self):
+        """ Stress tensor at each ionic step, in kbar.
+
+            Steps without stress, e.g. when ISIF is 0, are left out.
+        """
+        from numpy import array, zeros
+        from quantities import kbar
+        result = []
+        for values in self._stresses:
+            if values is None:
+                continue
+            stress = zeros((3, 3), dtype='float64')
+            stress[0, 0], stress[1, 1], stress[2, 2] = values[:3]
+            stress[0, 1] = stress[1, 0] = values[3]
+            stress[1, 2] = stress[2, 1] = values[4]
+            stress[0, 2] = stress[2, 0] = values[5]
+            result.append(stress)
+        return array(result).reshape(-1, 3, 3) * kbar
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.path)
+
+
+def outcar_tail(path):
+    """ Tailer of an OUTCAR, updated with the steps appended since the last call.
+
+        Tailers are kept per file, so that successive calls, e.g. from
+        different extraction objects polling the same calculation, only parse
+        new output.
+    """
+    from collections import OrderedDict
+    from os.path import realpath
+    from ...misc import RelativePath
+    global _cache
+    if _cache is None:
+        _cache = OrderedDict()
+    path = realpath(RelativePath(path).path)
+    result = _cache.pop(path, None)
+    if result is None:
+        result = OutcarTail(path)
+    _cache[path] = result
+    while len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+    result.update()
+    return result
@@ -52,3 +52,7 @@ TMPCAR = 'TMPCAR'
 """ Name of temporary wavefunctions file. """
 POT = 'POT'
 """ Name of the local potential file. """
+FUNCTIONAL = 'pylada.FUNCTIONAL'
+""" Name of the file with the representation of the functional. """
+FUNCTIONAL_STATE = 'pylada.FUNCTIONAL.json'
+""" Name of the file with the description of the functional. """
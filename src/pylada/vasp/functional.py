@@ -30,6 +30,10 @@ from ..tools.input import AttrBlock
 from ..misc import add_setter
 from .extract import Extract as ExtractVasp
 from pylada.misc import testValidProgram
+from weakref import WeakKeyDictionary
+
+_default_attributes = WeakKeyDictionary()
+""" Attributes of default instances, per class. Used when unpickling. """
 
 
 class Vasp(AttrBlock):
@@ -994,62 +998,152 @@ class Vasp(AttrBlock):
             - Writes KPOINTS_ file.
             - Creates POTCAR_ file
         """
-        from os.path import join
-        from ..crystal import specieset
-        from ..misc import chdir, local_path
-        from . import files
+        from ..misc import chdir
 
         logger.info('vasp/functional bringup: outdir: %s ' % outdir)
         logger.debug('vasp/functional bringup: structure:\n%s' % repr(structure))
         logger.debug('vasp/functional bringup: kwargs: %s' % repr(kwargs))
 
+        # keywords defined by users may still expect to run in outdir.
         with chdir(outdir):
-            # creates INCAR file (and POSCAR via istruc).
-            fpath = join(outdir, files.INCAR)
-            logger.debug("vasp/functional bringup: incar fpath: %s " % fpath)
-            self.write_incar(structure, path=fpath, outdir=outdir, **kwargs)
-
-            # creates kpoints file
-            logger.debug("vasp/functional bringup: files.KPOINTS: %s " % files.KPOINTS)
-            with open(files.KPOINTS, "w") as kp_file:
+            self._write_inputs(structure, outdir, **kwargs)
+
+    def bringup_many(self, jobs, nworkers=None, **kwargs):
+        """ Creates input files for many calculations at once.
+
+            Each calculation is brought-up as by :py:meth:`bringup`, with its
+            own copy of this functional and of its structure, but without
+            changing the current working directory. Files are written by a
+            pool of threads, so that the latency of parallel file-systems is
+            overlapped. The functional is pickled once and unpickled for each
+            job, which is faster than deep-copying it. KPOINTS are computed
+            once when they do not depend on the structure, and POTCARs are
+            linked from :py:data:`pylada.potcar_store` when it is set.
+
+            :param jobs:
+                Iterable over (structure, outdir) or (structure, outdir,
+                overrides) tuples, where overrides is a dictionary of
+                attributes of the functional to modify for this job only.
+            :param int nworkers:
+                Number of threads. Defaults to the python default.
+            :param kwargs:
+                Passed on to :py:meth:`write_incar` for all jobs.
+            :returns: List of the output directories.
+        """
+        from pickle import dumps, loads, HIGHEST_PROTOCOL
+        from copy import deepcopy
+        from io import StringIO
+        from concurrent.futures import ThreadPoolExecutor
+        from ..misc import local_path
+
+        blob = dumps(self, HIGHEST_PROTOCOL)
+        kpoints = None
+        if not hasattr(self.kpoints, '__call__'):
+            kpoints = StringIO()
+            self.write_kpoints(kpoints, None)
+            kpoints = kpoints.getvalue()
+        files = self._additional_files()
+
+        def bringup(job):
+            structure, outdir = deepcopy(job[0]), str(local_path(job[1]))
+            overrides = job[2] if len(job) > 2 and job[2] is not None else {}
+            vasp = loads(blob)
+            for key, value in overrides.items():
+                if not hasattr(vasp, key):
+                    raise ValueError("Unkwown keyword argument to {0.__class__.__name__}: {1}"
+                                     .format(vasp, key))
+                setattr(vasp, key, value)
+            vasp._write_inputs(structure, outdir,
+                               kpoints=None if 'kpoints' in overrides else kpoints,
+                               files=files if 'files' not in overrides else None,
+                               **kwargs)
+            return outdir
+
+        with ThreadPoolExecutor(max_workers=nworkers) as executor:
+            return list(executor.map(bringup, jobs))
+
+    def _write_inputs(self, structure, outdir, kpoints=None, files=None, **kwargs):
+        """ Writes input files to outdir, without changing directory.
+
+            :param str kpoints:
+                Content of the KPOINTS file, if known already.
+            :param list files:
+                Absolute paths of the additional files, if known already.
+        """
+        from os.path import join
+        from ..misc import local_path
+        from . import files as vaspfiles
+
+        local_path(outdir).ensure(dir=True)
+
+        # creates INCAR file (and POSCAR via istruc).
+        fpath = join(outdir, vaspfiles.INCAR)
+        logger.debug("vasp/functional bringup: incar fpath: %s " % fpath)
+        self.write_incar(structure, path=fpath, outdir=outdir, **kwargs)
+
+        # creates kpoints file
+        logger.debug("vasp/functional bringup: files.KPOINTS: %s " % vaspfiles.KPOINTS)
+        with open(join(outdir, vaspfiles.KPOINTS), "w") as kp_file:
+            if kpoints is None:
                 self.write_kpoints(kp_file, structure)
+            else:
+                kp_file.write(kpoints)
 
-            # creates POTCAR file
-            logger.debug("vasp/functional bringup: files.POTCAR: %s " % files.POTCAR)
-            with open(files.POTCAR, 'w') as potcar:
-                self.write_potcar(potcar, structure)
+        # creates POTCAR file
+        logger.debug("vasp/functional bringup: files.POTCAR: %s " % vaspfiles.POTCAR)
+        self.install_potcar(structure, join(outdir, vaspfiles.POTCAR))
 
-            # Add is running file marker.
-            local_path(outdir).join('.pylada_is_running').ensure(file=True)
-            self._copy_additional_files(outdir)
+        # Add is running file marker.
+        local_path(outdir).join('.pylada_is_running').ensure(file=True)
+        self._copy_additional_files(outdir, files)
 
-    def _copy_additional_files(self, outdir):
-        """ Copy files from attribute files """
-        from ..misc import local_path, copyfile, chdir, Sequence
+    def _additional_files(self):
+        """ Absolute paths of the files in attribute files. """
+        from ..misc import local_path, Sequence
         files = getattr(self, 'files', [])
         if files is None:
-            return
+            return []
         if isinstance(files, str) or not isinstance(files, Sequence):
             files = [files]
-        files = [
+        return [
             str(local_path(getattr(filename, 'path', filename)))
             for filename in files
         ]
-        with chdir(outdir):
-            for filename in files:
-                copyfile(filename)
+
+    def _copy_additional_files(self, outdir, files=None):
+        """ Copy files from attribute files """
+        from ..misc import copyfile, local_path
+        if files is None:
+            files = self._additional_files()
+        local_path(outdir).ensure(dir=True)
+        for filename in files:
+            copyfile(filename, outdir)
 
     def bringdown(self, directory, structure):
-        """ Copies contcar to outcar. """
+        """ Saves the functional and removes the running marker.
+
+            The functional is described in JSON, which
+            :py:attr:`Extract.functional <pylada.vasp.extract.base.ExtractBase.functional>`
+            reads back without executing any code. Functionals which cannot be
+            described this way, e.g. with lambdas as attributes, are saved as a
+            python representation instead.
+        """
         from os.path import exists
         from os import remove
         from ..misc import chdir
+        from ..tools.json import dump_state
+        from . import files
 
         logger.info('vasp/functional bringdown: directory: %s ' % directory)
 
         with chdir(directory):
-            with open('pylada.FUNCTIONAL', 'w') as fout:
-                fout.write(repr(self))
+            try:
+                dump_state(self, files.FUNCTIONAL_STATE)
+            except (ValueError, TypeError):
+                if exists(files.FUNCTIONAL_STATE):
+                    remove(files.FUNCTIONAL_STATE)
+                with open(files.FUNCTIONAL, 'w') as fout:
+                    fout.write(repr(self))
 
             if exists('.pylada_is_running'):
                 remove('.pylada_is_running')
@@ -1075,9 +1169,8 @@ class Vasp(AttrBlock):
         if kwargs.get('outdir', None) is None:
             kwargs['outdir'] = dirname(path.name)
 
-        self.output_map(structure=structure, vasp=self, **kwargs)
-        # twice, in-case some parameters change others.
-
+        # Keywords which change others are rendered first, see
+        # pylada.tools.input.block.AttrBlock.output_map.
         # At this point (vasp==self)._input is a map of the incar parameters.
         # The values may be primitives or callables.
         # Example: self._input['foobar'] = 'FOOBARED'
@@ -1119,9 +1212,25 @@ class Vasp(AttrBlock):
         """ Writes the potcar file """
         from ..crystal import specieset
         for s in specieset(structure):
-            outLines = self.species[s].read_potcar()
-            file.writelines(outLines)
-    
+            with self.species[s].read_potcar() as potcar:
+                file.write(potcar.read())
+
+    def install_potcar(self, structure, path):
+        """ Creates the POTCAR file at the given path.
+
+            With :py:data:`pylada.potcar_store` set, the POTCAR is linked from
+            the content-addressed store.
+
+            .. seealso:: :py:func:`pylada.vasp.potcar.install_potcar`
+        """
+        from ..crystal import specieset
+        from .potcar import install_potcar
+        paths = []
+        for s in specieset(structure):
+            self.species[s].potcar_exists()
+            paths.append(self.species[s].path)
+        install_potcar(paths, path)
+
     def __repr__(self, defaults=True, name=None):
         """ Returns representation of this instance """
         from ..tools.uirepr import uirepr
@@ -1165,7 +1274,13 @@ class Vasp(AttrBlock):
             Takes care of older pickle versions.
         """
         super(Vasp, self).__setstate__(args)
-        for key, value in self.__class__().__dict__.items():
+        # only creates a default instance if attributes are actually missing.
+        keys = _default_attributes.get(self.__class__, None)
+        if keys is not None and all(k in self.__dict__ for k in keys):
+            return
+        defaults = self.__class__().__dict__
+        _default_attributes[self.__class__] = list(defaults)
+        for key, value in defaults.items():
             if not hasattr(self, key):
                 setattr(self, key, value)
 
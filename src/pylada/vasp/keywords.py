@@ -68,6 +68,7 @@ class Magmom(ValueKeyword):
     """
     keyword = 'MAGMOM'
     'VASP keyword'
+    depends = ('ispin', 'structure')
 
     def __init__(self, value=None):
         super(Magmom, self).__init__(value=value)
@@ -154,6 +155,7 @@ class System(ValueKeyword):
     """
     keyword = 'system'
     """ VASP keyword """
+    depends = ('structure',)
 
     def __init__(self, value=None):
         super(System, self).__init__(value=value)
@@ -258,6 +260,7 @@ class ExtraElectron(TypedKeyword):
     """ Type of this input. """
     keyword = 'nelect'
     """ VASP keyword. """
+    depends = ('species', 'structure')
 
     def __init__(self, value=None): super(ExtraElectron, self).__init__(value=value)
 
@@ -458,6 +461,7 @@ class EdiffPerAtom(TypedKeyword):
     """ Type of the value """
     keyword = 'ediff'
     """ VASP keyword """
+    depends = ('structure',)
 
     def __init__(self, value=None):
         """ Creates *per atom* tolerance. """
@@ -527,6 +531,7 @@ class EdiffgPerAtom(TypedKeyword):
     """ Type of the value """
     keyword = 'ediffg'
     """ VASP keyword """
+    depends = ('structure',)
 
     def __init__(self, value=None):
         """ Creates *per atom* tolerance. """
@@ -564,6 +569,7 @@ class Encut(ValueKeyword):
     """
     keyword = "encut"
     """ Corresponding VASP key. """
+    depends = ('species', 'structure')
 
     def __init__(self, value=None): super(Encut, self).__init__(value=value)
 
@@ -861,6 +867,8 @@ class IStruc(AliasKeyword):
     """ Aliases for the same option. """
     keyword = None
     """ Does not correspond to a VASP keyword """
+    modifies = ('structure',)
+    """ Positions and cell may be read from a CONTCAR. """
 
     def __init__(self, value='auto'):
         super(IStruc, self).__init__(value=value)
@@ -1091,6 +1099,7 @@ class Isif(ChoiceKeyword):
 class IBrion(BaseKeyword):
     keyword = 'ibrion'
     """ VASP keyword """
+    depends = ('relaxation',)
 
     def __init__(self, value=None):
         super(IBrion, self).__init__()
@@ -1133,6 +1142,7 @@ class Relaxation(BaseKeyword):
     """
     keyword = None
     """ Just an alias for ISIF. """
+    depends = ()
 
     def __init__(self, value=None):
         super(Relaxation, self).__init__()
@@ -1260,6 +1270,8 @@ class LSorbit(BoolKeyword):
     """
     keyword = 'lsorbit'
     """ VASP keyword """
+    modifies = ('lmaxmix', 'lvhar')
+    """ Set from the calculation being restarted. """
 
     def __init__(self, value=None):
         super(LSorbit, self).__init__(value=value)
@@ -0,0 +1,173 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Cached POTCAR metadata and content-addressed POTCAR assembly.
+
+    Pseudo-potential files are shared by many calculations. Their metadata,
+    i.e. ENMAX, the valence, TITEL and a hash of their content, is parsed once
+    per process by :py:func:`potcar_info`, and stored in the persistent
+    extraction cache when :py:data:`pylada.extraction_cache` is set.
+
+    When :py:data:`pylada.potcar_store` is set, the POTCAR of each ordered set
+    of pseudo-potentials is assembled once into a content-addressed store.
+    Run directories receive a hard-link to it, or a copy if the store is on
+    another file-system.
+"""
+__docformat__ = 'restructuredtext en'
+__all__ = ['PotcarInfo', 'potcar_info', 'assemble_potcar', 'install_potcar']
+from collections import namedtuple
+
+PotcarInfo = namedtuple('PotcarInfo', ['enmax', 'valence', 'titel', 'sha256', 'size'])
+""" Metadata of a POTCAR file.
+
+    ENMAX is in eV, or None if absent. The valence is the number on the second
+    line of the file, i.e. ZVAL.
+"""
+
+_infos = {}
+""" Maps (path, stamp) to the metadata of POTCAR files. """
+
+
+def parse_potcar(data):
+    """ Metadata of the content of a POTCAR file.
+
+        :param bytes data: content of the file.
+    """
+    from hashlib import sha256
+    from re import search
+    text = data.decode('latin-1')
+    lines = text.split('\n', 2)
+    try:
+        valence = float(lines[1].split()[0])
+    except (IndexError, ValueError):
+        valence = None
+    enmax = search(r"ENMAX\s+=\s+(\S+);\s+ENMIN", text)
+    titel = search(r"(?m)^\s*TITEL\s*=\s*(.*?)\s*$", text)
+    return PotcarInfo(enmax=None if enmax is None else float(enmax.group(1)),
+                      valence=valence,
+                      titel=None if titel is None else titel.group(1),
+                      sha256=sha256(data).hexdigest(),
+                      size=len(data))
+
+
+def potcar_info(path):
+    """ Metadata of a POTCAR file, parsed once per process and file version.
+
+        :raise IOError: if the file does not exist.
+    """
+    from ..error import IOError
+    from ..tools.diskcache import file_stamp, extraction_cache
+    from .. import logger
+    try:
+        key = file_stamp(path)
+    except OSError:
+        raise IOError("Could not find POTCAR {0}.".format(path))
+    if key in _infos:
+        return _infos[key]
+    cache = None
+    try:
+        cache = extraction_cache()
+        if cache is not None:
+            found, value = cache.get(key[0], __name__ + '.potcar_info', key[1])
+            if found:
+                _infos[key] = PotcarInfo(*value)
+                return _infos[key]
+    except Exception as e:
+        logger.debug('vasp/potcar: could not read cache: %s' % e)
+        cache = None
+    with open(key[0], 'rb') as file:
+        result = parse_potcar(file.read())
+    _infos[key] = result
+    if cache is not None:
+        try:
+            cache.set(key[0], __name__ + '.potcar_info', key[1], tuple(result))
+        except Exception as e:
+            logger.debug('vasp/potcar: could not write cache: %s' % e)
+    return result
+
+
+def potcar_key(paths):
+    """ Content address of the concatenation of POTCAR files. """
+    from hashlib import sha256
+    result = sha256()
+    for path in paths:
+        result.update(potcar_info(path).sha256.encode('ascii'))
+        result.update(b'\n')
+    return result.hexdigest()
+
+
+def assemble_potcar(paths, store=None):
+    """ Path to the concatenation of POTCAR files in the store.
+
+        The concatenation is only written if it is not already in the store.
+        It is written under a temporary name and then moved in place, so that
+        concurrent processes never see partial files.
+
+        :param paths: Ordered POTCAR files.
+        :param str store:
+            Directory of the store. Defaults to :py:data:`pylada.potcar_store`.
+    """
+    from os import makedirs, rename, getpid
+    from os.path import join, exists
+    from ..misc import RelativePath
+    from ..error import ValueError
+    if store is None:
+        from .. import potcar_store as store
+        if store is None:
+            raise ValueError("pylada.potcar_store is not set.")
+    key = potcar_key(paths)
+    directory = join(RelativePath(store).path, key[:2])
+    result = join(directory, key)
+    if exists(result):
+        return result
+    if not exists(directory):
+        makedirs(directory, exist_ok=True)
+    temporary = '{0}.{1}.part'.format(result, getpid())
+    with open(temporary, 'wb') as output:
+        for path in paths:
+            with open(path, 'rb') as file:
+                output.write(file.read())
+    rename(temporary, result)
+    return result
+
+
+def install_potcar(paths, destination, store=None):
+    """ Creates a POTCAR from the given files.
+
+        If a store is given, or :py:data:`pylada.potcar_store` is set, the
+        concatenation is hard-linked from the store, or cloned or copied if
+        linking fails. Otherwise, the files are concatenated into the destination.
+    """
+    from os import remove
+    from os.path import lexists
+    from ..misc import copyfile
+    if store is None:
+        from .. import potcar_store as store
+    if lexists(destination):
+        remove(destination)
+    if store is None:
+        with open(destination, 'wb') as output:
+            for path in paths:
+                with open(path, 'rb') as file:
+                    output.write(file.read())
+        return
+    copyfile(assemble_potcar(paths, store), destination, hardlink=True)
@@ -38,14 +38,17 @@ from ..tools.makeclass import makeclass, makefunc
 from .functional import Vasp
 from .extract import Extract, MassExtract
 
+IDLE_FILE = '.pylada_relax_idle'
+""" File where the idle time between the steps of a relaxation is recorded. """
+
 
 class RelaxExtract(Extract):
     """ Extractor class for vasp relaxations. """
     class IntermediateMassExtract(MassExtract):
         """ Focuses on intermediate steps. """
 
-        def __iter_alljobs__(self):
-            """ Goes through all directories with an OUTVAR. """
+        def __iter_jobdirs__(self):
+            """ Goes through all step directories with an OUTCAR. """
             from glob import iglob
             from os.path import relpath, join, exists
             from itertools import chain
@@ -54,11 +57,29 @@ class RelaxExtract(Extract):
                              iglob(join(self.rootpath, 'relax_ions', '*/'))):
                 if not exists(join(self.rootpath, dir, 'OUTCAR')):
                     continue
-                try:
-                    result = Extract(dir[:-1])
-                except:
-                    continue
-                yield join('/', relpath(dir[:-1], self.rootpath)), result
+                yield join('/', relpath(dir[:-1], self.rootpath)), dir[:-1], \
+                    self._extract_factory(dir[:-1], False)
+
+        @property
+        def idle_times(self):
+            """ Seconds spent between the end of a step and the start of the next.
+
+                Maps the name of each step which was launched after another,
+                including the final static calculation ``'/'``, to the time
+                spent parsing the previous step and staging this one.
+            """
+            from os.path import join, exists
+            from quantities import s
+            path = join(self.rootpath, IDLE_FILE)
+            result = {}
+            if not exists(path):
+                return result
+            with open(path, 'r') as file:
+                for line in file:
+                    if len(line.split()) == 2:
+                        name, value = line.split()
+                        result[name] = float(value) * s
+            return result
 
     @property
     def details(self):
@@ -98,9 +119,75 @@ class RelaxExtract(Extract):
         return is_run
 
 
+class _IdleTimer(object):
+    """ Records the time between consecutive VASP processes of a relaxation.
+
+        Each step is written to :py:data:`IDLE_FILE` as soon as it starts, so
+        that interrupted relaxations keep the record of the steps performed.
+    """
+
+    def __init__(self, outdir):
+        super(_IdleTimer, self).__init__()
+        self.outdir = outdir
+        """ Root directory of the relaxation. """
+        self.last = None
+        """ Time at which the last process finished. """
+
+    def __call__(self, steps, directory):
+        """ Yields from the steps of a single VASP call, timing processes. """
+        from os.path import join, relpath
+        from time import time
+        from ..process.process import Process
+        name = '/' if directory == self.outdir else join('/', relpath(directory, self.outdir))
+        for u in steps:
+            if not isinstance(u, Process):
+                yield u
+                continue
+            if self.last is not None:
+                with open(join(self.outdir, IDLE_FILE), 'a') as file:
+                    file.write('{0} {1!r}\n'.format(name, time() - self.last))
+            yield u
+            self.last = time()
+
+
+def _stage(vasp, structure, outdir, **kwargs):
+    """ Stages the next step of a relaxation before it is known to be needed.
+
+        Input files, including restart files, are written to ``outdir``. The
+        step is only staged if ``outdir`` does not exist yet, so that
+        discarding it cannot remove earlier results.
+
+        Called in a background thread while the convergence of the previous
+        step is checked. Bringing up the step changes the working directory,
+        so the convergence check should only use absolute paths, as the
+        extraction objects do.
+
+        :returns: The directory and an iterator over the step, or None.
+    """
+    from os.path import exists
+    from itertools import chain
+    if exists(outdir):
+        return None
+    steps = vasp.iter(structure, outdir=outdir, **kwargs)
+    try:
+        first = next(steps)
+    except Exception:
+        # errors are raised again if the step is actually needed.
+        _discard((outdir, steps))
+        return None
+    return outdir, chain([first], steps)
+
+
+def _discard(staged):
+    """ Removes a staged step which turned out to be unnecessary. """
+    from shutil import rmtree
+    if staged is not None:
+        rmtree(staged[0], ignore_errors=True)
+
+
 def iter_relax(vasp, structure, outdir=None, first_trial=None,
                maxcalls=10, keepsteps=True, nofail=False,
-               convergence=None, minrelsteps=-1, **kwargs):
+               convergence=None, minrelsteps=-1, warmstart=None, **kwargs):
     """ Iterator over calls to VASP during relaxation.
 
         This generator iterates over successive VASP calculations until a fully
@@ -166,6 +253,12 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
             then the calls occur during the ionic relaxations. The calls do count
             towards ``maxcalls``.
           * negative (default): argument is ignored.
+        :param warmstart:
+          A :py:class:`~pylada.vasp.warmstart.WarmStartIndex`. If given, a new
+          relaxation starts from the positions, charge density and, when
+          compatible, wavefunctions of the most similar finished calculation
+          in the index. Relaxations which were already started restart from
+          their own steps, as usual.
         :param kwargs:
           Other parameters are applied to the input
           :py:class:`~pylada.vasp.functional.Vasp` object.
@@ -174,11 +267,18 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
                  calculation already exists. Otherwise, it yields a
                  :py:class:`~pylada.process.program.ProgramProcess` object
                  detailing the call to the external VASP program.
+
+        Once a relaxation step is done, convergence is checked in a background
+        thread while the next step of the same kind is staged. If the step
+        turns out to be converged, the staged directory is removed. The time
+        spent between VASP processes is available from
+        :py:attr:`RelaxExtract.details`.
     """
     from re import sub
+    from concurrent.futures import ThreadPoolExecutor
     from copy import deepcopy
     from os import getcwd
-    from os.path import join
+    from os.path import join, exists
     from shutil import rmtree
     from ..misc import RelativePath
     from ..error import ExternalRunFailed
@@ -214,6 +314,14 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
     # number of restarts.
     nb_steps, output = 0, None
 
+    # starts a new relaxation from the most similar finished calculation.
+    warm = None
+    if warmstart is not None and not vasp.Extract(outdir).success \
+            and not any(exists(join(outdir, u)) for u in ['relax_cellshape', 'relax_ions']):
+        warm = warmstart.warm_start(relaxed_structure, vasp, outdir)
+        if warm is not None:
+            relaxed_structure = warm.structure.copy()
+
     # sets parameter dictionary for first trial.
     if first_trial is not None:
         params = kwargs.copy()
@@ -230,21 +338,27 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
         relaxation = relaxation[0]
     # cellshape ionic volume
 
+    # times gaps between VASP calls.
+    timer, staged = _IdleTimer(outdir), None
+
     # performs cellshape relaxation calculations.
     while (maxcalls <= 0 or nb_steps < maxcalls) and relaxation.find("cellshape") != -1:
         # Invokes vasp/functional.Vasp.__init__
         # and vasp/functional: iter, which calls bringup,
         # which calls write_incar, write_kpoints, etc.
         fulldir = join(outdir, "relax_cellshape", str(nb_steps))
-        for u in vasp.iter\
+        if staged is None:
+            staged = fulldir, vasp.iter\
                 (
                     relaxed_structure,
                     outdir=fulldir,
-                    restart=output,
+                    restart=output if output is not None else warm,
                     relaxation=relaxation,
                     **params
-                ):
+                )
+        for u in timer(staged[1], fulldir):
             yield u
+        staged = None
 
         output = vasp.Extract(join(outdir, "relax_cellshape", str(nb_steps)))
         if not output.success:
@@ -255,10 +369,23 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
         if nb_steps == 1 and len(first_trial) != 0:
             params = kwargs
             continue
-        # check for convergence.
-        isConv = is_converged(output)
+        # stages the next step in the background, while checking for convergence.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if maxcalls <= 0 or nb_steps < maxcalls:
+                staged = executor.submit(_stage, vasp, relaxed_structure,
+                                         join(outdir, "relax_cellshape", str(nb_steps)),
+                                         restart=output, relaxation=relaxation, **params)
+            try:
+                isConv = is_converged(output)
+            finally:
+                if staged is not None:
+                    staged = staged.result()
         if isConv:
+            _discard(staged)
+            staged = None
             break
+    _discard(staged)
+    staged = None
 
     # Does not perform ionic calculation if convergence not reached.
     if nofail == False and is_converged(output) == False:
@@ -267,15 +394,18 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
     # performs ionic calculation.
     while (maxcalls <= 0 or nb_steps < maxcalls + 1) and relaxation.find("ionic") != -1:
         fulldir = join(outdir, "relax_ions", str(nb_steps))
-        for u in vasp.iter\
+        if staged is None:
+            staged = fulldir, vasp.iter\
                 (
                     relaxed_structure,
                     outdir=fulldir,
                     relaxation="ionic",
-                    restart=output,
+                    restart=output if output is not None else warm,
                     **params
-                ):
+                )
+        for u in timer(staged[1], fulldir):
             yield u
+        staged = None
 
         output = vasp.Extract(join(outdir, "relax_ions", str(nb_steps)))
         if not output.success:
@@ -286,10 +416,22 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
         if nb_steps == 1 and len(first_trial) != 0:
             params = kwargs
             continue
-        # check for convergence.
-        isConv = is_converged(output)
+        # stages the next step in the background, while checking for convergence.
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            if maxcalls <= 0 or nb_steps < maxcalls + 1:
+                staged = executor.submit(_stage, vasp, relaxed_structure,
+                                         join(outdir, "relax_ions", str(nb_steps)),
+                                         relaxation="ionic", restart=output, **params)
+            try:
+                isConv = is_converged(output)
+            finally:
+                if staged is not None:
+                    staged = staged.result()
         if isConv:
+            _discard(staged)
+            staged = None
             break
+    _discard(staged)
 
     # xxxxxxxxxxxxxxxxx start here
     # xxx set INCAR parameters by:
@@ -303,14 +445,14 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
             and relaxation.find("relgw") != -1:
 
         fulldir = join(outdir, "relax_gwcalc", str(nb_steps))
-        for u in vasp.iter\
-                (
-                    relaxed_structure,
-                    outdir=fulldir,
-                    relaxation="relgw",
-                    restart=output,
-                    **params
-                ):
+        for u in timer(vasp.iter
+                       (
+                           relaxed_structure,
+                           outdir=fulldir,
+                           relaxation="relgw",
+                           restart=output,
+                           **params
+                       ), fulldir):
             yield u
 
         output = vasp.Extract(join(outdir, "relax_gwcalc", str(nb_steps)))
@@ -329,14 +471,14 @@ def iter_relax(vasp, structure, outdir=None, first_trial=None,
     # xxx skip if gwmod:
     # gwmod: if relaxation.find("relgw") == -1 ...
 
-    for u in vasp.iter\
-            (
-                relaxed_structure,
-                outdir=outdir,
-                relaxation="static",
-                restart=output,
-                **kwargs
-            ):
+    for u in timer(vasp.iter
+                   (
+                       relaxed_structure,
+                       outdir=outdir,
+                       relaxation="static",
+                       restart=output if output is not None else warm,
+                       **kwargs
+                   ), outdir):
         yield u
 
     output = vasp.Extract(outdir)
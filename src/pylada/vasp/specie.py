@@ -208,22 +208,29 @@ class Specie(object):
     def enmax(self):
         """ Maximum recommended cutoff """
         from quantities import eV
-        import re
+        from .potcar import potcar_info
         self.potcar_exists()
-        with self.read_potcar() as potcar:
-            r = re.compile(r"ENMAX\s+=\s+(\S+);\s+ENMIN")
-            p = r.search(potcar.read())
-            if p is None:
-                raise AssertionError("Could not retrieve ENMAX from " + self.directory)
-            return float(p.group(1)) * eV
+        enmax = potcar_info(self.path).enmax
+        if enmax is None:
+            raise AssertionError("Could not retrieve ENMAX from " + self.directory)
+        return enmax * eV
 
     @property
     def valence(self):
         """ Number of valence electrons specified by pseudo-potential """
+        from .potcar import potcar_info
         self.potcar_exists()
-        with self.read_potcar() as potcar:
-            potcar.readline()
-            return float(potcar.readline().split()[0])  # shoud be number on second line
+        return potcar_info(self.path).valence  # number on second line
+
+    @property
+    def potcar_info(self):
+        """ Cached metadata of the POTCAR file.
+
+            .. seealso:: :py:func:`pylada.vasp.potcar.potcar_info`
+        """
+        from .potcar import potcar_info
+        self.potcar_exists()
+        return potcar_info(self.path)
 
     def potcar_exists(self):
         """ Raises IOError if POTCAR file does not exist. """
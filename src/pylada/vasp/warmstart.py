@@ -0,0 +1,288 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+""" Warm starts from similar, finished calculations.
+
+    Sweeps often relax many closely related structures, e.g. strained
+    variants or decorations of the same lattice. A
+    :py:class:`WarmStartIndex` holds a fingerprint of each finished
+    calculation in a job-folder tree. Given a new structure, it finds the most
+    similar one and creates a :py:class:`WarmStart` object, which can be
+    given as the ``restart`` argument of
+    :py:meth:`Vasp.iter <pylada.vasp.functional.Vasp.iter>`:
+
+    >>> index = WarmStartIndex('/path/to/sweep')
+    >>> restart = index.warm_start(structure, vasp, outdir)
+    >>> result = vasp(structure, outdir=outdir, restart=restart)
+
+    :py:func:`~pylada.vasp.relax.iter_relax` does the same for the first step
+    of a relaxation when given the ``warmstart`` argument.
+"""
+__docformat__ = "restructuredtext en"
+__all__ = ['fingerprint', 'distance', 'WarmStart', 'WarmStartIndex']
+
+WARMSTART_DIR = '.pylada_warmstart'
+""" Directory where the restart files of a warm start are staged. """
+WAVECAR_KEYWORDS = ('ispin', 'encut', 'kpoints', 'nbands', 'lsorbit')
+""" Parameters which must match for wavefunctions to be restarted. """
+RESCAN_PERIOD = 60
+""" Default number of seconds between two scans of the job-folder tree. """
+
+
+def fingerprint(structure):
+    """ Summary of a structure, used to compare it to others.
+
+        :returns: A tuple with the types of the atoms, in order, the metric
+            tensor of the cell in square angstroms, and the fractional
+            coordinates of the atoms. The first two do not depend on the
+            orientation of the cell.
+    """
+    from numpy import array, dot
+    from numpy.linalg import inv
+    from quantities import angstrom
+    cell = structure.cell * float(structure.scale.rescale(angstrom))
+    positions = array([atom.pos for atom in structure], dtype='float64').reshape(-1, 3)
+    fractional = dot(inv(structure.cell), positions.T).T
+    return tuple(atom.type for atom in structure), dot(cell.T, cell), fractional
+
+
+def distance(a, b):
+    """ Dissimilarity between two fingerprints.
+
+        Sum of the relative difference between metric tensors, of the
+        root-mean-square displacement of the atoms in fractional coordinates,
+        and of the fraction of sites with different types. Structures with
+        different numbers of atoms are infinitely far apart.
+    """
+    from numpy import inf, rint, sqrt
+    from numpy.linalg import norm
+    if len(a[0]) != len(b[0]) or len(a[0]) == 0:
+        return inf
+    strain = norm(a[1] - b[1]) / norm(a[1])
+    delta = b[2] - a[2]
+    delta -= rint(delta)
+    displacement = sqrt((delta * delta).sum(axis=1).mean())
+    decoration = sum(u != v for u, v in zip(a[0], b[0])) / float(len(a[0]))
+    return strain + displacement + decoration
+
+
+def _same_basis(vasp, other):
+    """ True if wavefunctions of ``other`` can be read with ``vasp``'s parameters. """
+    try:
+        return all(repr(getattr(vasp, key, None)) == repr(getattr(other, key, None))
+                   for key in WAVECAR_KEYWORDS)
+    except Exception:
+        return False
+
+
+class WarmStart(object):
+    """ Restart from a similar, finished calculation.
+
+        Stands in for the extraction object usually given as ``restart``.
+        Its structure is the input structure, with the positions of the
+        finished calculation. Restart files are read from a staging
+        directory, which only links to the files compatible with the new
+        calculation. Other attributes are those of the finished calculation.
+    """
+
+    def __init__(self, extract, structure, directory):
+        super(WarmStart, self).__init__()
+        self.extract = extract
+        """ Extraction object of the finished calculation. """
+        self.structure = structure
+        """ Structure from which to start. """
+        self.directory = directory
+        """ Directory holding links to the restart files. """
+
+    @property
+    def success(self):
+        """ True if the finished calculation was successful. """
+        return self.extract.success
+
+    def __getattr__(self, name):
+        """ Forwards to the finished calculation. """
+        if name.startswith('_') or 'extract' not in self.__dict__:
+            raise AttributeError(name)
+        return getattr(self.extract, name)
+
+    def __repr__(self):
+        return "{0}({1!r})".format(self.__class__.__name__, self.extract)
+
+
+class WarmStartIndex(object):
+    """ Fingerprints of the finished VASP calculations in a job-folder tree.
+
+        The tree is rescanned when a warm start is requested and the last scan
+        is older than :py:attr:`period`, or on demand with :py:meth:`update`.
+        Only directories whose OUTCAR changed since the last scan are read
+        again.
+    """
+
+    def __init__(self, rootpath, tolerance=0.1, period=RESCAN_PERIOD):
+        """ Initializes the index.
+
+            :param str rootpath:
+                Root of the job-folder tree to search.
+            :param float tolerance:
+                Largest :py:func:`distance` at which a calculation is deemed
+                similar enough to start from.
+            :param float period:
+                Smallest number of seconds between two scans of the tree
+                triggered by :py:meth:`nearest`. Zero rescans on each request.
+        """
+        from ..misc import RelativePath
+        super(WarmStartIndex, self).__init__()
+        self._rootpath = RelativePath(rootpath)
+        """ Root of the job-folder tree. """
+        self.tolerance = tolerance
+        """ Largest distance at which a calculation is deemed similar. """
+        self.period = period
+        """ Smallest number of seconds between two automatic scans. """
+        self._entries = {}
+        """ Stamp, name and fingerprint of each job directory. """
+        self._scanned = None
+        """ Time of the last scan, or None if the tree was never scanned. """
+
+    @property
+    def rootpath(self):
+        """ Root of the job-folder tree. """
+        return self._rootpath.path
+
+    def update(self):
+        """ Rescans the job-folder tree. """
+        from time import time
+        from ..jobfolder.extract import job_stamp
+        from . import MassExtract
+
+        self._scanned = time()
+        entries = {}
+        for name, directory, factory in MassExtract(self.rootpath).__iter_jobdirs__():
+            stamp = job_stamp(directory)
+            if directory in self._entries and self._entries[directory][0] == stamp:
+                entries[directory] = self._entries[directory]
+                continue
+            value = None
+            # running jobs are not finished, even if their last OUTCAR is.
+            extract = None if stamp[0] else factory()
+            try:
+                if extract is not None and extract.success:
+                    value = fingerprint(extract.structure)
+            except Exception:
+                value = None
+            entries[directory] = stamp, name, value
+        self._entries = entries
+
+    def nearest(self, structure):
+        """ Most similar finished calculation.
+
+            :returns: A tuple with the distance and the extraction object of
+                the closest finished calculation within :py:attr:`tolerance`,
+                or None.
+        """
+        from time import time
+        from . import Extract
+        if self._scanned is None or time() - self._scanned >= self.period:
+            self.update()
+        current, result = fingerprint(structure), None
+        for directory, (stamp, name, other) in sorted(self._entries.items()):
+            if other is None:
+                continue
+            d = distance(current, other)
+            if d <= self.tolerance and (result is None or d < result[0]):
+                result = d, directory
+        if result is None:
+            return None
+        return result[0], Extract(result[1])
+
+    def warm_start(self, structure, vasp, outdir):
+        """ Stages a warm start for a new calculation.
+
+            The positions of the closest finished calculation are expressed
+            in the cell of ``structure``. Its CHGCAR is staged only if the
+            atoms are the same. Its WAVECAR is staged only if, furthermore,
+            :py:data:`WAVECAR_KEYWORDS` match those of ``vasp``.
+
+            :param structure:
+                Structure of the new calculation.
+            :param vasp:
+                Functional of the new calculation.
+            :param str outdir:
+                Output directory of the new calculation. Restart files are
+                linked from a subdirectory.
+
+            :returns: A :py:class:`WarmStart` object, or None if no finished
+                calculation is similar enough.
+        """
+        from os import makedirs, remove
+        from os.path import join, exists, lexists
+        from numpy import dot, rint
+        from ..misc import RelativePath, copyfile
+        from . import files
+
+        found = self.nearest(structure)
+        if found is None:
+            return None
+        extract = found[1]
+        current, other = fingerprint(structure), fingerprint(extract.structure)
+
+        result = structure.copy()
+        delta = other[2] - current[2]
+        for atom, position in zip(result, current[2] + delta - rint(delta)):
+            atom.pos = dot(result.cell, position)
+
+        sametypes = current[0] == other[0]
+        samebasis = sametypes
+        if samebasis:
+            try:
+                samebasis = _same_basis(vasp, extract.functional)
+            except Exception:
+                samebasis = False
+
+        directory = join(RelativePath(outdir).path, WARMSTART_DIR)
+        makedirs(directory, exist_ok=True)
+        for filename, stage in [(files.CHGCAR, sametypes), (files.WAVECAR, samebasis)]:
+            path, source = join(directory, filename), join(extract.directory, filename)
+            if lexists(path):
+                remove(path)
+            if stage and exists(source):
+                copyfile(source, path, symlink=True)
+        return WarmStart(extract, result, directory)
+
+    def __getstate__(self):
+        d = self.__dict__.copy()
+        d['_entries'] = {}
+        d['_scanned'] = None
+        return d
+
+    def __ui_repr__(self, imports, name=None, defaults=None, exclude=None):
+        """ Creates user friendly representation. """
+        from ..tools.uirepr import add_to_imports
+        add_to_imports(self, imports)
+        return {name: repr(self)}
+
+    def __repr__(self):
+        result = "{0}({1!r}, tolerance={2!r}".format(self.__class__.__name__,
+                                                     self._rootpath.unexpanded,
+                                                     self.tolerance)
+        if self.period != RESCAN_PERIOD:
+            result += ", period={0!r}".format(self.period)
+        return result + ")"
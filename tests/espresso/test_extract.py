@@ -158,3 +158,66 @@ def test_stress(cellshape):
     expected = [[2.23, -32.38, -0.94], [-32.38, 3.06, -0.13], [-0.94, -0.13, -64.29]]
     assert cellshape.stress.units == kilobar
     assert allclose(cellshape.stress.magnitude, expected)
+
+
+def test_total_energies(ions, ions_path):
+    from numpy import allclose
+    assert ions.total_energies.shape == (4,)
+    assert allclose(ions.total_energies.magnitude,
+                    [-15.79353612, -15.79429707, -15.79449501, -15.79449587])
+    assert abs(ions.total_energies[-1] - ions.total_energy) < 1e-12
+    # the section index is shared by all extractors of the same file.
+    assert Extract(ions_path)._output_index is ions._output_index
+
+
+def test_index_follows_file_changes(tmpdir):
+    from os import utime
+    extract = Extract(tmpdir)
+    path = tmpdir.join("pwscf.out")
+    path.write("!    total energy              =     -1.5 Ry\n")
+    assert not extract.success
+    path.write("!    total energy              =     -1.5 Ry\n     JOB DONE.\n")
+    utime(str(path), (0, 0))
+    assert extract.success
+    assert abs(extract.total_energy.magnitude + 1.5) < 1e-12
+
+
+def test_double_exclamation_energy(tmpdir):
+    extract = Extract(tmpdir)
+    tmpdir.join("pwscf.out").write(
+        "!    total energy              =     -1.5 Ry\n"
+        "!!   total energy              =     -2.5 Ry\n     JOB DONE.\n")
+    assert abs(extract.total_energy.magnitude + 2.5) < 1e-12
+    assert len(extract.total_energies) == 2
+
+
+@mark.parametrize('last, expected', [(True, '3'), (False, '1')])
+def test_grepper(tmpdir, last, expected):
+    from pylada.espresso.extract import grepper
+
+    class Grepped(Extract):
+        @property
+        @grepper(r"value = (\d+)", last=last)
+        def value(self, match):
+            return match.group(1)
+
+    tmpdir.join("pwscf.out").write("value = 1\nvalue = 2\n\nvalue = 3\nother\n")
+    assert Grepped(tmpdir).value == expected
+
+
+@mark.parametrize('last, expected', [(True, '3'), (False, '1')])
+def test_grepper_anchors_at_lines(tmpdir, monkeypatch, last, expected):
+    from pylada.tools import extract
+    from pylada.espresso.extract import grepper
+
+    class Grepped(Extract):
+        @property
+        @grepper(r"^value = (\d+)", last=last)
+        def value(self, match):
+            return match.group(1)
+
+    # the search from the end starts with a window of the last lines only.
+    monkeypatch.setattr(extract, 'BLOCKSIZE', 16)
+    tmpdir.join("pwscf.out").write(
+        "value = 1\nvalue = 2\n\nvalue = 3\nother\nlines\n at the end\n")
+    assert Grepped(tmpdir).value == expected
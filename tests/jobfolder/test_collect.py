@@ -149,3 +149,199 @@ def test_naked_end(jobfolder, functional, tmpdir, expected_results, collect):
     collect.naked_end = False
     for key, value in collect["*/1"].indiv.items():
         assert value == expected_results[key]
+
+
+@mark.parametrize("pool", ["thread", "process"])
+def test_parallel_collection(collect, expected_results, pool):
+    collect.nworkers, collect.pool = 3, pool
+    collect.naked_end = False
+    sequential = list(collect.shallow_copy(nworkers=1).indiv.keys())
+    result = collect.indiv
+    assert dict(result.items()) == expected_results
+    assert list(result.keys()) == sequential
+    assert collect.failures == {}
+
+
+class Failing(object):
+    def __init__(self, i):
+        self.i = i
+
+    @property
+    def value(self):
+        if self.i % 2:
+            raise RuntimeError("odd job")
+        return self.i
+
+
+@mark.parametrize("nworkers, pool", [(1, "thread"), (4, "thread"), (4, "process")])
+def test_failures_are_reported(nworkers, pool):
+    from pylada.jobfolder import AbstractMassExtract
+
+    class Collect(AbstractMassExtract):
+        def __iter_alljobs__(self):
+            for i in range(10):
+                yield "/{0}/".format(i), Failing(i)
+
+    collect = Collect(nworkers=nworkers, pool=pool)
+    result = collect.value
+    assert list(result.keys()) == ["/{0}/".format(i) for i in range(0, 10, 2)]
+    assert sorted(collect.failures) == sorted("/{0}/".format(i) for i in range(1, 10, 2))
+    assert all(isinstance(u, RuntimeError) for u in collect.failures.values())
+
+
+def test_attributes_are_memoized_per_class():
+    from pylada.jobfolder import AbstractMassExtract
+    from pylada.jobfolder.extract import class_attributes
+
+    class Other(Failing):
+        @property
+        def other(self):
+            return -self.i
+
+    class Collect(AbstractMassExtract):
+        def __init__(self, jobs, **kwargs):
+            self.__dict__['jobs'] = jobs
+            super(Collect, self).__init__(**kwargs)
+
+        def __iter_alljobs__(self):
+            for i, job in enumerate(self.jobs):
+                yield "/{0}/".format(i), job
+
+    collect = Collect([Failing(2 * i) for i in range(5)])
+    attributes = collect._attributes
+    # attributes set on the objects themselves are memoized as well.
+    assert attributes == class_attributes(Failing) | {'i'}
+    assert 'value' in attributes and 'other' not in attributes
+    assert collect._attributes is attributes
+    assert collect.i == {"/{0}/".format(i): 2 * i for i in range(5)}
+
+    collect.jobs.append(Other(10))
+    collect.uncache()
+    assert 'other' in collect._attributes
+    assert collect.other == -10
+
+
+def test_attributes_do_not_iterate_jobs():
+    from pylada.jobfolder import AbstractMassExtract
+
+    class Other(Failing):
+        @property
+        def other(self):
+            return -self.i
+
+    class Collect(AbstractMassExtract):
+        def __init__(self, **kwargs):
+            self.__dict__['scans'] = 0
+            super(Collect, self).__init__(**kwargs)
+
+        def __iter_alljobs__(self):
+            self.__dict__['scans'] += 1
+            yield "/a/", Failing(0)
+            yield "/b/", Other(1)
+
+        def items(self):
+            self.__dict__['scans'] += 1
+            return super(Collect, self).items()
+
+    collect = Collect(naked_end=False)
+    assert 'other' in collect._attributes
+    scans = collect.scans
+    assert 'other' in collect._attributes
+    assert collect._has_attribute('value')
+    assert collect._has_attribute('i')
+    assert not collect._has_attribute('nothere')
+    assert collect.scans == scans
+    assert dict(collect.other.items()) == {"/b/": -1}
+    assert collect.scans == scans + 1
+
+    # views and exclusions change the classes at hand.
+    assert 'other' not in collect["a"]._attributes
+    assert 'other' not in collect.avoid("/b")._attributes
+    assert 'other' in collect._attributes
+
+
+def test_incremental_rescan(collect, tmpdir, expected_results):
+    from os import utime, stat
+    from pickle import dump
+
+    collect.dynamic, collect.naked_end = True, False
+    before = dict(collect._extractors)
+    assert dict(collect.indiv.items()) == expected_results
+
+    outcar = tmpdir.join("this", "1", "OUTCAR")
+    dump((42, False), outcar.open("wb"))
+    st = stat(str(outcar))
+    utime(str(outcar), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    tmpdir.join("that", "2", ".pylada_is_running").ensure(file=True)
+
+    after = collect._extractors
+    assert after["/this/1/"] is not before["/this/1/"]
+    assert after["/that/2/"] is not before["/that/2/"]
+    for name in ["/this/0/", "/that/1/", "/this/0/another/"]:
+        assert after[name] is before[name]
+    assert collect.indiv["/this/1/"] == 42
+
+
+def test_dynamic_rescan_prunes_missing_jobs():
+    from pylada.jobfolder import AbstractMassExtract
+
+    class Collect(AbstractMassExtract):
+        def __init__(self, jobs, **kwargs):
+            self.__dict__['jobs'] = jobs
+            super(Collect, self).__init__(**kwargs)
+
+        def __iter_alljobs__(self):
+            for i, job in enumerate(self.jobs):
+                if job is not None:
+                    yield "/{0}/".format(i), job
+
+    jobs = [Failing(2 * i) for i in range(3)]
+    collect = Collect(jobs, dynamic=True, naked_end=False)
+    first = dict(collect._extractors)
+    assert list(first) == ["/0/", "/1/", "/2/"]
+    # jobs without a directory are not re-instantiated.
+    jobs[0] = Failing(10)
+    assert collect._extractors["/0/"] is first["/0/"]
+
+    jobs[1] = None
+    assert list(collect._extractors) == ["/0/", "/2/"]
+    assert set(collect._cached_extractors) == {"/0/", "/2/"}
+    assert set(collect._job_stamps) == {"/0/", "/2/"}
+
+
+def test_job_stamp_follows_output_files(tmpdir):
+    from os import utime, stat
+    from pylada.jobfolder.extract import job_stamp, output_files
+
+    class Output(object):
+        def __init__(self, directory):
+            self.directory = directory
+
+        @property
+        def output_path(self):
+            return tmpdir.join("pwscf.out")
+
+    class Steps(object):
+        def files(self):
+            yield str(tmpdir.join("OUTCAR"))
+            yield str(tmpdir.join("relax_ions", "0", "OUTCAR"))
+
+    assert output_files(None) == ('OUTCAR',)
+    assert output_files(Output(str(tmpdir))) == (str(tmpdir.join("pwscf.out")),)
+    files = output_files(Steps())
+    assert files == (str(tmpdir.join("OUTCAR")), str(tmpdir.join("relax_ions", "0", "OUTCAR")))
+    assert job_stamp(None, files) is None
+
+    tmpdir.join("relax_ions", "0", "OUTCAR").ensure(file=True)
+    stamp = job_stamp(str(tmpdir), files)
+    assert job_stamp(str(tmpdir), files) == stamp
+    tmpdir.join("relax_ions", "0", "OUTCAR").write("step")
+    assert job_stamp(str(tmpdir), files) != stamp
+
+    # new steps change the directory holding the previous ones.
+    stamp = job_stamp(str(tmpdir), files)
+    directory = tmpdir.join("relax_ions")
+    tmpdir.join("relax_ions", "1").ensure(dir=True)
+    st = stat(str(directory))
+    utime(str(directory), ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert job_stamp(str(tmpdir), files) != stamp
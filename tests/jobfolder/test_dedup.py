@@ -0,0 +1,119 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+
+class Functional(object):
+    """ Picklable callable with a largish state. """
+
+    def __init__(self, value):
+        self.value = value
+        self.keywords = {'key{0}'.format(i): list(range(i)) for i in range(50)}
+
+    def __call__(self, **kwargs):
+        return self.value
+
+
+def tree(n=50):
+    from pylada.jobfolder import JobFolder
+    root = JobFolder()
+    for i in range(n):
+        job = root / 'job' / str(i)
+        job.functional = Functional(i % 2)
+        job.params['indiv'] = i
+        job.params['shared'] = [1, 2, 3]
+    return root
+
+
+def test_dedup_shrinks_pickle(tmpdir):
+    from os.path import getsize
+    from pylada.jobfolder import save, load
+
+    root = tree()
+    save(root, str(tmpdir.join('plain')), dedup=False)
+    save(root, str(tmpdir.join('dedup')))
+    assert getsize(str(tmpdir.join('dedup'))) * 10 < getsize(str(tmpdir.join('plain')))
+
+    loaded = load(str(tmpdir.join('dedup')))
+    assert set(loaded.keys()) == set(root.keys())
+    for name, job in root.items():
+        assert loaded[name].params == job.params
+        assert loaded[name].functional.value == job.functional.value
+        assert loaded[name].functional.keywords == job.functional.keywords
+    # copies remain distinct objects
+    assert loaded['job/0'].functional is not loaded['job/2'].functional
+    assert loaded['job/0'].params['shared'] is not loaded['job/2'].params['shared']
+
+    # plain pickles can still be read
+    loaded = load(str(tmpdir.join('plain')))
+    assert loaded['job/3'].functional.value == 1
+
+
+def test_dedup_is_a_plain_pickle(tmpdir):
+    from pickle import load
+    from pylada.jobfolder import save, JobFolder
+
+    path = str(tmpdir.join('dedup'))
+    save(tree(), path)
+    with open(path, 'rb') as file:
+        loaded = load(file)
+    assert isinstance(loaded, JobFolder)
+    assert loaded['job/3'].params['indiv'] == 3
+    assert loaded['job/3'].functional.value == 1
+
+
+def test_dedup_keeps_shared_objects():
+    from pylada.jobfolder.dedup import dumps, loads, targets
+    root = tree(4)
+    functional = Functional(5)
+    for job in root.values():
+        job._functional = functional
+    data, blobs = dumps(root, targets(root.values()))
+    assert len(blobs) == 2
+    loaded = loads(data, blobs)
+    assert loaded['job/0'].functional is loaded['job/3'].functional
+    assert loaded['job/0'].functional.value == 5
+
+
+def test_indexed_stores_blobs_once(tmpdir):
+    from os.path import getsize
+    from pylada.jobfolder import save, load
+    from pylada.jobfolder.storage import FolderStore
+
+    root = tree()
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    store = FolderStore(path)
+    assert len(store.blobs) == 3
+    size = getsize(store.datapath)
+
+    # updates do not rewrite known functionals
+    job = root['job/3']
+    job.params['indiv'] = 'changed'
+    store.update(job)
+    assert len(store.blobs) == 3
+    assert getsize(store.datapath) - size < 1000
+    assert load(path)['job/3'].params['indiv'] == 'changed'
+    assert load(path)['job/3'].functional.value == 1
+
+    store.compact()
+    assert len(store.blobs) == 3
+    assert load(path)['job/3'].params['indiv'] == 'changed'
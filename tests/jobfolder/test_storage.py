@@ -0,0 +1,253 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture
+
+
+@fixture
+def root(functional):
+    from pylada.jobfolder import JobFolder
+    root = JobFolder()
+    for type, trial, size in [('this', 0, 10), ('this', 1, 15), ('that', 2, 20), ('that', 1, 20)]:
+        jobfolder = root / type / trial
+        jobfolder.functional = functional
+        jobfolder.params['indiv'] = size
+        if type == 'that':
+            jobfolder.params['value'] = True
+    root['this/1'].tag()
+    return root
+
+
+def same_tree(a, b):
+    assert set(a.keys()) == set(b.keys())
+    for name, job in a.items():
+        other = b[name]
+        assert job.params == other.params
+        assert job.is_tagged == other.is_tagged
+        assert job.functional is not None
+        assert other.functional is not None
+        assert job.name == other.name
+
+
+def test_save_load_indexed(tmpdir, root):
+    from pylada.jobfolder import save, load
+    from pylada.jobfolder.storage import is_indexed
+
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    assert is_indexed(path)
+    same_tree(root, load(path))
+
+    # format is kept when saving over an indexed file.
+    save(root, path, overwrite=True)
+    assert is_indexed(path)
+
+    save(root, str(tmpdir.join('pickle')))
+    assert not is_indexed(str(tmpdir.join('pickle')))
+
+
+def test_load_subset(tmpdir, root):
+    from pylada.jobfolder import save, load
+
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    partial = load(path, names=['this/0'])
+    assert list(partial.keys()) == ['this/0']
+    assert partial['this/0'].params['indiv'] == 10
+    assert partial['this/0'].name == '/this/0/'
+
+    partial = load(path, names=['/that/'])
+    assert set(partial.keys()) == {'that/1', 'that/2'}
+
+
+def test_single_folder(tmpdir, root):
+    from pytest import raises
+    from pylada.jobfolder.storage import FolderStore
+
+    store = FolderStore(str(tmpdir.join('dict')))
+    store.dump(root)
+    assert store.keys() == ['/', '/that/', '/that/1/', '/that/2/',
+                            '/this/', '/this/0/', '/this/1/']
+    folder = store.folder('this/1')
+    assert folder.parent is None
+    assert len(folder.children) == 0
+    assert folder.is_tagged
+    assert folder.params['indiv'] == 15
+    with raises(KeyError):
+        store.folder('this/2')
+
+
+def test_update_and_remove(tmpdir, root, functional):
+    from pylada.jobfolder import JobFolder
+    from pylada.jobfolder.storage import FolderStore
+
+    store = FolderStore(str(tmpdir.join('dict')))
+    store.dump(root)
+    size = tmpdir.join('dict.data').size()
+
+    folder = store.folder('this/0')
+    folder.params['indiv'] = 42
+    store.update(folder, 'this/0')
+    assert store.folder('/this/0/').params['indiv'] == 42
+    # records are appended, not rewritten.
+    assert tmpdir.join('dict.data').size() > size
+
+    # new folders get missing parents
+    new = JobFolder()
+    new.functional = functional
+    new.params['indiv'] = 5
+    store.update(new, 'other/deep/0')
+    tree = store.load()
+    assert set(tree.keys()) == {'this/0', 'this/1', 'that/1', 'that/2', 'other/deep/0'}
+    assert tree['other/deep/0'].params['indiv'] == 5
+    assert tree['this/0'].params['indiv'] == 42
+
+    store.remove('that')
+    assert set(store.load().keys()) == {'this/0', 'this/1', 'other/deep/0'}
+
+    size = tmpdir.join('dict.data').size()
+    store.compact()
+    assert tmpdir.join('dict.data').size() < size
+    same_tree(tree['this'], store.load()['this'])
+
+
+def test_detects_mismatched_data(tmpdir, root):
+    from pytest import raises
+    from pylada.error import IOError
+    from pylada.jobfolder.storage import FolderStore
+
+    first = FolderStore(str(tmpdir.join('first')))
+    first.dump(root)
+    second = FolderStore(str(tmpdir.join('second')))
+    second.dump(root)
+    tmpdir.join('second.data').copy(tmpdir.join('first.data'))
+    with raises(IOError):
+        first._read_index(retries=2)
+
+
+def test_reads_rewritten_data(tmpdir, root):
+    from os import stat
+    from pylada.jobfolder.storage import FolderStore
+
+    path = str(tmpdir.join('dict'))
+    first = FolderStore(path)
+    first.dump(root)
+    assert first.folder('this/0').params['indiv'] == 10
+
+    # shifts all the records in the new data file.
+    root.params['padding'] = 'x' * 1000
+    root['this/0'].params['indiv'] = 42
+    FolderStore(path).dump(root)
+    # index checked as current, just before the data file is rewritten.
+    st = stat(path)
+    first._index = (st.st_ino, st.st_size, st.st_mtime), first._index[1]
+    assert first.folder('this/0').params['indiv'] == 42
+    assert first.load()['this/0'].params['indiv'] == 42
+
+
+def test_lazy_load(tmpdir, root):
+    from pylada.jobfolder import save, load
+    from pylada.jobfolder.storage import LazyJobFolder
+
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    lazy = load(path, lazy=True)
+    assert isinstance(lazy, LazyJobFolder)
+    # iteration needs neither parameters nor functionals.
+    assert set(lazy.keys()) == set(root.keys())
+    assert lazy['this/1'].is_tagged
+    assert not lazy['this/0'].is_tagged
+    assert '  this/0\n' in lazy.untagged_folders
+    assert not any(u.is_materialized for u in lazy.values())
+
+    job = lazy['/that/2']
+    assert job.name == '/that/2/'
+    assert 'that/2' in lazy and 'that/3' not in lazy
+    assert job.params['indiv'] == 20
+    assert job.value
+    assert job.is_materialized
+    assert not job.is_tagged
+    assert not lazy['this/0'].is_materialized
+    same_tree(root, lazy)
+
+    # tagging an unread folder is seen without reading it.
+    lazy = load(path, lazy=True)
+    lazy['this/0'].tag()
+    assert lazy['this/0'].is_tagged
+    assert not lazy['this/0'].is_materialized
+
+
+class Functional(object):
+    """ Picklable callable, unpickled to a new object each time. """
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self, **kwargs):
+        return self.value
+
+
+def test_lazy_functionals_are_copies(tmpdir, root):
+    from pickle import loads, dumps
+    from pylada.jobfolder import save, load
+
+    for name, job in root.items():
+        job.functional = Functional(0 if name == 'that/1' else 1)
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    lazy = load(path, lazy=True)
+    assert lazy['this/0'].functional is not lazy['this/1'].functional
+    assert lazy['that/1'].functional.value == 0
+    # identical functionals are read once, but each folder has its own copy.
+    lazy['this/0'].functional.value = 99
+    assert lazy['this/1'].functional.value == 1
+    assert lazy['that/2'].functional.value == 1
+    save(lazy, path, overwrite=True)
+    reloaded = load(path)
+    assert reloaded['this/0'].functional.value == 99
+    assert reloaded['this/1'].functional.value == 1
+    assert reloaded['that/2'].functional.value == 1
+    # plain loading still gives each folder its own copy.
+    eager = load(path)
+    assert eager['this/0'].functional is not eager['this/1'].functional
+
+    # pickling materializes the lazy tree.
+    same_tree(root, loads(dumps(lazy)))
+
+
+def test_lazy_tree_modifications(tmpdir, root, functional):
+    from pylada.jobfolder import save, load
+
+    path = str(tmpdir.join('dict'))
+    save(root, path, indexed=True)
+    lazy = load(path, lazy=True)
+
+    lazy['this/1'].untag()
+    assert not lazy['this/1'].is_tagged
+    del lazy['that/2']
+    assert 'that/2' not in lazy
+    with_new = lazy / 'that' / '2'
+    assert lazy['that/2'] is with_new
+    assert lazy['this']['../that/1'] is lazy['that/1']
+    job = lazy / 'new' / 'job'
+    job.functional = functional
+    assert lazy['new/job'].name == '/new/job/'
+    assert 'new/job' in set(lazy.keys())
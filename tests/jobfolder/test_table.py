@@ -0,0 +1,134 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture, importorskip, raises
+
+
+class Job(object):
+    def __init__(self, i):
+        self.i = i
+
+    @property
+    def energy(self):
+        from quantities import eV
+        return self.i * eV
+
+    @property
+    def eigenvalues(self):
+        from numpy import arange
+        from quantities import eV
+        return arange(2.0 * self.i).reshape(-1, 2) * eV
+
+    @property
+    def name(self):
+        return "job{0}".format(self.i)
+
+    @property
+    def forces(self):
+        from numpy import ones
+        if self.i == 1:
+            raise RuntimeError("no forces")
+        return ones((2, 3)) * self.i
+
+    @property
+    def gap(self):
+        return None if self.i == 2 else 0.5 * self.i
+
+
+@fixture
+def collect():
+    from pylada.jobfolder import AbstractMassExtract
+
+    class Collect(AbstractMassExtract):
+        def __iter_alljobs__(self):
+            for i in range(4):
+                yield "/{0}/".format(i), Job(i)
+
+    return Collect()
+
+
+def test_fixed_columns(collect):
+    from numpy import all, recarray
+    table = collect.to_table(['energy', 'name'])
+    assert isinstance(table.records, recarray)
+    assert len(table) == 4
+    assert list(table.records.job) == ["/{0}/".format(i) for i in range(4)]
+    assert all(table['energy'] == [0, 1, 2, 3])
+    assert list(table['name']) == ["job{0}".format(i) for i in range(4)]
+    assert table.units == {'energy': 'eV'}
+    assert table.records.dtype.fields['energy'][0].metadata == {'units': 'eV'}
+    assert table.missing == {}
+
+
+def test_ragged_columns(collect):
+    from numpy import all, arange
+    table = collect.to_table('eigenvalues')
+    values, offsets = table.ragged['eigenvalues']
+    assert list(offsets) == [0, 0, 1, 3, 6]
+    assert values.shape == (6, 2)
+    for i, value in enumerate(table['eigenvalues']):
+        assert all(value == arange(2.0 * i).reshape(-1, 2))
+    assert table.units == {'eigenvalues': 'eV'}
+    assert table.columns == ['eigenvalues']
+
+
+def test_missing_values(collect):
+    table = collect.to_table(['forces'])
+    assert list(table.missing['forces']) == [False, True, False, False]
+    assert table['forces'].shape == (4, 2, 3)
+    assert (table['forces'][1] == 0).all()
+    assert list(table.failures['forces']) == ['/1/']
+    assert isinstance(table.failures['forces']['/1/'], RuntimeError)
+    # errors of the mass-extraction object keep their own {job: error} shape
+    assert collect.failures == {}
+
+
+def test_none_values_are_missing(collect):
+    table = collect.to_table(['gap', 'eigenvalues'])
+    assert list(table.missing['gap']) == [False, False, True, False]
+    assert list(table['gap']) == [0, 0.5, 0, 1.5]
+    assert 'eigenvalues' not in table.missing
+    assert table.failures == {}
+
+
+def test_unknown_property(collect):
+    from pylada.error import AttributeError
+    with raises(AttributeError):
+        collect.to_table(['nothere'])
+
+
+def test_to_arrow(collect):
+    importorskip('pyarrow')
+    arrow = collect.to_table(['energy', 'eigenvalues', 'forces']).to_arrow()
+    assert arrow.num_rows == 4
+    assert arrow.schema.field('energy').metadata == {b'units': b'eV'}
+    assert arrow.column('eigenvalues').to_pylist()[2] == [[0, 1], [2, 3]]
+
+
+def test_to_hdf5(collect, tmpdir):
+    importorskip('h5py')
+    from h5py import File
+    path = str(tmpdir.join('table.h5'))
+    collect.to_table(['energy', 'name', 'eigenvalues']).to_hdf5(path)
+    with File(path, 'r') as file:
+        assert list(file['energy'][()]) == [0, 1, 2, 3]
+        assert file['energy'].attrs['units'] == 'eV'
+        assert list(file['eigenvalues/offsets'][()]) == [0, 0, 1, 3, 6]
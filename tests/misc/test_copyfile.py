@@ -0,0 +1,75 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture, mark
+
+
+@fixture
+def source(tmpdir):
+    path = tmpdir.join('WAVECAR')
+    path.write_binary(bytes(range(256)) * 5000)
+    return str(path)
+
+
+@mark.parametrize('fsync', [True, False])
+def test_copy(source, tmpdir, fsync):
+    from os import stat
+    from pylada.misc import copyfile
+    destination = str(tmpdir.join('copy'))
+    report = copyfile(source, destination, fsync=fsync, report=True)
+    assert report.method in ('reflink', 'copy_file_range', 'sendfile', 'chunks')
+    assert report.nbytes == 256 * 5000
+    assert report.seconds >= 0
+    assert open(destination, 'rb').read() == open(source, 'rb').read()
+    assert stat(destination).st_ino != stat(source).st_ino
+
+
+def test_hardlink(source, tmpdir):
+    from os import stat
+    from pylada.misc import copyfile
+    destination = tmpdir.join('restart')
+    destination.ensure(dir=True)
+    assert copyfile(source, str(destination)) is True
+    report = copyfile(source, str(destination), hardlink=True, report=True)
+    assert report.method == 'hardlink'
+    assert stat(str(destination.join('WAVECAR'))).st_ino == stat(source).st_ino
+
+
+def test_chunks_fallback(source, tmpdir, monkeypatch):
+    import pylada.misc
+    from pylada.misc import copyfile
+
+    def fail(*args):
+        raise OSError("not supported")
+    monkeypatch.setattr(pylada.misc, '_reflink', fail)
+    monkeypatch.setattr(pylada.misc, '_kernel_copy', fail)
+    destination = str(tmpdir.join('copy'))
+    assert copyfile(source, destination, report=True).method == 'chunks'
+    assert open(destination, 'rb').read() == open(source, 'rb').read()
+
+
+def test_empty(tmpdir):
+    from pylada.misc import copyfile
+    source = tmpdir.join('empty')
+    source.ensure(file=True)
+    report = copyfile(str(source), str(tmpdir.join('copy')), report=True)
+    assert report.method == 'empty' and report.nbytes == 0
+    assert tmpdir.join('copy').check(file=True)
@@ -110,3 +110,58 @@ def test_full_execution(executable, tmpdir, comm):
     program.start(comm)
     program.wait()
     assert True
+
+
+def test_script_loads_shared_blobs(tmpdir):
+    from sys import executable
+    from subprocess import check_call
+    from os.path import dirname
+    from pylada.process.call import CallProcess
+
+    scripts = []
+    for name in ['a', 'b']:
+        program = CallProcess(dict, outdir=str(tmpdir.join(name)), dompi=False,
+                              blobdir=str(tmpdir.join('blobs')), value=name)
+        program._comm = None
+        scripts.append(program._write_script())
+        assert dirname(scripts[-1]) == str(tmpdir.join(name))
+        check_call([executable, scripts[-1]])
+
+    # the functional is stored once, the parameters next to each script.
+    assert len(tmpdir.join('blobs').listdir()) == 1
+    texts = [open(u).read() for u in scripts]
+    functional = [u for u in texts[0].splitlines() if u in texts[1].splitlines()
+                  and '.pickle' in u]
+    assert len(functional) == 1
+    assert all(len(u) < 1000 for u in texts)
+    assert len(tmpdir.join('a').listdir('*.pickle')) == 1
+
+    # cleanup removes the script along with its parameters.
+    del program._comm
+    program._stdin = scripts[-1]
+    program._cleanup()
+    assert tmpdir.join('b').listdir('*.py') == []
+    assert tmpdir.join('b').listdir('*.pickle') == []
+
+
+def test_driver_pickles_functionals_once(tmpdir, monkeypatch):
+    from pylada.jobfolder import JobFolder
+    from pylada.process import call
+    from pylada.process.jobfolder import JobFolderProcess
+
+    calls = []
+    write_blob = call.write_blob
+
+    def counted(obj, directory):
+        calls.append(obj)
+        return write_blob(obj, directory)
+    monkeypatch.setattr(call, 'write_blob', counted)
+
+    root = JobFolder()
+    shared = dict
+    for name in ['a', 'b', 'c']:
+        root / name
+        root[name]._functional = shared
+    process = JobFolderProcess(root, str(tmpdir))
+    paths = {process._blob(u.functional) for u in root.values()}
+    assert len(paths) == 1 and len(calls) == 1
@@ -176,6 +176,33 @@ def test_restart_failed_job(tmpdir, comm, root, executable, Process,
     assert program.nbjobsleft == 0
 
 
+@mpi4py_required
+@mark.parametrize('Process', [jobfolder_process, pool_process])
+def test_journal_resume(tmpdir, comm, root, executable, Process,
+                        do_multiple_mpi_programs):
+    from pytest import raises
+    from pylada.process import Fail
+    from pylada.process.journal import Journal
+
+    journal = Journal(str(tmpdir.join('dict.journal')))
+    with raises(Fail):
+        job = root / str(666)
+        job.functional = FakeFunctional(executable, [50], fail='end')
+        program = Process(tmpdir, root, journal=journal)
+        program.start(comm)
+        program.wait()
+
+    events = journal.replay()
+    assert len(events) == 9
+    assert events['666'][0] == 'fail'
+    assert sum(u[0] == 'finish' for u in events.values()) == 8
+
+    # only the failed job is left when restarting from the journal.
+    program = Process(tmpdir, root, journal=str(journal.path))
+    assert program.nbjobsleft == 1
+    assert len(program._finished) == 8
+
+
 @mpi4py_required
 @mark.parametrize('Process', [jobfolder_process, pool_process])
 def test_update(tmpdir, executable, comm, Process, do_multiple_mpi_programs):
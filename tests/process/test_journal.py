@@ -0,0 +1,69 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+
+def test_journal_replay(tmpdir):
+    from pylada.process.journal import Journal
+
+    journal = Journal(str(tmpdir.join('jobs.journal')))
+    assert journal.replay() == {}
+    journal.start('/a/')
+    journal.start('/b/')
+    journal.finish('/a/')
+    journal.fail('/b/', 2)
+    journal.start('/c/')
+
+    events = journal.replay()
+    assert events['/a/'][0] == 'finish'
+    assert events['/b/'][0] == 'fail'
+    assert events['/b/'][2] == '2'
+    assert events['/c/'][0] == 'start'
+    assert journal.finished == {'/a/'}
+
+    # restarting a failed job
+    journal.start('/b/')
+    journal.finish('/b/')
+    assert journal.finished == {'/a/', '/b/'}
+
+
+def test_journal_ignores_torn_lines(tmpdir):
+    from pylada.process.journal import Journal
+
+    path = tmpdir.join('jobs.journal')
+    journal = Journal(str(path))
+    journal.finish('/a/')
+    with path.open('a') as file:
+        file.write('garbage\n')
+        file.write('1234.5 finish - /b')
+    assert journal.finished == {'/a/'}
+
+
+def test_journal_rejects_unknown_events(tmpdir):
+    from pytest import raises
+    from pylada.error import ValueError
+    from pylada.process.journal import Journal
+
+    journal = Journal(str(tmpdir.join('jobs.journal')))
+    with raises(ValueError):
+        journal.record('paused', '/a/')
+    with raises(ValueError):
+        journal.start('/a b/')
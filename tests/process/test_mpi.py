@@ -172,6 +172,105 @@ def test_mpicomm(doplacement):
     else:
         raise Exception()
 
+def test_compact_placement(doplacement):
+    """ Jobs span as few hosts as possible and keep whole nodes free. """
+    from pylada.process.mpi import Communicator
+
+    root = Communicator(n=40)
+    root.machines["node00"] = 3
+    root.machines["node01"] = 8
+    root.machines["node02"] = 8
+    root.machines["node03"] = 5
+    root.machines["node04"] = 16
+
+    # fits exactly on the partially used node
+    comm = root.lend(5)
+    assert comm.machines == {"node03": 5}
+    comm.cleanup()
+
+    # best fit leaves whole 8-slot nodes intact
+    comm = root.lend(2)
+    assert comm.machines == {"node00": 2}
+    comm.cleanup()
+
+    # too large for any node: largest node first, then best fit
+    comm = root.lend(21)
+    assert comm.machines == {"node04": 16, "node03": 5}
+    assert root['n'] == 19
+    comm.cleanup()
+    assert root['n'] == 40
+
+
+def test_fragmentation(doplacement):
+    from pylada.process.mpi import Communicator
+
+    root = Communicator(n=32)
+    for i in range(4):
+        root.machines["node0{0}".format(i)] = 8
+    # whole free nodes are not fragmented
+    assert root.fragmentation == 0
+    comms = root.split(4)
+    assert root.fragmentation == 0
+    for comm in comms:
+        comm.cleanup()
+    assert root.fragmentation == 0
+
+    # five slots stranded on node00, node01 still whole
+    comm = root.lend(3)
+    assert abs(root.fragmentation - 5.0 / 29.0) < 1e-8
+    comm.cleanup()
+    assert root.fragmentation == 0
+
+    # every free slot is left over on a partially used node
+    comms = [root.lend(5) for i in range(4)]
+    assert root['n'] == 12
+    assert root.fragmentation == 1
+    for comm in comms:
+        comm.cleanup()
+    assert root.fragmentation == 0
+
+    root = Communicator(n=8)
+    root.machines["node00"] = 8
+    assert root.fragmentation == 0
+    comm = root.lend(3)
+    assert root.fragmentation == 1
+    comm.cleanup()
+    assert root.fragmentation == 0
+
+
+def test_persistent_freelist(doplacement):
+    from random import Random
+    from pylada.process.mpi import Communicator
+
+    root = Communicator(n=64)
+    for i in range(8):
+        root.machines["node0{0}".format(i)] = 8
+    comm = root.lend(3)
+    freelist = root._freelist
+    comms, random = [comm], Random(3)
+    for i in range(200):
+        if len(comms) and (root['n'] == 0 or random.random() < 0.5):
+            comms.pop(random.randrange(len(comms))).cleanup()
+        else:
+            comms.append(root.lend(random.randint(1, min(root['n'], 12))))
+        # the free-list is updated in place, along with its running totals.
+        assert root._freelist is freelist
+        assert freelist.total == sum(root.machines.values()) == root['n']
+        stranded = sum(u for u in root.machines.values() if u < 8)
+        assert abs(root.fragmentation - (float(stranded) / root['n'] if root['n'] else 0)) < 1e-8
+    for comm in comms:
+        comm.cleanup()
+    assert root.machines == {"node0{0}".format(i): 8 for i in range(8)}
+
+    # direct modifications of the machines are picked up.
+    root.machines["node08"] = 4
+    root['n'] += 4
+    comm = root.lend(4)
+    assert comm.machines == {"node08": 4}
+    assert root._freelist is not freelist
+    comm.cleanup()
+
+
 if __name__ == "__main__":
     from sys import argv, path
     from os.path import abspath
@@ -0,0 +1,93 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+
+from pylada.tools.input import BaseKeyword
+
+
+class Counted(BaseKeyword):
+    """ Renders the value of another keyword, and counts calls. """
+    depends = ('other', 'structure')
+
+    def __init__(self, keyword=None, calls=None):
+        super(Counted, self).__init__(keyword=keyword)
+        self.calls = [] if calls is None else calls
+
+    def output_map(self, **kwargs):
+        self.calls.append(self.keyword)
+        return {self.keyword: '{0} {1}'.format(kwargs['owner'].other, kwargs['structure'])}
+
+
+class Setter(BaseKeyword):
+    """ Modifies another keyword when rendered. """
+    modifies = ('other',)
+
+    def output_map(self, **kwargs):
+        kwargs['owner'].other = 'set'
+        return None
+
+
+def test_dependency_order():
+    from pylada.tools.input import AttrBlock
+
+    block = AttrBlock()
+    block.counted = Counted()
+    block.add_keyword('other', 'unset')
+    block.setter = Setter()
+    order = block._output_order()
+    assert order.index('setter') < order.index('counted')
+    assert block._output_order() is order
+    # map follows the input order, with all modifications applied.
+    assert block.output_map(owner=block, structure=1) \
+        == [('counted', 'set 1'), ('other', 'set')]
+
+
+def test_circular_dependencies():
+    from pylada.tools.input.block import _dependency_order
+
+    class A(BaseKeyword):
+        depends = ('b',)
+
+    class B(BaseKeyword):
+        depends = ('a',)
+
+    order = _dependency_order({'a': A(), 'b': B(), 'c': None})
+    assert sorted(order) == ['a', 'b', 'c']
+    assert order.index('a') < order.index('b')
+
+
+def test_output_is_cached():
+    from pickle import loads, dumps
+    from pylada.tools.input import AttrBlock
+
+    calls = []
+    block = AttrBlock()
+    block.add_keyword('other', 'a')
+    block.counted = Counted(calls=calls)
+    assert block.output_map(owner=block, structure=1)['counted'] == 'a 1'
+    assert block.output_map(owner=block, structure=1)['counted'] == 'a 1'
+    assert len(calls) == 1
+    block.other = 'b'
+    assert block.output_map(owner=block, structure=1)['counted'] == 'b 1'
+    assert block.output_map(owner=block, structure=2)['counted'] == 'b 2'
+    assert len(calls) == 3
+    assert '_output_cache' not in loads(dumps(block)).__dict__
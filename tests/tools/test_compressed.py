@@ -0,0 +1,168 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from os.path import join, dirname
+from pytest import fixture, mark, importorskip
+
+COMMON = join(dirname(dirname(__file__)), 'vasp', 'extract', 'data', 'COMMON')
+FORMATS = ['gz', 'xz', 'zst']
+
+
+@fixture
+def outcar(tmpdir):
+    from shutil import copyfile
+    path = str(tmpdir.join('OUTCAR'))
+    copyfile(COMMON, path)
+    return path
+
+
+def compressed(outcar, format):
+    from pylada.tools.compressed import compress
+    if format == 'zst':
+        importorskip('zstandard')
+    return compress(outcar, format)
+
+
+@mark.parametrize('format', FORMATS)
+def test_roundtrip(outcar, format):
+    from os.path import exists, getmtime
+    from pylada.tools.compressed import open_output, find_output
+    expected = open(COMMON, 'rb').read()
+    mtime = getmtime(outcar)
+    path = compressed(outcar, format)
+    assert not exists(outcar)
+    assert path == outcar + '.' + format
+    assert find_output(outcar) == path
+    assert getmtime(path) == mtime
+    with open_output(outcar, 'rb') as file:
+        assert file.read() == expected
+    with open_output(outcar) as file:
+        assert file.read() == expected.decode()
+
+
+def test_blocked_gzip_is_gzip(outcar):
+    from gzip import open as gzip_open
+    expected = open(COMMON, 'rb').read()
+    with gzip_open(compressed(outcar, 'gz'), 'rb') as file:
+        assert file.read() == expected
+
+
+@mark.parametrize('format', ['gz', 'zst'])
+def test_random_access(outcar, format):
+    from pylada.tools.compressed import open_output, BlockView
+    from pylada.tools.extract import map_file
+    expected = open(COMMON, 'rb').read()
+    compressed(outcar, format)
+    with open_output(outcar, 'rb') as file:
+        file.seek(len(expected) - 100)
+        assert file.read() == expected[-100:]
+        file.seek(1000)
+        assert file.readline() == expected[1000:expected.index(b'\n', 1000) + 1]
+        view = map_file(file, lazy=True)
+        assert isinstance(view, BlockView)
+        assert len(view) == len(expected)
+        assert view[-50:-10] == expected[-50:-10]
+        assert view.rfind(b'\n', 0, 40000) == expected.rfind(b'\n', 0, 40000)
+        assert view.rfind(b'POSITION') == expected.rfind(b'POSITION')
+
+
+@mark.parametrize('format', FORMATS)
+def test_extract_reads_compressed(outcar, format):
+    from numpy import allclose
+    from pylada.vasp import Extract
+    expected = Extract(COMMON)
+    compressed(outcar, format)
+    extract = Extract(dirname(outcar))
+    assert extract.success
+    assert allclose(extract.total_energies.magnitude, expected.total_energies.magnitude)
+    assert allclose(extract.forces.magnitude, expected.forces.magnitude)
+    assert allclose(extract.eigenvalues.magnitude, expected.eigenvalues.magnitude)
+    assert allclose(extract.structure.cell, expected.structure.cell)
+    assert list(extract.files()) == [outcar + '.' + format]
+
+
+def test_compact_skips_compressed(tmpdir, outcar):
+    from pylada.tools.compressed import compact
+    other = str(tmpdir.join('CONTCAR'))
+    with open(other, 'w') as file:
+        file.write('contcar')
+    results = compact([outcar, other], nworkers=2)
+    assert results == [(outcar, outcar + '.gz'), (other, other + '.gz')]
+    assert compact([v for u, v in results]) == []
+
+
+@mark.parametrize('format', ['gz', 'zst'])
+def test_section_index_is_lazy(outcar, format, monkeypatch):
+    from pylada.tools import sections
+    from pylada.tools.compressed import open_output
+    from pylada.vasp.extract.outcar import OutcarIndex
+    with open(outcar, 'rb') as file:
+        expected = OutcarIndex(file).sections
+    compressed(outcar, format)
+    monkeypatch.setattr(sections, 'SCAN_SIZE', 1000)
+    monkeypatch.setattr(sections, 'SCAN_OVERLAP', 200)
+    with open_output(outcar, 'rb') as file:
+        assert OutcarIndex(file).sections == expected
+
+
+def test_block_table_is_cached(outcar, monkeypatch):
+    from os import stat, utime
+    from pylada.tools import compressed as module
+    from pylada.tools.compressed import open_output
+    path = compressed(outcar, 'gz')
+    calls, original = [], module._bgzf_blocks
+
+    def blocks(file):
+        calls.append(file.name)
+        return original(file)
+    monkeypatch.setattr(module, '_bgzf_blocks', blocks)
+    for i in range(2):
+        with open_output(outcar, 'rb') as file:
+            file.read()
+    assert len(calls) == 1
+    info = stat(path)
+    utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 1000))
+    with open_output(outcar, 'rb') as file:
+        file.read()
+    assert len(calls) == 2
+
+
+def test_sequential_zstd(outcar):
+    from os import remove
+    from pylada.tools.compressed import open_output
+    from pylada.vasp import Extract
+    zstandard = importorskip('zstandard')
+    expected = open(COMMON, 'rb').read()
+    with open(outcar + '.zst', 'wb') as file:
+        file.write(zstandard.ZstdCompressor().compress(expected))
+    remove(outcar)
+    with open_output(outcar, 'rb') as file:
+        assert file.name == outcar + '.zst'
+        assert file.read() == expected
+        file.seek(1000)
+        assert file.read(100) == expected[1000:1100]
+        file.seek(-100, 2)
+        assert file.read() == expected[-100:]
+        file.seek(0)
+        assert file.read(100) == expected[:100]
+    extract = Extract(dirname(outcar))
+    assert extract.success
+    assert extract.total_energy == Extract(COMMON).total_energy
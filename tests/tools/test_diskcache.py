@@ -0,0 +1,133 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from os.path import join, dirname
+from pytest import fixture
+
+COMMON = join(dirname(dirname(__file__)), 'vasp', 'extract', 'data', 'COMMON')
+
+
+@fixture
+def cache(tmpdir, monkeypatch):
+    import pylada
+    path = str(tmpdir.join('cache.sqlite'))
+    monkeypatch.setattr(pylada, 'extraction_cache', path, raising=False)
+    monkeypatch.setattr(pylada, 'extraction_cache_size', None, raising=False)
+    return path
+
+
+@fixture
+def outdir(tmpdir):
+    from shutil import copyfile
+    result = tmpdir.join('calc')
+    result.ensure(dir=True)
+    copyfile(COMMON, str(result.join('OUTCAR')))
+    return result
+
+
+def test_persistent_properties(cache, outdir):
+    from pickle import dumps
+    from quantities import eV
+    from pylada.vasp import Extract
+    from pylada.tools.diskcache import extraction_cache
+
+    assert abs(Extract(str(outdir)).total_energy + 10.665642 * eV) < 1e-5
+    assert len(extraction_cache()) > 0
+
+    # new objects are served from disk
+    with extraction_cache().connection as connection:
+        connection.execute("UPDATE properties SET value=? WHERE name LIKE '%.total_energy'",
+                           (dumps(1.5),))
+    assert Extract(str(outdir)).total_energy == 1.5
+
+    # changes to the OUTCAR invalidate the cache.
+    with outdir.join('OUTCAR').open('a') as file:
+        file.write('\n')
+    assert abs(Extract(str(outdir)).total_energy + 10.665642 * eV) < 1e-5
+
+
+def test_contcar_changes(cache, outdir):
+    from numpy import allclose
+    from pylada.crystal import write
+    from pylada.vasp import Extract
+
+    structure = Extract(str(outdir))._grep_structure
+    write.poscar(structure, str(outdir.join('CONTCAR')), vasp5=True)
+    volume = Extract(str(outdir)).volume
+    assert allclose(Extract(str(outdir)).structure.cell, structure.cell)
+
+    # rewriting the CONTCAR invalidates the structure and derived properties.
+    structure.cell = structure.cell * 2
+    write.poscar(structure, str(outdir.join('CONTCAR')), vasp5=True)
+    extract = Extract(str(outdir))
+    assert allclose(extract.structure.cell, structure.cell)
+    assert abs(extract.volume / volume - 8) < 1e-8
+
+
+def test_not_persistent(cache, outdir):
+    from pylada.tools import make_cached
+    from pylada.tools.diskcache import file_stamp
+
+    calls = []
+
+    class Extract(object):
+        def _persistent_key(self):
+            return file_stamp(str(outdir.join('OUTCAR')))
+
+        @property
+        @make_cached
+        def stored(self):
+            calls.append('stored')
+            return 1
+
+        @property
+        @make_cached(persistent=False)
+        def contcar(self):
+            calls.append('contcar')
+            return 2
+
+    for i in range(2):
+        extract = Extract()
+        assert extract.stored == 1 and extract.stored == 1
+        assert extract.contcar == 2 and extract.contcar == 2
+    assert calls == ['stored', 'contcar', 'contcar']
+
+
+def test_disabled_by_default(outdir, monkeypatch):
+    import pylada
+    from pylada.vasp import Extract
+    from pylada.tools.diskcache import extraction_cache
+    monkeypatch.setattr(pylada, 'extraction_cache', None, raising=False)
+    assert extraction_cache() is None
+    assert Extract(str(outdir)).success
+
+
+def test_eviction(tmpdir):
+    from pylada.tools.diskcache import ExtractionCache
+
+    cache = ExtractionCache(str(tmpdir.join('cache.sqlite')), maxsize=5000)
+    for i in range(20):
+        cache.set('/path/{0}'.format(i), 'value', 'stamp', b'0' * 1000)
+    cache.evict()
+    assert len(cache) <= 5
+    assert cache.get('/path/19', 'value', 'stamp')[0]
+    assert not cache.get('/path/0', 'value', 'stamp')[0]
+    assert not cache.get('/path/19', 'value', 'other')[0]
@@ -0,0 +1,69 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture, mark
+
+
+@fixture
+def extract(tmpdir):
+    from pylada.tools.extract import search_factory
+    lines = ["line {0}: value = {1}\n".format(i, i * 0.5) for i in range(5000)]
+    lines[10] = "  MAGIC\n  first\n"
+    lines[4000] = "  MAGIC\n  second\n"
+    tmpdir.join('OUTCAR').write(''.join(lines) + 'no end of line')
+
+    class Extract(search_factory('OutcarSearchMixin', 'OUTCAR', __name__)):
+        directory = str(tmpdir)
+    return Extract()
+
+
+@mark.parametrize('blocksize', [7, 100, 1 << 16])
+def test_rsearch_lines(extract, blocksize, monkeypatch):
+    from pylada.tools import extract as module
+    monkeypatch.setattr(module, 'BLOCKSIZE', blocksize)
+
+    found = [u.group(1) for u in extract._rsearch_OUTCAR(r"line (\d+):")]
+    expected = [str(i) for i in range(5000) if i not in (10, 4000)][::-1]
+    assert found == expected
+    assert extract._find_last_OUTCAR(r"value = (\S+)").group(1) == '2499.5'
+    assert extract._find_last_OUTCAR(r"no end of (\S+)").group(1) == 'line'
+    assert extract._find_last_OUTCAR(r"missing") is None
+
+
+@mark.parametrize('blocksize', [7, 100, 1 << 16])
+def test_rsearch_multiline(extract, blocksize, monkeypatch):
+    from re import M
+    from pylada.tools import extract as module
+    monkeypatch.setattr(module, 'BLOCKSIZE', blocksize)
+
+    found = [u.group(1) for u in extract._rsearch_OUTCAR(r"\s*MAGIC\s*\n\s*(\S+)", M)]
+    assert found == ['second', 'first']
+    assert extract._find_last_OUTCAR(r"^line 4999: value = (\S+)\n", M).group(1) == '2499.5'
+    assert extract._find_last_OUTCAR(r"missing\n", M) is None
+
+
+def test_rsearch_empty(tmpdir):
+    from pylada.tools.extract import search_factory
+    tmpdir.join('OUTCAR').write('')
+
+    class Extract(search_factory('OutcarSearchMixin', 'OUTCAR', __name__)):
+        directory = str(tmpdir)
+    assert Extract()._find_last_OUTCAR("anything") is None
@@ -0,0 +1,121 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to
+#  submit large numbers of jobs on supercomputers. It provides a python interface to physical input,
+#  such as crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential
+#  programs. It is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU
+#  General Public License as published by the Free Software Foundation, either version 3 of the
+#  License, or (at your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture, mark
+from pytest import raises
+
+
+class Holder(object):
+    """ Object described through its dictionary. """
+    pass
+
+
+@fixture
+def allow_tests(monkeypatch):
+    """ Allows references to classes from this module. """
+    from pylada.tools import json
+    monkeypatch.setattr(json, 'ALLOWED_MODULES', json.ALLOWED_MODULES + (__name__,))
+
+
+def test_roundtrip(allow_tests):
+    from collections import OrderedDict
+    from numpy import array, float32, all
+    from quantities import eV, angstrom
+    from pylada.tools.json import dumps_state, loads_state
+
+    holder = Holder()
+    holder.values = [1, 2.5, 'a', None, True, (1, 2), {1, 2}]
+    holder.mapping = {'a': 1, (0, 1): 'b', '__pylada__': 3}
+    holder.ordered = OrderedDict([('b', 1), ('a', 2)])
+    holder.array = array([[1, 2], [3, 4]], dtype='int32')
+    holder.scalar = float32(0.5)
+    holder.quantity = array([1.0, 2.0]) * eV / angstrom
+    holder.type = float
+
+    result = loads_state(dumps_state(holder))
+    assert isinstance(result, Holder)
+    assert result.values == holder.values
+    assert result.mapping == holder.mapping
+    assert isinstance(result.ordered, OrderedDict)
+    assert list(result.ordered.items()) == [('b', 1), ('a', 2)]
+    assert result.array.dtype == holder.array.dtype and all(result.array == holder.array)
+    assert isinstance(result.scalar, float32)
+    assert all(result.quantity == holder.quantity)
+    assert result.quantity.units == holder.quantity.units
+    assert result.type is float
+
+
+def test_cannot_describe(allow_tests):
+    from pylada.tools.json import dumps_state
+    holder = Holder()
+    holder.function = lambda x: x
+    with raises(ValueError):
+        dumps_state(holder)
+
+    class Local(object):
+        pass
+    with raises(ValueError):
+        dumps_state(Local())
+
+
+def test_cannot_describe_outside_allowed_modules():
+    from pylada.tools.json import dumps_state
+    with raises(ValueError):
+        dumps_state(Holder())
+
+
+def test_refuses_references():
+    from json import dumps
+    from pylada.tools.json import loads_state, TAG, STATE_FORMAT
+
+    def load(state):
+        return loads_state(dumps({'format': STATE_FORMAT, 'state': state}))
+
+    assert load({TAG: 'ref', 'ref': 'builtins:int'}) is int
+    with raises(ValueError):
+        load({TAG: 'ref', 'ref': 'builtins:print'})
+    with raises(ValueError):
+        load({TAG: 'ref', 'ref': 'os:system'})
+    with raises(ValueError):
+        load({TAG: 'object', 'ref': 'pylada.tools.json:dumps_state', 'state': {}})
+    with raises(ValueError):
+        load({TAG: 'dict', 'ref': 'builtins:list', 'items': [['a', 1]]})
+    with raises(ValueError):
+        load({TAG: 'dict', 'ref': 'pylada.tools.json:dumps_state', 'items': [['a', 1]]})
+
+
+def test_load_is_cached(tmpdir):
+    from os import utime, stat
+    from pylada.tools.json import dump_state, load_state
+
+    path = str(tmpdir.join('state.json'))
+    dump_state({'a': 1}, path)
+    first = load_state(path)
+    assert first == {'a': 1}
+    first['a'] = 3
+    second = load_state(path)
+    assert second == {'a': 1}
+    assert second is not first
+
+    dump_state({'a': 2}, path)
+    info = stat(path)
+    utime(path, ns=(info.st_atime_ns, info.st_mtime_ns + 1000))
+    assert load_state(path) == {'a': 2}
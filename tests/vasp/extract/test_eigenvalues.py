@@ -0,0 +1,111 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+
+BLOCK = """
+ k-point     1 :       0.0000    0.0000    0.0000
+  band No.  band energies     occupation
+      1      -5.{0}000      1.00000
+      2       1.{0}000      0.00000
+      3       2.{0}000      0.00000
+
+ k-point     2 :       0.5000    0.0000    0.0000
+  band No.  band energies     occupation
+      1      -4.{0}000      1.00000
+      2       2.{0}000      0.50000
+      3       3.{0}000      0.00000
+
+"""
+
+
+def write_outcar(tmpdir, ispin, steps=2):
+    lines = ["   IALGO  =     68    algorithm\n",
+             "   ISPIN  =      {0}    spin polarized calculation?\n".format(ispin)]
+    for step in range(steps):
+        if ispin == 1:
+            lines.append(BLOCK.format(step))
+        else:
+            lines.append(" spin component 1\n" + BLOCK.format(step))
+            lines.append(" spin component 2\n" + BLOCK.format(step + 5))
+        lines.append(" ------------------------------------------\n")
+    tmpdir.join('OUTCAR').write(''.join(lines))
+
+
+def test_unpolarized(tmpdir):
+    from numpy import all, abs
+    from quantities import eV
+    from pylada.vasp import Extract
+
+    write_outcar(tmpdir, 1)
+    a = Extract(str(tmpdir))
+    assert a.eigenvalues.shape == (2, 3)
+    assert a.eigenvalues.units == eV
+    assert all(abs(a.eigenvalues.magnitude - [[-5.1, 1.1, 2.1], [-4.1, 2.1, 3.1]]) < 1e-8)
+    assert all(abs(a.occupations - [[1, 0, 0], [1, 0.5, 0]]) < 1e-8)
+
+
+def test_spin_polarized(tmpdir):
+    from numpy import all, abs
+    from pylada.vasp import Extract
+
+    write_outcar(tmpdir, 2)
+    a = Extract(str(tmpdir))
+    assert a.eigenvalues.shape == (2, 2, 3)
+    assert all(abs(a.eigenvalues[0].magnitude - [[-5.1, 1.1, 2.1], [-4.1, 2.1, 3.1]]) < 1e-8)
+    assert all(abs(a.eigenvalues[1].magnitude - [[-5.6, 1.6, 2.6], [-4.6, 2.6, 3.6]]) < 1e-8)
+    assert a.occupations.dtype == 'float64'
+    assert all(abs(a.occupations[1] - [[1, 0, 0], [1, 0.5, 0]]) < 1e-8)
+
+
+def test_ragged_blocks(tmpdir):
+    from pylada.vasp import Extract
+
+    write_outcar(tmpdir, 1, steps=1)
+    text = tmpdir.join('OUTCAR').read().replace("      3       3.0000      0.00000\n", "")
+    tmpdir.join('OUTCAR').write(text)
+    a = Extract(str(tmpdir))
+    assert len(a._unpolarized_values(1)) == 2
+    assert a._unpolarized_values(1)[1] == [-4.0, 2.0]
+
+
+def test_overflowing_fields(tmpdir):
+    from numpy import all, abs
+    from pylada.vasp import Extract
+
+    write_outcar(tmpdir, 1, steps=1)
+    text = tmpdir.join('OUTCAR').read().replace("0.50000", "*******")
+    tmpdir.join('OUTCAR').write(text)
+    a = Extract(str(tmpdir))
+    assert all(abs(a._unpolarized_values(1) - [[-5.0, 1.0, 2.0], [-4.0, 2.0, 3.0]]) < 1e-8)
+
+
+def test_ragged_spin_blocks(tmpdir):
+    from numpy import all, abs
+    from pylada.vasp import Extract
+
+    write_outcar(tmpdir, 2, steps=1)
+    text = tmpdir.join('OUTCAR').read().replace("      3       3.5000      0.00000\n", "")
+    tmpdir.join('OUTCAR').write(text)
+    a = Extract(str(tmpdir))
+    values = a._spin_polarized_values(1)
+    assert len(values) == 2
+    assert all(abs(values[0] - [[-5.0, 1.0, 2.0], [-4.0, 2.0, 3.0]]) < 1e-8)
+    assert values[1][1] == [-4.5, 2.5]
@@ -0,0 +1,97 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from os.path import join, dirname
+
+COMMON = join(dirname(__file__), 'data', 'COMMON')
+
+
+def test_index_sections():
+    from pylada.vasp.extract.outcar import OutcarIndex
+
+    with open(COMMON, 'rb') as file:
+        index = OutcarIndex(file)
+        assert len(index['positions']) == 3
+        assert len(index['stress']) == 3
+        assert len(index['energy']) == 3
+        assert len(index['spin2']) == 0
+        assert index.last('kpoint1') < index.last('positions')
+        assert index.last('lattice', before=index.last('positions')) == index.last('lattice')
+        assert index.next('positions', index.first('positions')) == index['positions'][1]
+        line = next(index.lines(file, index.last('positions')))
+        assert 'TOTAL-FORCE' in line
+        assert index.text(file, index.last('fermi')).lstrip().startswith('E-fermi')
+
+
+def test_index_is_cached(tmpdir):
+    from shutil import copyfile
+    from pylada.vasp.extract.outcar import outcar_index
+
+    path = str(tmpdir.join('OUTCAR'))
+    copyfile(COMMON, path)
+    with open(path) as file:
+        first = outcar_index(file)
+    with open(path) as file:
+        assert outcar_index(file) is first
+
+    with open(path, 'a') as file:
+        file.write("\n  energy  without entropy=      -1.000000  energy(sigma->0) =      -1.000000\n")
+    with open(path) as file:
+        index = outcar_index(file)
+    assert index is not first
+    assert len(index['energy']) == len(first['energy']) + 1
+
+
+def test_extract_from_index(tmpdir):
+    from shutil import copyfile
+    from quantities import eV
+    from pylada.vasp import Extract
+
+    copyfile(COMMON, str(tmpdir.join('OUTCAR')))
+    a = Extract(str(tmpdir))
+    assert abs(a.total_energy + 10.665642 * eV) < 1e-5
+    assert len(a.forces) == 2
+    assert len(a._grep_structure) == 2
+
+    # new extraction objects see changes to the OUTCAR.
+    with tmpdir.join('OUTCAR').open('a') as file:
+        file.write("\n  energy  without entropy=      -1.000000  energy(sigma->0) =      -1.000000\n")
+    assert abs(Extract(str(tmpdir)).total_energy + 1.0 * eV) < 1e-8
+
+
+def test_forces_skip_incomplete_tables(tmpdir):
+    from numpy import allclose
+    from pylada.vasp import Extract
+
+    data = open(COMMON).read()
+    forces = Extract(COMMON).forces
+
+    # a step still being written: its table has no separator nor drift yet.
+    start = data.rindex('POSITION')
+    table = data[start:data.index('total drift', start)].splitlines(True)
+    table[2] = table[2].replace('0.000000', '9.000000')
+    tmpdir.join('OUTCAR').write(data + ''.join(table[:3]))
+    extract = Extract(str(tmpdir))
+    assert allclose(extract.forces.magnitude, forces.magnitude)
+
+    # a complete table is used.
+    tmpdir.join('OUTCAR').write(data + ''.join(table) + '    total drift:  0 0 0\n')
+    assert allclose(Extract(str(tmpdir)).forces.magnitude[0], 9)
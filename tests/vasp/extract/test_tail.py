@@ -0,0 +1,142 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from os.path import join, dirname
+
+COMMON = join(dirname(__file__), 'data', 'COMMON')
+
+
+def grow(path, data, start, end):
+    with open(path, 'ab') as file:
+        file.write(data[start:end])
+
+
+def test_tail_parses_complete_steps_only(tmpdir):
+    from numpy import allclose
+    from pylada.vasp import Extract
+    from pylada.vasp.extract.tail import OutcarTail
+
+    data = open(COMMON, 'rb').read()
+    path = str(tmpdir.join('OUTCAR'))
+    tail = OutcarTail(path)
+    assert tail.update() == 0
+
+    nsteps, previous = [], 0
+    for cut in [1000, 30000, 45000, 50000, 60000, len(data)]:
+        grow(path, data, previous, cut)
+        previous = cut
+        tail.update()
+        nsteps.append(tail.nsteps)
+    assert nsteps == [0, 0, 1, 1, 2, 3]
+    assert tail.offset <= len(data)
+
+    extract = Extract(COMMON)
+    assert allclose(tail.total_energies.magnitude, extract.total_energies.magnitude)
+    assert allclose(tail.forces[-1].magnitude, extract.forces.magnitude)
+    assert allclose(tail.stresses.magnitude, extract.stresses.magnitude)
+    assert tail.forces.shape == (3, 2, 3)
+
+
+def test_tail_only_reads_new_bytes(tmpdir):
+    from pylada.vasp.extract.tail import OutcarTail
+
+    data = open(COMMON, 'rb').read()
+    path = str(tmpdir.join('OUTCAR'))
+    grow(path, data, 0, 45000)
+    tail = OutcarTail(path)
+    assert tail.update() == 1
+    offset = tail.offset
+    energies = tail._energies
+    grow(path, data, 45000, len(data))
+    assert tail.update() == 2
+    assert tail.offset > offset
+    assert tail._energies is energies
+
+
+def test_tail_restarts_on_truncation(tmpdir):
+    from pylada.vasp.extract.tail import outcar_tail
+
+    data = open(COMMON, 'rb').read()
+    path = str(tmpdir.join('OUTCAR'))
+    grow(path, data, 0, len(data))
+    assert outcar_tail(path).nsteps == 3
+    with open(path, 'wb') as file:
+        file.write(data[:45000])
+    tail = outcar_tail(path)
+    assert tail.nsteps == 1
+    assert outcar_tail(str(tmpdir.join('.', 'OUTCAR'))) is tail
+
+
+def vasp5(data):
+    """ Moves the energy of each ionic step after its forces, as VASP 5 and 6 do. """
+    result = b''
+    while b'FREE ENERGIE' in data:
+        start = data.rindex(b'\n', 0, data.index(b'FREE ENERGIE')) + 1
+        stop = data.rindex(b'\n', 0, data.index(b'FORCE on cell', start)) + 1
+        drift = data.index(b'\n', data.index(b'total drift:', stop)) + 1
+        result += data[:start] + data[stop:drift] + data[start:stop]
+        data = data[drift:]
+    return result + data
+
+
+def test_tail_vasp5_ordering(tmpdir):
+    from numpy import allclose
+    from pylada.vasp import Extract
+    from pylada.vasp.extract.tail import OutcarTail
+
+    data = vasp5(open(COMMON, 'rb').read())
+    assert data.index(b'total drift:') < data.index(b'energy  without entropy=')
+    path = str(tmpdir.join('OUTCAR'))
+    tail = OutcarTail(path)
+    nsteps, previous = [], 0
+    for cut in range(0, len(data), 997):
+        grow(path, data, previous, cut)
+        previous = cut
+        tail.update()
+        nsteps.append(tail.nsteps)
+    grow(path, data, previous, len(data))
+    tail.update()
+    assert nsteps == sorted(nsteps)
+    assert tail.nsteps == 3
+
+    extract = Extract(COMMON)
+    assert len(tail.total_energies) == tail.nsteps
+    assert allclose(tail.total_energies.magnitude, extract.total_energies.magnitude)
+    assert allclose(tail.forces[-1].magnitude, extract.forces.magnitude)
+    assert allclose(tail.stresses.magnitude, extract.stresses.magnitude)
+
+
+def test_tail_restarts_on_rewrite_of_same_file(tmpdir):
+    from pylada.vasp.extract.tail import OutcarTail
+
+    data = open(COMMON, 'rb').read()
+    path = str(tmpdir.join('OUTCAR'))
+    grow(path, data, 0, 45000)
+    tail = OutcarTail(path)
+    assert tail.update() == 1
+    # restart in place: same inode, different header, larger than the last offset.
+    restart = data.replace(b'vasp.', b'VASP.', 1)
+    assert restart[:100] != data[:100]
+    with open(path, 'r+b') as file:
+        file.truncate(0)
+        file.write(restart)
+    assert tail.update() == 3
+    assert tail.nsteps == 3
@@ -0,0 +1,90 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture
+
+
+@fixture
+def vasp():
+    from os.path import dirname, join
+    from pylada.vasp import Vasp
+    vasp = Vasp()
+    vasp.kpoints = "Automatic generation\n0\nMonkhorst\n2 2 2\n0 0 0"
+    vasp.prec = "accurate"
+    vasp.ediff = 1e-5
+    vasp.encut = 1
+    vasp.ismear = "fermi"
+    vasp.sigma = 0.01
+    vasp.add_specie = "Si", join(dirname(__file__), 'pseudos', 'Si')
+    return vasp
+
+
+def structure(scale):
+    from pylada.crystal import Structure
+    return Structure([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]], scale=scale)\
+        .add_atom(0, 0, 0, "Si")\
+        .add_atom(0.25, 0.25, 0.25, "Si")
+
+
+def test_bringup_many_matches_bringup(vasp, tmpdir):
+    from os import getcwd
+    from copy import deepcopy
+    cwd = getcwd()
+    jobs = [(structure(5.4 + 0.01 * i), str(tmpdir.join('batch', str(i))), {'ediff': 1e-6 * i})
+            for i in range(1, 6)]
+    assert vasp.bringup_many(jobs, nworkers=3) == [u[1] for u in jobs]
+    assert getcwd() == cwd
+    assert abs(vasp.ediff - 1e-5) < 1e-12
+
+    for i, (structure_, outdir, overrides) in enumerate(jobs):
+        single = deepcopy(vasp)
+        single.ediff = overrides['ediff']
+        reference = tmpdir.join('single', str(i))
+        single.bringup(structure_, str(reference))
+        for filename in ['INCAR', 'KPOINTS', 'POTCAR', 'POSCAR', '.pylada_is_running']:
+            assert tmpdir.join('batch', str(i + 1), filename).read() \
+                == reference.join(filename).read()
+
+
+def test_bringup_many_unknown_override(vasp, tmpdir):
+    from pytest import raises
+    with raises(ValueError):
+        vasp.bringup_many([(structure(5.43), str(tmpdir), {'nothere': 1})])
+
+
+def test_bringdown_describes_functional(vasp, tmpdir):
+    from pylada.vasp import Extract
+    vasp.restart = Extract(str(tmpdir.join('previous')))
+    vasp.bringdown(str(tmpdir), structure(5.43))
+    assert tmpdir.join('pylada.FUNCTIONAL.json').check(file=True)
+    assert not tmpdir.join('pylada.FUNCTIONAL').check()
+
+    functional = Extract(str(tmpdir)).functional
+    assert repr(functional) == repr(vasp)
+    assert functional.restart.directory == str(tmpdir.join('previous'))
+    assert Extract(str(tmpdir)).functional is not functional
+
+
+def test_bringdown_falls_back_on_representation(vasp, tmpdir):
+    vasp.callback = lambda x: x
+    vasp.bringdown(str(tmpdir), structure(5.43))
+    assert not tmpdir.join('pylada.FUNCTIONAL.json').check()
+    assert tmpdir.join('pylada.FUNCTIONAL').check(file=True)
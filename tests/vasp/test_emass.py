@@ -0,0 +1,88 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture
+
+from pylada.vasp.emass import Extract
+
+
+class Parabolic(Extract):
+    """ Two bands with known curvatures, along paths of different lengths. """
+
+    def __init__(self, kpoints, curvatures):
+        super(Parabolic, self).__init__('.')
+        self._kpoints = kpoints
+        self.curvatures = curvatures
+
+    @property
+    def structure(self):
+        from pylada.crystal import Structure
+        return Structure([[1, 0, 0], [0, 1, 0], [0, 0, 1]], scale=2e0 * 3.141592653589793)
+
+    @property
+    def kpoints(self):
+        return self._kpoints
+
+    @property
+    def eigenvalues(self):
+        from numpy import array, sum
+        from quantities import eV
+        k2 = sum(self._kpoints**2, axis=1)
+        return array([0.5 * c * k2 + i for i, c in enumerate(self.curvatures)]).T * eV
+
+
+def kpoints(directions, nbpoints):
+    from numpy import array, arange, concatenate
+    results = []
+    for direction, n in zip(directions, nbpoints):
+        points = arange(-0.5, 0.5 + 1e-8, 1.0 / float(n))
+        results.append(array(direction, dtype='float64')[None, :] * points[:, None] * 0.1)
+    return concatenate(results)
+
+
+def test_batched_fits_match_direction_by_direction():
+    from numpy import allclose, dot, concatenate, pi, abs
+    from numpy.linalg import lstsq, inv
+    from math import factorial
+
+    directions = [[1, 0, 0], [0, 1, 0], [0, 0, 1], [1, 1, 0]]
+    extract = Parabolic(kpoints(directions, [4, 4, 6, 4]), [1.5, -3.0])
+    assert extract.breakpoints == [0, 5, 10, 17, 22]
+
+    orders = [0, 1, 2]
+    fits = extract.fit_directions(orders)
+    recipcell = inv(extract.structure.cell).T * 2e0 * pi / extract.structure.scale
+    for start, end, direction, fit in zip(extract.breakpoints[:-1], extract.breakpoints[1:],
+                                          extract.directions, fits):
+        x = dot(direction, dot(recipcell, extract.kpoints[start:end].T))
+        parameters = concatenate([x[:, None]**i / factorial(i) for i in orders], axis=1)
+        expected = lstsq(parameters, extract.eigenvalues.magnitude[start:end], rcond=None)[0]
+        assert allclose(fit, expected)
+        assert allclose(fit[2], [1.5, -3.0])
+
+    # fits are computed once, and callers get copies of the cached arrays
+    fits[0][...] = 0
+    assert allclose(extract.fit_directions(orders)[0][2], [1.5, -3.0])
+    assert extract._fits(orders) is extract._fits(orders)
+    masses = extract.emass(orders)
+    assert masses.shape == (4, 2)
+    assert allclose(masses[0].magnitude, masses[-1].magnitude)
+    assert all(abs(masses[:, 0]) > abs(masses[:, 1]))
@@ -0,0 +1,77 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from os.path import join, dirname
+from pytest import fixture
+
+PSEUDOS = join(dirname(__file__), 'pseudos')
+
+
+@fixture
+def store(tmpdir):
+    return str(tmpdir.join('store'))
+
+
+def test_potcar_info():
+    from hashlib import sha256
+    from pylada.vasp.potcar import potcar_info
+    path = join(PSEUDOS, 'Si', 'POTCAR')
+    info = potcar_info(path)
+    assert abs(info.enmax - 245.345) < 1e-8
+    assert abs(info.valence - 4) < 1e-8
+    assert info.titel == 'PAW_PBE Si 05Jan2001'
+    assert info.sha256 == sha256(open(path, 'rb').read()).hexdigest()
+    assert potcar_info(path) is info
+
+
+def test_specie_uses_cached_info():
+    from pylada.vasp.specie import Specie
+    specie = Specie(join(PSEUDOS, 'Si'))
+    assert abs(float(specie.enmax) - 245.345) < 1e-8
+    assert abs(specie.valence - 4) < 1e-8
+    assert specie.potcar_info.titel == 'PAW_PBE Si 05Jan2001'
+
+
+def test_assembled_once(store, tmpdir):
+    from os import stat
+    from pylada.vasp.potcar import assemble_potcar, install_potcar
+    paths = [join(PSEUDOS, u, 'POTCAR') for u in ['Si', 'O']]
+    expected = b''.join(open(u, 'rb').read() for u in paths)
+
+    first = assemble_potcar(paths, store)
+    assert open(first, 'rb').read() == expected
+    assert assemble_potcar(paths, store) == first
+    assert assemble_potcar(paths[::-1], store) != first
+
+    for name in ['a', 'b']:
+        destination = str(tmpdir.join(name, 'POTCAR'))
+        tmpdir.join(name).ensure(dir=True)
+        install_potcar(paths, destination, store)
+        assert open(destination, 'rb').read() == expected
+        assert stat(destination).st_ino == stat(first).st_ino
+
+
+def test_install_without_store(tmpdir):
+    from pylada.vasp.potcar import install_potcar
+    paths = [join(PSEUDOS, u, 'POTCAR') for u in ['Zn', 'O']]
+    destination = str(tmpdir.join('POTCAR'))
+    install_potcar(paths, destination, None)
+    assert open(destination, 'rb').read() == b''.join(open(u, 'rb').read() for u in paths)
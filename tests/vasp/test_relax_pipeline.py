@@ -0,0 +1,90 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture
+
+from os.path import join, dirname
+from pylada.process.process import Process
+from pylada.vasp import Vasp
+
+COMMON = join(dirname(__file__), 'extract', 'data', 'COMMON')
+
+
+class FakeProcess(Process):
+    """ Stands for a VASP call. """
+
+    def poll(self): return True
+
+    def start(self, comm=None): return False
+
+    def wait(self): return True
+
+
+class FakeVasp(Vasp):
+    """ Writes a finished OUTCAR instead of calling VASP. """
+
+    threads = {}
+    """ Maps directories to the thread in which they were brought up. """
+
+    def iter(self, structure, outdir=None, **kwargs):
+        from os import makedirs
+        from shutil import copyfile
+        from threading import current_thread
+        FakeVasp.threads[outdir] = current_thread().name
+        extract = Vasp.Extract(outdir)
+        if extract.success:
+            yield extract
+            return
+        makedirs(outdir, exist_ok=True)
+        yield FakeProcess()
+        copyfile(COMMON, join(outdir, 'OUTCAR'))
+        yield Vasp.Extract(outdir)
+
+
+def test_pipelined_relaxation(tmpdir):
+    from os.path import exists
+    from pylada.crystal import Structure
+    from pylada.vasp.relax import iter_relax
+
+    structure = Structure([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]], scale=5.43)\
+        .add_atom(0, 0, 0, "Si")\
+        .add_atom(0.25, 0.25, 0.25, "Si")
+    vasp = FakeVasp()
+    vasp.ediff = 1e-4
+    vasp.relaxation = 'cellshape'
+
+    outdir = str(tmpdir.join('relax'))
+    processes = 0
+    for u in iter_relax(vasp, structure, outdir=outdir, convergence=1e3, minrelsteps=2):
+        processes += isinstance(u, Process)
+    assert processes == 3
+    assert exists(join(outdir, 'relax_cellshape', '1', 'OUTCAR'))
+    # the speculative third step was staged, then discarded on convergence.
+    assert not exists(join(outdir, 'relax_cellshape', '2'))
+    # steps after the first are staged in the background.
+    threads = {k: v == 'MainThread' for k, v in FakeVasp.threads.items()}
+    assert threads[join(outdir, 'relax_cellshape', '0')]
+    assert not threads[join(outdir, 'relax_cellshape', '1')]
+    assert not threads[join(outdir, 'relax_cellshape', '2')]
+
+    details = iter_relax.Extract(outdir).details
+    assert set(details.idle_times) == {'/relax_cellshape/1', '/'}
+    assert all(u >= 0 for u in details.idle_times.values())
@@ -0,0 +1,176 @@
+###############################
+#  This file is part of PyLaDa.
+#
+#  Copyright (C) 2013 National Renewable Energy Lab
+#
+#  PyLaDa is a high throughput computational platform for Physics. It aims to make it easier to submit
+#  large numbers of jobs on supercomputers. It provides a python interface to physical input, such as
+#  crystal structures, as well as to a number of DFT (VASP, CRYSTAL) and atomic potential programs. It
+#  is able to organise and launch computational jobs on PBS and SLURM.
+#
+#  PyLaDa is free software: you can redistribute it and/or modify it under the terms of the GNU General
+#  Public License as published by the Free Software Foundation, either version 3 of the License, or (at
+#  your option) any later version.
+#
+#  PyLaDa is distributed in the hope that it will be useful, but WITHOUT ANY WARRANTY; without even
+#  the implied warranty of MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU General
+#  Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License along with PyLaDa.  If not, see
+#  <http://www.gnu.org/licenses/>.
+###############################
+from pytest import fixture
+from pytest import fixture
+
+from os.path import join, dirname
+from .test_relax_pipeline import FakeProcess
+
+COMMON = join(dirname(__file__), 'extract', 'data', 'COMMON')
+
+
+@fixture
+def sweep(tmpdir):
+    """ Job-folder tree with one finished silicon calculation. """
+    from shutil import copyfile
+    from pylada.vasp import Vasp
+    directory = tmpdir.join('sweep', 'Si', 'strain_0')
+    directory.ensure(dir=True)
+    copyfile(COMMON, str(directory.join('OUTCAR')))
+    directory.join('CHGCAR').write('charge')
+    directory.join('WAVECAR').write('wavefunctions')
+    directory.join('pylada.FUNCTIONAL').write(repr(Vasp()))
+    return tmpdir.join('sweep')
+
+
+def silicon(strain=0, pos=0.25):
+    from pylada.crystal import Structure
+    return Structure([[0, 0.5, 0.5], [0.5, 0, 0.5], [0.5, 0.5, 0]], scale=5.47225 * (1 + strain))\
+        .add_atom(0, 0, 0, "Si")\
+        .add_atom(pos, pos, pos, "Si")
+
+
+def test_distance():
+    from numpy import isinf
+    from pylada.vasp.warmstart import fingerprint, distance
+
+    a = fingerprint(silicon())
+    assert abs(distance(a, a)) < 1e-12
+    # invariant to rotations and lattice translations.
+    rotated = silicon()
+    rotated.cell = rotated.cell[:, [1, 2, 0]]
+    for atom in rotated:
+        atom.pos = atom.pos[[1, 2, 0]]
+    rotated[1].pos += rotated.cell[:, 0]
+    assert abs(distance(a, fingerprint(rotated))) < 1e-8
+    assert distance(a, fingerprint(silicon(0.01))) < distance(a, fingerprint(silicon(0.02)))
+    decorated = silicon()
+    decorated[1].type = 'Ge'
+    assert abs(distance(a, fingerprint(decorated)) - 0.5) < 1e-8
+    assert isinf(distance(a, fingerprint(silicon().add_atom(0.5, 0.5, 0.5, 'Si'))))
+
+
+def test_warm_start(sweep, tmpdir):
+    from os.path import islink, exists
+    from pylada.vasp import Vasp
+    from pylada.vasp.warmstart import WarmStartIndex, WARMSTART_DIR
+
+    index = WarmStartIndex(str(sweep), tolerance=0.1)
+    assert index.nearest(silicon(0.5)) is None
+
+    structure = silicon(0.02, pos=0.26)
+    outdir = str(tmpdir.join('Si', 'strain_2'))
+    restart = index.warm_start(structure, Vasp(), outdir)
+    assert restart is not None and restart.success
+    assert restart.extract.directory == str(sweep.join('Si', 'strain_0'))
+    assert restart.directory == join(outdir, WARMSTART_DIR)
+    # positions of the finished calculation, in the new cell.
+    assert abs(restart.structure.scale - structure.scale) < 1e-8
+    assert all(abs(restart.structure.cell - structure.cell).flatten() < 1e-8)
+    assert all(abs(restart.structure[1].pos - [0.25, 0.25, 0.25]) < 1e-4)
+    assert all(abs(structure[1].pos - [0.26, 0.26, 0.26]) < 1e-8)
+    assert islink(join(restart.directory, 'CHGCAR'))
+    assert islink(join(restart.directory, 'WAVECAR'))
+
+    # wavefunctions are not restarted from a different basis.
+    vasp = Vasp()
+    vasp.encut = 1.5
+    restart = index.warm_start(structure, vasp, outdir)
+    assert islink(join(restart.directory, 'CHGCAR'))
+    assert not exists(join(restart.directory, 'WAVECAR'))
+
+    # neither charge nor wavefunctions are restarted from different atoms.
+    decorated = silicon(0.02, pos=0.26)
+    decorated[1].type = 'Ge'
+    restart = WarmStartIndex(str(sweep), tolerance=1).warm_start(decorated, Vasp(), outdir)
+    assert restart is not None
+    assert not exists(join(restart.directory, 'CHGCAR'))
+    assert not exists(join(restart.directory, 'WAVECAR'))
+
+
+def test_rescans_are_throttled(sweep, tmpdir):
+    from shutil import move
+    from pylada.vasp.warmstart import WarmStartIndex
+
+    finished = str(tmpdir.join('finished'))
+    move(str(sweep.join('Si', 'strain_0')), finished)
+    index = WarmStartIndex(str(sweep), period=3600)
+    eager = WarmStartIndex(str(sweep), period=0)
+    assert index.nearest(silicon(0.02)) is None
+    assert eager.nearest(silicon(0.02)) is None
+    move(finished, str(sweep.join('Si', 'strain_0')))
+    # new calculations are only seen once the period elapses, or on demand.
+    assert index.nearest(silicon(0.02)) is None
+    assert eager.nearest(silicon(0.02)) is not None
+    index.update()
+    assert index.nearest(silicon(0.02)) is not None
+
+
+def test_restart_files_are_copied(sweep, tmpdir):
+    from pylada.vasp import Vasp
+    from pylada.vasp.warmstart import WarmStartIndex
+
+    structure = silicon(0.02)
+    outdir = tmpdir.join('run')
+    outdir.ensure(dir=True)
+    vasp = Vasp()
+    vasp.restart = WarmStartIndex(str(sweep)).warm_start(structure, vasp, str(outdir))
+    vasp._input['istart'].output_map(vasp=vasp, outdir=str(outdir))
+    vasp._input['icharg'].output_map(vasp=vasp, outdir=str(outdir))
+    assert outdir.join('WAVECAR').read() == 'wavefunctions'
+    assert outdir.join('CHGCAR').read() == 'charge'
+
+
+def test_relaxation_starts_warm(sweep, tmpdir):
+    from shutil import copyfile
+    from os import makedirs
+    from pylada.vasp import Vasp
+    from pylada.vasp.relax import iter_relax
+    from pylada.vasp.warmstart import WarmStart, WarmStartIndex
+
+    restarts = []
+
+    class RecordingVasp(Vasp):
+        """ Records restarts and writes a finished OUTCAR. """
+
+        def iter(self, structure, outdir=None, restart=None, **kwargs):
+            extract = Vasp.Extract(outdir)
+            if extract.success:
+                yield extract
+                return
+            restarts.append((restart, structure))
+            makedirs(outdir, exist_ok=True)
+            yield FakeProcess()
+            copyfile(COMMON, join(outdir, 'OUTCAR'))
+            yield Vasp.Extract(outdir)
+
+    vasp = RecordingVasp()
+    vasp.ediff = 1e-4
+    vasp.relaxation = 'ionic'
+    outdir = str(tmpdir.join('relax'))
+    index = WarmStartIndex(str(sweep))
+    for u in iter_relax(vasp, silicon(0.02, 0.26), outdir=outdir, convergence=1e3,
+                        warmstart=index):
+        pass
+    assert isinstance(restarts[0][0], WarmStart)
+    assert all(abs(restarts[0][1][1].pos - [0.25, 0.25, 0.25]) < 1e-4)
+    assert all(not isinstance(u, WarmStart) for u, _ in restarts[1:])